@@ -1,28 +1,9 @@
 import os
-import time
-import logging
-from datetime import datetime, timedelta
+import runpy
 
-RETENTION_DAYS = 7
-BASE_DIRS = ["data/raw", "data/staging", "logs"]
-
-logging.basicConfig(
-    filename="logs/scheduler_activity.log",
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s"
+# Kept so existing cron entries keep working; the retention engine itself
+# lives in scripts/cleanup_old_data.py and reads its policies from config.yaml.
+runpy.run_path(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "scripts", "cleanup_old_data.py"),
+    run_name="__main__"
 )
-
-cutoff = time.time() - (RETENTION_DAYS * 86400)
-
-for base in BASE_DIRS:
-    if not os.path.exists(base):
-        continue
-
-    for root, dirs, files in os.walk(base):
-        for file in files:
-            path = os.path.join(root, file)
-            if "report" in file or "summary" in file:
-                continue
-            if os.path.getmtime(path) < cutoff:
-                os.remove(path)
-                logging.info(f"Deleted old file: {path}")
\ No newline at end of file
@@ -1,30 +1,9 @@
-import schedule
-import time
-import subprocess
-import logging
-from datetime import datetime
-
-logging.basicConfig(
-    filename="logs/scheduler_activity.log",
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s"
+import os
+import runpy
+
+# Kept so existing service definitions keep working; the scheduler itself
+# lives in scripts/scheduler.py and reads its settings from config.yaml.
+runpy.run_path(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "scripts", "scheduler.py"),
+    run_name="__main__"
 )
-
-def run_pipeline():
-    logging.info("Starting scheduled pipeline execution")
-    try:
-        subprocess.run(
-            ["python", "scripts/pipeline_orchestrator.py"],
-            check=True
-        )
-        logging.info("Pipeline completed successfully")
-    except Exception as e:
-        logging.error(f"Pipeline failed: {e}")
-
-schedule.every().day.at("10:00").do(run_pipeline)
-
-logging.info("Scheduler started")
-
-while True:
-    schedule.run_pending()
-    time.sleep(60)
\ No newline at end of file
@@ -0,0 +1,456 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import threading
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from datetime import date, datetime
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+# The SQL and monthly_trend's daily sketches are shared with generate_analytics.py
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "transformation"))
+import analytics_queries
+from unique_counts import unique_counts
+
+# --------------------------------------------------
+# Read-only analytics query service
+#
+#   python scripts/api/analytics_api.py                 # serve :8080
+#   curl -s 'localhost:8080/queries/top_products?category=Electronics&limit=5'
+#   curl -s localhost:8080/metrics                      # latency / cache stats
+#
+# Serves the analytical queries from the published warehouse
+# (bi_tool.warehouse_schema), so answers never reflect a half-finished load.
+# Results are cached per (query, parameters, warehouse version): a publish
+# bumps the version and makes every older entry unreachable, the TTL bounds
+# how long an entry lives anyway and the LRU bound caps memory. ETags are
+# the hash of the response body, so clients revalidate with If-None-Match
+# and get a 304 without the body when nothing changed. See
+# docs/api_documentation.md.
+# --------------------------------------------------
+DEFAULT_API_CONFIG = {
+    "host": "0.0.0.0",
+    "port": 8080,
+    "pool_min_connections": 1,
+    "pool_max_connections": 8,
+    "pool_wait_seconds": 5,
+    "statement_timeout_seconds": 10,
+    "cache_entries": 256,
+    "cache_ttl_seconds": 300,
+    "version_check_seconds": 5,
+    "max_limit": 100,
+    "exact_distinct": False
+}
+LATENCY_WINDOW = 2048
+QUANTILES = [0.5, 0.95, 0.99]
+
+def load_api_config():
+    import yaml
+    with open("config/config.yaml", "r") as f:
+        config = yaml.safe_load(f)
+    settings = dict(DEFAULT_API_CONFIG, **(config.get("analytics_api") or {}))
+    settings.setdefault("schema", config["bi_tool"]["warehouse_schema"])
+    return settings
+
+# --------------------------------------------------
+# Queries
+#
+# The SQL lives in transformation/analytics_queries.py. {schema} is the
+# published warehouse schema; {filters} is built from the request
+# parameters. Dates filter on fact_sales.date_key (YYYYMMDD), so they use
+# the same integers as dim_date instead of a join.
+# --------------------------------------------------
+QUERIES = {name: q for name, q in analytics_queries.QUERIES.items() if q["api"]}
+
+class BadRequest(Exception):
+    pass
+
+def parse_params(name, query_string, max_limit):
+    """Validate the query string into a normalised, hashable parameter dict."""
+    allowed = QUERIES[name]["parameters"]
+    raw = {key: values[-1] for key, values in parse_qs(query_string).items()}
+
+    unknown = sorted(set(raw) - set(allowed))
+    if unknown:
+        raise BadRequest(f"Unknown parameter(s) for {name}: {', '.join(unknown)} (allowed: {', '.join(allowed) or 'none'})")
+
+    params = {}
+    for key in ("start_date", "end_date"):
+        if key in raw:
+            try:
+                params[key] = date.fromisoformat(raw[key])
+            except ValueError:
+                raise BadRequest(f"{key} must be YYYY-MM-DD")
+    if "start_date" in params and "end_date" in params and params["start_date"] > params["end_date"]:
+        raise BadRequest("start_date is after end_date")
+
+    if raw.get("category"):
+        params["category"] = raw["category"]
+
+    if "limit" in allowed:
+        try:
+            params["limit"] = int(raw.get("limit", analytics_queries.DEFAULT_LIMIT))
+        except ValueError:
+            raise BadRequest("limit must be an integer")
+        if not 1 <= params["limit"] <= max_limit:
+            raise BadRequest(f"limit must be between 1 and {max_limit}")
+    return params
+
+def build_sql(name, schema, params):
+    filters = ["TRUE"]
+    if "start_date" in params:
+        filters.append("fs.date_key >= %(start_key)s")
+    if "end_date" in params:
+        filters.append("fs.date_key <= %(end_key)s")
+    if "category" in params:
+        filters.append(f"fs.product_key IN (SELECT product_key FROM {schema}.dim_products WHERE category = %(category)s)")
+
+    sql_params = dict(params)
+    for key, date_key in (("start_date", "start_key"), ("end_date", "end_key")):
+        if key in params:
+            sql_params[date_key] = int(params[key].strftime("%Y%m%d"))
+
+    return analytics_queries.render(name, schema, " AND ".join(filters), "%(limit)s"), sql_params
+
+UNIQUE_COUNT_QUERIES = {name: q["unique_counts"] for name, q in QUERIES.items() if "unique_counts" in q}
+
+def add_unique_counts(conn, rows, params, schema, exact):
+    """Columns and rows of query2_monthly_trend: the SQL result joined with
+    the month's unique transaction / customer counts."""
+    counts = {
+        (c["year"], c["month"]): c
+        for c in unique_counts(
+            conn, "month", params.get("start_date"), params.get("end_date"),
+            exact=exact, schema=schema, category=params.get("category")
+        )
+    }
+    columns = ["year", "month", "total_revenue", "total_transactions", "average_order_value", "unique_customers"]
+    merged = []
+    for year, month, total_revenue, average_order_value in rows:
+        c = counts.get((year, month), {})
+        merged.append((year, month, total_revenue, c.get("unique_transactions"),
+                       average_order_value, c.get("unique_customers")))
+    return columns, merged
+
+def fetch(conn, sql, params=None):
+    cur = conn.cursor()
+    cur.execute(sql, params)
+    columns = [c.name for c in cur.description]
+    rows = cur.fetchall()
+    cur.close()
+    return columns, rows
+
+def to_json(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+# --------------------------------------------------
+# Connection pool
+# --------------------------------------------------
+class ConnectionPool:
+    """ThreadedConnectionPool that waits for a free connection instead of failing."""
+
+    def __init__(self, config):
+        from psycopg2.pool import ThreadedConnectionPool
+
+        self.pool = ThreadedConnectionPool(
+            config["pool_min_connections"],
+            config["pool_max_connections"],
+            host=os.environ.get("DB_HOST", "localhost"),
+            port=int(os.environ.get("DB_PORT", 5432)),
+            dbname=os.environ.get("DB_NAME", "ecommerce_db"),
+            user=os.environ.get("DB_USER", "admin"),
+            password=os.environ.get("DB_PASSWORD", "password"),
+            application_name="analytics_api",
+            options=f"-c statement_timeout={int(config['statement_timeout_seconds'] * 1000)}"
+        )
+        self.slots = threading.BoundedSemaphore(config["pool_max_connections"])
+        self.wait_seconds = config["pool_wait_seconds"]
+
+    @contextmanager
+    def connection(self):
+        if not self.slots.acquire(timeout=self.wait_seconds):
+            raise TimeoutError(f"No database connection free within {self.wait_seconds}s")
+        conn = None
+        broken = False
+        try:
+            conn = self.pool.getconn()
+            if conn.autocommit is False:
+                conn.set_session(readonly=True, autocommit=True)
+            yield conn
+        except Exception:
+            broken = conn is not None and conn.closed
+            raise
+        finally:
+            if conn is not None:
+                self.pool.putconn(conn, close=broken)
+            self.slots.release()
+
+    def run(self, sql, params=None):
+        with self.connection() as conn:
+            return fetch(conn, sql, params)
+
+    def close(self):
+        self.pool.closeall()
+
+# --------------------------------------------------
+# LRU + TTL result cache
+# --------------------------------------------------
+class ResultCache:
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0}
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] <= time.time():
+                del self.entries[key]
+                self.stats["expired"] += 1
+                entry = None
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            self.entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry[1]
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.time() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def hit_ratio(self):
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return round(self.stats["hits"] / lookups, 4) if lookups else None
+
+# --------------------------------------------------
+# Latency / request metrics
+# --------------------------------------------------
+class RequestMetrics:
+    """Recent latencies per endpoint (sliding window) and counters by status."""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self.window = window
+        self.latencies = {}
+        self.requests = {}
+        self.lock = threading.Lock()
+
+    def observe(self, endpoint, status, seconds):
+        with self.lock:
+            self.latencies.setdefault(endpoint, deque(maxlen=self.window)).append(seconds)
+            self.requests[(endpoint, status)] = self.requests.get((endpoint, status), 0) + 1
+
+    def counts(self):
+        with self.lock:
+            return dict(self.requests)
+
+    def quantiles(self):
+        with self.lock:
+            windows = {endpoint: sorted(values) for endpoint, values in self.latencies.items()}
+        return {
+            endpoint: {q: values[min(int(q * len(values)), len(values) - 1)] for q in QUANTILES}
+            for endpoint, values in windows.items() if values
+        }
+
+# --------------------------------------------------
+# Service
+# --------------------------------------------------
+class AnalyticsService:
+    def __init__(self, config):
+        self.config = config
+        self.schema = config["schema"]
+        self.pool = ConnectionPool(config)
+        self.cache = ResultCache(config["cache_entries"], config["cache_ttl_seconds"])
+        self.metrics = RequestMetrics()
+        self.version = None
+        self.version_checked_at = 0.0
+        self.version_lock = threading.Lock()
+
+    def warehouse_version(self):
+        # one cheap lookup per version_check_seconds, not per request
+        with self.version_lock:
+            if time.time() - self.version_checked_at >= self.config["version_check_seconds"]:
+                _, rows = self.pool.run("SELECT COALESCE(MAX(version), 0) FROM monitoring.warehouse_publishes")
+                self.version = rows[0][0]
+                self.version_checked_at = time.time()
+            return self.version
+
+    def query(self, name, params):
+        """Returns (body bytes, etag, cache status)."""
+        version = self.warehouse_version()
+        key = (name, tuple(sorted(params.items())), version)
+
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached[0], cached[1], "HIT"
+
+        sql, sql_params = build_sql(name, self.schema, params)
+        result = {"query": name, "parameters": params, "warehouse_version": version}
+        with self.pool.connection() as conn:
+            columns, rows = fetch(conn, sql, sql_params)
+            if name in UNIQUE_COUNT_QUERIES:
+                # category filters are always counted exactly (see unique_counts.py)
+                exact = self.config["exact_distinct"] or "category" in params
+                columns, rows = add_unique_counts(conn, rows, params, self.schema, exact)
+                result["distinct_counts"] = "exact" if exact else "hyperloglog"
+
+        body = json.dumps(dict(result, columns=columns, rows=rows, row_count=len(rows)), default=to_json).encode("utf-8")
+        etag = f'"{version}-{hashlib.sha256(body).hexdigest()[:20]}"'
+
+        self.cache.put(key, (body, etag))
+        return body, etag, "MISS"
+
+    def catalog(self):
+        return json.dumps({
+            "schema": self.schema,
+            "queries": {
+                name: {"description": q["description"], "parameters": q["parameters"]}
+                for name, q in QUERIES.items()
+            }
+        }).encode("utf-8")
+
+    def render_metrics(self):
+        lines = [
+            "# HELP analytics_api_request_duration_seconds Request latency over the last requests per endpoint",
+            "# TYPE analytics_api_request_duration_seconds summary"
+        ]
+        for endpoint, quantiles in sorted(self.metrics.quantiles().items()):
+            for q, value in quantiles.items():
+                lines.append(
+                    f'analytics_api_request_duration_seconds{{endpoint="{endpoint}",quantile="{q}"}} {round(value, 6)}'
+                )
+
+        lines += ["# HELP analytics_api_requests_total Requests served",
+                  "# TYPE analytics_api_requests_total counter"]
+        for (endpoint, status), count in sorted(self.metrics.counts().items()):
+            lines.append(f'analytics_api_requests_total{{endpoint="{endpoint}",status="{status}"}} {count}')
+
+        lines += ["# HELP analytics_api_cache_events_total Result cache lookups and evictions",
+                  "# TYPE analytics_api_cache_events_total counter"]
+        for event, count in dict(self.cache.stats).items():
+            lines.append(f'analytics_api_cache_events_total{{event="{event}"}} {count}')
+
+        lines += ["# HELP analytics_api_cache_hit_ratio Cache hits / lookups since start",
+                  "# TYPE analytics_api_cache_hit_ratio gauge",
+                  f"analytics_api_cache_hit_ratio {self.cache.hit_ratio() or 0}",
+                  "# HELP analytics_api_cache_entries Results currently cached",
+                  "# TYPE analytics_api_cache_entries gauge",
+                  f"analytics_api_cache_entries {len(self.cache.entries)}",
+                  "# HELP analytics_api_warehouse_version Published warehouse version being served",
+                  "# TYPE analytics_api_warehouse_version gauge",
+                  f"analytics_api_warehouse_version {self.version or 0}"]
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+# --------------------------------------------------
+# HTTP
+# --------------------------------------------------
+def make_handler(service):
+    class AnalyticsHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            start = time.time()
+            url = urlsplit(self.path)
+            endpoint = url.path
+            status = 500
+
+            try:
+                if url.path == "/queries":
+                    status = self.send_body(200, service.catalog())
+                elif url.path.startswith("/queries/"):
+                    name = url.path[len("/queries/"):]
+                    if name not in QUERIES:
+                        endpoint = "other"  # keeps the metric labels bounded
+                        status = self.send_json_error(404, f"Unknown query: {name}")
+                    else:
+                        status = self.serve_query(name, url.query)
+                elif url.path == "/metrics":
+                    status = self.send_body(200, service.render_metrics(), "text/plain; version=0.0.4; charset=utf-8")
+                elif url.path == "/health":
+                    status = self.send_body(200, json.dumps({"status": "ok"}).encode("utf-8"))
+                else:
+                    endpoint = "other"
+                    status = self.send_json_error(404, "Not found")
+            except BadRequest as e:
+                status = self.send_json_error(400, str(e))
+            except TimeoutError as e:
+                status = self.send_json_error(503, str(e))
+            except Exception as e:
+                status = self.send_json_error(500, f"{type(e).__name__}: {e}")
+            finally:
+                service.metrics.observe(endpoint, status, time.time() - start)
+
+        def serve_query(self, name, query_string):
+            params = parse_params(name, query_string, service.config["max_limit"])
+            body, etag, cache_status = service.query(name, params)
+
+            headers = {"ETag": etag, "Cache-Control": "no-cache", "X-Cache": cache_status}
+            if etag in [t.strip() for t in self.headers.get("If-None-Match", "").split(",")]:
+                return self.send_body(304, b"", headers=headers)
+            return self.send_body(200, body, headers=headers)
+
+        def send_json_error(self, status, message):
+            return self.send_body(status, json.dumps({"error": message}).encode("utf-8"))
+
+        def send_body(self, status, body, content_type="application/json", headers=None):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            for header, value in (headers or {}).items():
+                self.send_header(header, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if body:
+                self.wfile.write(body)
+            return status
+
+        def log_message(self, format, *args):
+            pass
+
+    return AnalyticsHandler
+
+# --------------------------------------------------
+# Main
+# --------------------------------------------------
+def parse_args():
+    parser = argparse.ArgumentParser(description="Read-only HTTP service for the analytical queries")
+    parser.add_argument("--port", type=int, help="Override analytics_api.port from config.yaml")
+    parser.add_argument("--schema", help="Serve this schema instead of bi_tool.warehouse_schema, e.g. warehouse")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    config = load_api_config()
+    if args.port:
+        config["port"] = args.port
+    if args.schema:
+        config["schema"] = args.schema
+
+    service = AnalyticsService(config)
+    server = ThreadingHTTPServer((config["host"], config["port"]), make_handler(service))
+    server.daemon_threads = True
+    print(f"Serving {config['schema']} analytics on :{config['port']}/queries")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.pool.close()
+
+if __name__ == "__main__":
+    main()
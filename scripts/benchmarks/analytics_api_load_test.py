@@ -0,0 +1,155 @@
+import os
+import json
+import time
+import random
+import argparse
+import threading
+from datetime import datetime, timezone
+from urllib.error import HTTPError
+from urllib.parse import quote
+from urllib.request import Request, urlopen
+
+# --------------------------------------------------
+# Load test for scripts/api/analytics_api.py
+#
+#   docker compose -f docker/docker-compose.yml up -d postgres analytics_api
+#   python scripts/benchmarks/analytics_api_load_test.py --duration 30 --concurrency 16
+#
+# Each worker picks a random query and parameter set from a small pool (so
+# the result cache sees realistic repeats) and, for a share of requests,
+# revalidates with the ETag it got last time. Client-side latency
+# percentiles come from here; the service's own percentiles and cache hit
+# ratio are read from its /metrics afterwards.
+# --------------------------------------------------
+OUTPUT_FILE = "data/processed/analytics_api_load_test.json"
+CATEGORIES = ["Electronics", "Clothing", "Home & Kitchen", "Books", "Sports", "Beauty"]
+DATE_RANGES = [
+    (None, None),
+    ("2023-01-01", "2023-12-31"),
+    ("2024-01-01", "2024-03-31"),
+    ("2024-04-01", "2024-06-30"),
+    ("2024-01-01", "2024-12-31")
+]
+QUERY_NAMES = [
+    "top_products", "monthly_trend", "customer_segmentation",
+    "category_performance", "payment_distribution"
+]
+
+def build_paths(variants):
+    rng = random.Random(42)
+    paths = []
+    for _ in range(variants):
+        name = rng.choice(QUERY_NAMES)
+        params = []
+        if name != "customer_segmentation":
+            start, end = rng.choice(DATE_RANGES)
+            if start:
+                params += [f"start_date={start}", f"end_date={end}"]
+            if rng.random() < 0.5:
+                params.append(f"category={quote(rng.choice(CATEGORIES))}")
+        if name == "top_products":
+            params.append(f"limit={rng.choice([5, 10, 25])}")
+        paths.append(f"/queries/{name}" + ("?" + "&".join(params) if params else ""))
+    return sorted(set(paths))
+
+def percentile(values, q):
+    values = sorted(values)
+    return round(values[min(int(q * len(values)), len(values) - 1)] * 1000, 2) if values else None
+
+def worker(base_url, paths, deadline, revalidate_share, results, lock):
+    rng = random.Random()
+    etags = {}
+    latencies, statuses = [], {}
+
+    while time.time() < deadline:
+        path = rng.choice(paths)
+        request = Request(base_url + path)
+        if path in etags and rng.random() < revalidate_share:
+            request.add_header("If-None-Match", etags[path])
+
+        start = time.perf_counter()
+        try:
+            with urlopen(request, timeout=30) as response:
+                response.read()
+                status = response.status
+                etags[path] = response.headers.get("ETag", etags.get(path))
+        except HTTPError as e:
+            status = e.code
+        except OSError:
+            status = "connection_error"
+        latencies.append(time.perf_counter() - start)
+        statuses[status] = statuses.get(status, 0) + 1
+
+    with lock:
+        results["latencies"] += latencies
+        for status, count in statuses.items():
+            results["statuses"][str(status)] = results["statuses"].get(str(status), 0) + count
+
+def service_metrics(base_url):
+    with urlopen(base_url + "/metrics", timeout=10) as response:
+        text = response.read().decode("utf-8")
+    return {
+        line.split(" ")[0]: float(line.split(" ")[1])
+        for line in text.splitlines()
+        if line.startswith(("analytics_api_cache", "analytics_api_request_duration_seconds{endpoint=\"/queries/"))
+    }
+
+# --------------------------------------------------
+# Main
+# --------------------------------------------------
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load test the analytics query service")
+    parser.add_argument("--url", default="http://localhost:8080")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds to run")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--variants", type=int, default=40, help="Distinct query/parameter combinations")
+    parser.add_argument("--revalidate-share", type=float, default=0.3,
+                        help="Share of repeat requests sent with If-None-Match")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    paths = build_paths(args.variants)
+    results = {"latencies": [], "statuses": {}}
+    lock = threading.Lock()
+
+    start = time.time()
+    deadline = start + args.duration
+    threads = [
+        threading.Thread(target=worker, args=(args.url, paths, deadline, args.revalidate_share, results, lock))
+        for _ in range(args.concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.time() - start
+
+    latencies = results["latencies"]
+    report = {
+        "test_timestamp": datetime.now(timezone.utc).isoformat(),
+        "url": args.url,
+        "duration_seconds": round(elapsed, 2),
+        "concurrency": args.concurrency,
+        "distinct_paths": len(paths),
+        "requests": len(latencies),
+        "requests_per_second": round(len(latencies) / elapsed, 2) if elapsed else None,
+        "statuses": results["statuses"],
+        "client_latency_ms": {f"p{int(q * 100)}": percentile(latencies, q) for q in (0.5, 0.95, 0.99)},
+        "service_metrics": service_metrics(args.url)
+    }
+
+    print(
+        f"{report['requests']} requests, {report['requests_per_second']} req/s, "
+        f"p50 {report['client_latency_ms']['p50']} ms, p99 {report['client_latency_ms']['p99']} ms, "
+        f"cache hit ratio {report['service_metrics'].get('analytics_api_cache_hit_ratio')}"
+    )
+
+    os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
+    with open(OUTPUT_FILE, "w") as f:
+        json.dump(report, f, indent=4)
+
+    print(f"Analytics API load test written to {OUTPUT_FILE}")
+
+if __name__ == "__main__":
+    main()
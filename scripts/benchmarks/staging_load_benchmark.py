@@ -0,0 +1,101 @@
+import os
+import sys
+import json
+import subprocess
+from statistics import median
+from datetime import datetime, timezone
+
+# --------------------------------------------------
+# WAL volume and load time of the staging_load profiles
+#
+# Runs ingest_to_staging.py against the files in data/raw once per profile
+# as a warm-up (that run pays for ALTER TABLE SET [UN]LOGGED) and then RUNS
+# times, reading WAL bytes and timings from its ingestion summary. WAL is
+# measured cluster-wide, so run it on an otherwise idle database.
+# --------------------------------------------------
+OUTPUT_FILE = "data/processed/staging_load_benchmark.json"
+SUMMARY_FILE = "data/staging/ingestion_summary.json"
+PROFILES = ["durable", "fast"]
+RUNS = 3
+
+def run_ingestion(profile=None):
+    # --force: the same files are loaded every run, which would otherwise be a no-op
+    cmd = [sys.executable, "scripts/ingestion/ingest_to_staging.py", "--force"]
+    if profile:
+        cmd += ["--staging-profile", profile]
+
+    result = subprocess.run(
+        cmd,
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    with open(SUMMARY_FILE) as f:
+        summary = json.load(f)
+
+    failed = [t for t, r in summary["tables_loaded"].items() if r["status"] != "success"]
+    if failed:
+        raise RuntimeError(summary["tables_loaded"][failed[0]]["error_message"])
+    return summary
+
+def measure_profile(profile):
+    run_ingestion(profile)
+
+    runs = [run_ingestion(profile) for _ in range(RUNS)]
+    tables = runs[-1]["tables_loaded"]
+
+    return {
+        "settings": runs[-1]["staging_profile"],
+        "rows_loaded": sum(t["rows_loaded"] for t in tables.values()),
+        "wal_bytes_median": median(r["wal_bytes"] for r in runs),
+        "load_seconds_median": round(median(r["total_execution_time_seconds"] for r in runs), 2),
+        "tables": {
+            table: {
+                "wal_bytes_median": median(r["tables_loaded"][table]["wal_bytes"] for r in runs),
+                "load_seconds_median": round(median(r["tables_loaded"][table]["load_seconds"] for r in runs), 3)
+            }
+            for table in tables
+        }
+    }
+
+# --------------------------------------------------
+# Main
+# --------------------------------------------------
+def main():
+    report = {
+        "benchmark_timestamp": datetime.now(timezone.utc).isoformat(),
+        "runs_per_profile": RUNS,
+        "profiles": {}
+    }
+
+    for profile in PROFILES:
+        result = measure_profile(profile)
+        report["profiles"][profile] = result
+        print(
+            f"{profile:<10} WAL {result['wal_bytes_median'] / 1024 / 1024:>10.1f} MB  "
+            f"load {result['load_seconds_median']:>8.2f} s"
+        )
+
+    durable, fast = report["profiles"]["durable"], report["profiles"]["fast"]
+    report["wal_reduction_pct"] = (
+        round((1 - fast["wal_bytes_median"] / durable["wal_bytes_median"]) * 100, 1)
+        if durable["wal_bytes_median"] else None
+    )
+    report["load_speedup"] = (
+        round(durable["load_seconds_median"] / fast["load_seconds_median"], 2)
+        if fast["load_seconds_median"] else None
+    )
+
+    # leave the staging tables in the persistence config.yaml asks for
+    run_ingestion()
+
+    os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
+    with open(OUTPUT_FILE, "w") as f:
+        json.dump(report, f, indent=4)
+
+    print(f"Staging load benchmark written to {OUTPUT_FILE}")
+
+if __name__ == "__main__":
+    main()
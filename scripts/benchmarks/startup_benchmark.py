@@ -0,0 +1,112 @@
+import os
+import sys
+import json
+import time
+import subprocess
+from datetime import datetime, timezone
+
+# --------------------------------------------------
+# Measures the fixed cost every stage pays when the orchestrator/scheduler
+# launches it as a fresh python process: interpreter start + module import.
+# The module body is executed with runpy (run_name != "__main__"), so the
+# stage itself does not run.
+# --------------------------------------------------
+OUTPUT_FILE = "data/processed/startup_benchmark.json"
+RUNS = 3
+
+STAGES = {
+    "data_generation": "scripts/data_generation/generate_data.py",
+    "data_generation_pipe": "scripts/ingestion/generate_to_staging.py",
+    "data_ingestion": "scripts/ingestion/ingest_to_staging.py",
+    "single_pass_ingest": "scripts/ingestion/ingest_to_production.py",
+    "raw_archive": "scripts/ingestion/archive_raw.py",
+    "data_quality": "scripts/quality_checks/validate_data.py",
+    "staging_to_production": "scripts/transformation/staging_to_production.py",
+    "anomaly_detection": "scripts/monitoring/anomaly_engine.py",
+    "warehouse_load": "scripts/transformation/load_warehouse.py",
+    "warehouse_publish": "scripts/transformation/publish_warehouse.py",
+    "analytics_generation": "scripts/transformation/generate_analytics.py",
+    "pipeline_monitoring": "scripts/monitoring/pipeline_monitor.py",
+}
+
+# --------------------------------------------------
+# -X importtime parsing
+# --------------------------------------------------
+# stderr lines look like:
+#   import time: self [us] | cumulative | imported package
+#   import time:       412 |        412 |   _io
+def parse_importtime(stderr):
+    top_level = {}
+
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+
+        # nested imports are indented by two extra spaces per level
+        if not name.startswith("  "):
+            top_level[name.strip()] = int(cumulative_us)
+
+    return top_level
+
+def measure_stage(script_path):
+    code = f"import runpy; runpy.run_path({script_path!r})"
+    wall_times = []
+    imports = {}
+
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            capture_output=True,
+            text=True
+        )
+        wall_times.append((time.perf_counter() - start) * 1000)
+
+        if result.returncode != 0:
+            return {"status": "failed", "error_message": result.stderr.strip().splitlines()[-1]}
+
+        imports = parse_importtime(result.stderr)
+
+    heaviest = sorted(imports.items(), key=lambda kv: kv[1], reverse=True)[:5]
+
+    return {
+        "status": "success",
+        "startup_wall_ms_min": round(min(wall_times), 2),
+        "startup_wall_ms_avg": round(sum(wall_times) / len(wall_times), 2),
+        "import_time_ms": round(sum(imports.values()) / 1000, 2),
+        "heaviest_imports_ms": {name: round(us / 1000, 2) for name, us in heaviest}
+    }
+
+# --------------------------------------------------
+# Main
+# --------------------------------------------------
+def main():
+    report = {
+        "benchmark_timestamp": datetime.now(timezone.utc).isoformat(),
+        "python_version": sys.version.split()[0],
+        "runs_per_stage": RUNS,
+        "stages": {}
+    }
+
+    for stage, path in STAGES.items():
+        report["stages"][stage] = measure_stage(path)
+        result = report["stages"][stage]
+
+        if result["status"] == "success":
+            print(
+                f"{stage:<24} startup {result['startup_wall_ms_min']:>8.1f} ms  "
+                f"imports {result['import_time_ms']:>8.1f} ms"
+            )
+        else:
+            print(f"{stage:<24} FAILED: {result['error_message']}")
+
+    os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
+    with open(OUTPUT_FILE, "w") as f:
+        json.dump(report, f, indent=4)
+
+    print(f"Startup benchmark written to {OUTPUT_FILE}")
+
+if __name__ == "__main__":
+    main()
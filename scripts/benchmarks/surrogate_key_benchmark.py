@@ -0,0 +1,144 @@
+import os
+import json
+import time
+from datetime import datetime, timezone
+
+# --------------------------------------------------
+# Natural VARCHAR ids vs integer surrogate keys
+#
+# Production keeps both the natural ids and the surrogate keys on every row,
+# so "before" and "after" are measured on the same data:
+#   index sizes  an index on each natural id is built inside a transaction
+#                that is rolled back, next to the existing integer indexes
+#   join times   the hot joins (items -> transactions, items -> products,
+#                the warehouse fact source) run once on natural ids and once
+#                on keys; the fastest of RUNS executions is reported
+# --------------------------------------------------
+OUTPUT_FILE = "data/processed/surrogate_key_benchmark.json"
+RUNS = 3
+
+# (table, natural id column, the integer index that replaces an index on it)
+INDEXES = [
+    ("production.customers", "customer_id", "customers_pkey"),
+    ("production.products", "product_id", "products_pkey"),
+    ("production.transactions", "transaction_id", "transactions_pkey"),
+    ("production.transaction_items", "item_id", "transaction_items_pkey"),
+    ("production.transaction_items", "transaction_id", "idx_transaction_items_transaction_key")
+]
+
+JOINS = {
+    "items_to_transactions": (
+        """SELECT COUNT(*) FROM production.transaction_items ti
+           JOIN production.transactions t ON t.transaction_id = ti.transaction_id""",
+        """SELECT COUNT(*) FROM production.transaction_items ti
+           JOIN production.transactions t ON t.transaction_key = ti.transaction_key"""
+    ),
+    "items_to_products": (
+        """SELECT COUNT(*) FROM production.transaction_items ti
+           JOIN production.products p ON p.product_id = ti.product_id""",
+        """SELECT COUNT(*) FROM production.transaction_items ti
+           JOIN production.products p ON p.product_key = ti.product_key"""
+    ),
+    "fact_source": (
+        """SELECT COUNT(*), SUM(ti.line_total - ti.quantity * p.cost)
+           FROM production.transaction_items ti
+           JOIN production.transactions t ON t.transaction_id = ti.transaction_id
+           LEFT JOIN production.products p ON p.product_id = ti.product_id""",
+        """SELECT COUNT(*), SUM(ti.line_total - ti.quantity * p.cost)
+           FROM production.transaction_items ti
+           JOIN production.transactions t ON t.transaction_key = ti.transaction_key
+           LEFT JOIN production.products p ON p.product_key = ti.product_key"""
+    )
+}
+
+def get_conn():
+    import psycopg2
+    return psycopg2.connect(
+        host=os.environ.get("DB_HOST", "postgres"),
+        port=int(os.environ.get("DB_PORT", 5432)),
+        dbname=os.environ.get("DB_NAME", "ecommerce_db"),
+        user=os.environ.get("DB_USER", "admin"),
+        password=os.environ.get("DB_PASSWORD", "password")
+    )
+
+def index_sizes(conn):
+    cur = conn.cursor()
+    results = {}
+    try:
+        for i, (table, column, key_index) in enumerate(INDEXES):
+            schema = table.split(".")[0]
+            cur.execute(f"CREATE INDEX benchmark_natural_{i} ON {table} ({column})")
+            cur.execute(
+                "SELECT pg_relation_size(%s::regclass), pg_relation_size(%s::regclass)",
+                (f"{schema}.benchmark_natural_{i}", f"{schema}.{key_index}")
+            )
+            natural_bytes, key_bytes = cur.fetchone()
+            results[f"{table}.{column}"] = {
+                "natural_id_index_bytes": natural_bytes,
+                "surrogate_key_index": key_index,
+                "surrogate_key_index_bytes": key_bytes,
+                "reduction_pct": round((1 - key_bytes / natural_bytes) * 100, 1) if natural_bytes else None
+            }
+    finally:
+        conn.rollback()
+        cur.close()
+    return results
+
+def best_time_ms(cur, sql):
+    timings = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        cur.execute(sql)
+        cur.fetchall()
+        timings.append((time.perf_counter() - start) * 1000)
+    return round(min(timings), 2)
+
+def join_times(conn):
+    cur = conn.cursor()
+    results = {}
+    for name, (natural_sql, key_sql) in JOINS.items():
+        natural_ms = best_time_ms(cur, natural_sql)
+        key_ms = best_time_ms(cur, key_sql)
+        results[name] = {
+            "natural_id_ms": natural_ms,
+            "surrogate_key_ms": key_ms,
+            "speedup": round(natural_ms / key_ms, 2) if key_ms else None
+        }
+    conn.rollback()
+    cur.close()
+    return results
+
+# --------------------------------------------------
+# Main
+# --------------------------------------------------
+def main():
+    conn = get_conn()
+    try:
+        report = {
+            "benchmark_timestamp": datetime.now(timezone.utc).isoformat(),
+            "runs_per_query": RUNS,
+            "index_sizes": index_sizes(conn),
+            "join_times": join_times(conn)
+        }
+    finally:
+        conn.close()
+
+    for name, result in report["index_sizes"].items():
+        print(
+            f"{name:<45} natural {result['natural_id_index_bytes'] / 1024:>10.0f} KB  "
+            f"key {result['surrogate_key_index_bytes'] / 1024:>10.0f} KB"
+        )
+    for name, result in report["join_times"].items():
+        print(
+            f"{name:<45} natural {result['natural_id_ms']:>10.1f} ms  "
+            f"key {result['surrogate_key_ms']:>10.1f} ms"
+        )
+
+    os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
+    with open(OUTPUT_FILE, "w") as f:
+        json.dump(report, f, indent=4)
+
+    print(f"Surrogate key benchmark written to {OUTPUT_FILE}")
+
+if __name__ == "__main__":
+    main()
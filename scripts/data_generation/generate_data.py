@@ -1,33 +1,40 @@
 import os
+import sys
 import json
 import random
 from datetime import datetime, timezone
-from faker import Faker
-import pandas as pd
-import yaml
+
+# pandas, Faker and yaml are imported inside the functions that use them so
+# that importing this module stays cheap.
 
 # --------------------------------------------------
 # Setup
 # --------------------------------------------------
-fake = Faker()
+RAW_PATH = "data/raw"
 
-with open("config/config.yaml", "r") as f:
-    config = yaml.safe_load(f)
+_fake = None
 
-RAW_PATH = "data/raw"
-os.makedirs(RAW_PATH, exist_ok=True)
+def get_fake():
+    global _fake
+    if _fake is None:
+        from faker import Faker
+        _fake = Faker()
+    return _fake
 
-CUSTOMER_COUNT = config["data_generation"]["customers"]["record_count"]
-PRODUCT_COUNT = config["data_generation"]["products"]["record_count"]
-TRANSACTION_COUNT = config["data_generation"]["orders"]["record_count"]
+def load_config():
+    import yaml
+    with open("config/config.yaml", "r") as f:
+        return yaml.safe_load(f)
 
 # --------------------------------------------------
 # Generate Customers
 # --------------------------------------------------
-def generate_customers():
+def generate_customers(customer_count, write_csv=True):
+    import pandas as pd
+    fake = get_fake()
     customers = []
 
-    for i in range(1, CUSTOMER_COUNT + 1):
+    for i in range(1, customer_count + 1):
         customers.append({
             "customer_id": f"CUST{i:04d}",
             "first_name": fake.first_name(),
@@ -42,13 +49,16 @@ def generate_customers():
         })
 
     df = pd.DataFrame(customers)
-    df.to_csv(f"{RAW_PATH}/customers.csv", index=False)
+    if write_csv:
+        df.to_csv(f"{RAW_PATH}/customers.csv", index=False)
     return df
 
 # --------------------------------------------------
 # Generate Products
 # --------------------------------------------------
-def generate_products():
+def generate_products(product_count, write_csv=True):
+    import pandas as pd
+    fake = get_fake()
     categories = {
         "Electronics": (5000, 50000),
         "Clothing": (500, 5000),
@@ -60,7 +70,7 @@ def generate_products():
 
     products = []
 
-    for i in range(1, PRODUCT_COUNT + 1):
+    for i in range(1, product_count + 1):
         category = random.choice(list(categories.keys()))
         price = round(random.uniform(*categories[category]), 2)
         cost = round(price * random.uniform(0.6, 0.85), 2)
@@ -78,88 +88,273 @@ def generate_products():
         })
 
     df = pd.DataFrame(products)
-    df.to_csv(f"{RAW_PATH}/products.csv", index=False)
+    if write_csv:
+        df.to_csv(f"{RAW_PATH}/products.csv", index=False)
     return df
 
+# --------------------------------------------------
+# Workload distributions
+#
+# Popularity, dates and times are drawn by inverse-CDF sampling
+# (np.searchsorted over a cumulative weight array), so every draw for a whole
+# chunk is one vectorized call no matter how skewed the curve is.
+# --------------------------------------------------
+PAYMENT_METHODS = ["Credit Card", "Debit Card", "UPI", "Cash on Delivery", "Net Banking"]
+ADDRESS_POOL_SIZE = 5000
+DEFAULT_CHUNK_SIZE = 1000000
+
+def to_cdf(weights):
+    import numpy as np
+    weights = np.asarray(weights, dtype=float)
+    cdf = np.cumsum(weights)
+    return cdf / cdf[-1]
+
+def sample(cdf, size, rng):
+    import numpy as np
+    return np.minimum(np.searchsorted(cdf, rng.random(size), side="right"), len(cdf) - 1)
+
+def zipf_cdf(count, exponent, rng):
+    """Power-law popularity over `count` members; which member is hottest is random."""
+    import numpy as np
+    weights = 1.0 / np.arange(1, count + 1) ** exponent
+    return to_cdf(weights[rng.permutation(count)])
+
+def calendar(date_range, distribution, rng):
+    """Per-day order weights: month seasonality x weekday curve x random bursts."""
+    import numpy as np
+
+    days = np.arange(
+        np.datetime64(date_range["start_date"]),
+        np.datetime64(date_range["end_date"]) + 1,
+        dtype="datetime64[D]"
+    )
+    weights = np.ones(len(days))
+
+    monthly = distribution.get("monthly_weights")
+    if monthly:
+        weights *= np.asarray(monthly)[days.astype("datetime64[M]").astype(int) % 12]
+
+    weekday = distribution.get("weekday_weights")
+    if weekday:
+        # 1970-01-01 was a Thursday; shift so Monday = 0
+        weights *= np.asarray(weekday)[(days.astype(int) + 3) % 7]
+
+    burst_probability = distribution.get("burst_day_probability", 0)
+    if burst_probability:
+        bursts = rng.random(len(days)) < burst_probability
+        low, high = distribution.get("burst_multiplier", [3, 8])
+        weights[bursts] *= rng.uniform(low, high, bursts.sum())
+
+    return np.datetime_as_string(days).astype(object), to_cdf(weights)
+
+def build_distributions(distribution, date_range, customer_count, product_count, rng):
+    skewed = distribution.get("order_frequency") == "skewed"
+    weighted = distribution.get("payment_method") == "weighted"
+
+    payment_weights = distribution.get("payment_method_weights", {})
+    payment_methods = list(payment_weights) if weighted and payment_weights else PAYMENT_METHODS
+    day_strings, day_cdf = calendar(date_range, distribution, rng)
+
+    return {
+        "customer_cdf": zipf_cdf(
+            customer_count, distribution.get("customer_zipf_exponent", 1.1) if skewed else 0, rng
+        ),
+        "product_cdf": zipf_cdf(
+            product_count, distribution.get("product_zipf_exponent", 1.2) if skewed else 0, rng
+        ),
+        "payment_methods": payment_methods,
+        "payment_cdf": to_cdf(
+            [payment_weights[m] for m in payment_methods] if weighted and payment_weights
+            else [1] * len(payment_methods)
+        ),
+        "hour_cdf": to_cdf(distribution.get("hourly_weights") or [1] * 24),
+        "days": day_strings,
+        "day_cdf": day_cdf
+    }
+
+def format_ids(prefix, numbers, width):
+    import numpy as np
+    return np.array([f"{prefix}{n:0{width}d}" for n in numbers.tolist()], dtype=object)
+
+def format_times(seconds):
+    import numpy as np
+    two_digits = np.array([f"{i:02d}" for i in range(60)], dtype=object)
+    return two_digits[seconds // 3600] + ":" + two_digits[seconds // 60 % 60] + ":" + two_digits[seconds % 60]
+
+def encode_chunk(columns, header):
+    """CSV bytes for one chunk of columns.
+
+    pyarrow's CSV writer is roughly 10x faster than DataFrame.to_csv, which
+    dominates generation time at large record counts; pandas is the fallback.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pa_csv
+    except ImportError:
+        import pandas as pd
+        return pd.DataFrame(columns).to_csv(index=False, header=header).encode("utf-8")
+
+    buffer = pa.BufferOutputStream()
+    pa_csv.write_csv(pa.table(columns), buffer, write_options=pa_csv.WriteOptions(include_header=header))
+    return buffer.getvalue().to_pybytes()
+
+def write_chunk(file_name, columns, first):
+    """Default sink: append the chunk to data/raw/<file_name>."""
+    with open(f"{RAW_PATH}/{file_name}", "wb" if first else "ab") as f:
+        f.write(encode_chunk(columns, header=first))
+
 # --------------------------------------------------
 # Generate Transactions & Items
 # --------------------------------------------------
-def generate_transactions(customers_df, products_df):
-    transactions = []
-    items = []
-
-    customer_ids = customers_df["customer_id"].tolist()
-    product_ids = products_df["product_id"].tolist()
-    product_price = dict(zip(products_df["product_id"], products_df["price"]))
-
-    item_counter = 1
-
-    for i in range(1, TRANSACTION_COUNT + 1):
-        txn_id = f"TXN{i:05d}"
-        txn_total = 0.0
-
-        for _ in range(random.randint(1, 5)):
-            product_id = random.choice(product_ids)
-            quantity = random.randint(1, 5)
-            discount = random.choice([0, 5, 10, 15])
-            unit_price = product_price[product_id]
-
-            line_total = round(
-                quantity * unit_price * (1 - discount / 100), 2
-            )
-            txn_total += line_total
-
-            items.append({
-                "item_id": f"ITEM{item_counter:05d}",
-                "transaction_id": txn_id,
-                "product_id": product_id,
-                "quantity": quantity,
-                "unit_price": unit_price,
-                "discount_percentage": discount,
-                "line_total": line_total
-            })
-
-            item_counter += 1
-
-        transactions.append({
-            "transaction_id": txn_id,
-            "customer_id": random.choice(customer_ids),
-            "transaction_date": fake.date_this_year(),
-            "transaction_time": fake.time(),
-            "payment_method": random.choice([
-                "Credit Card", "Debit Card", "UPI",
-                "Cash on Delivery", "Net Banking"
-            ]),
-            "shipping_address": fake.address().replace("\n", ", "),
-            "total_amount": round(txn_total, 2)
-        })
+def generate_transactions(customers_df, products_df, transaction_count,
+                          distribution=None, date_range=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                          sink=write_chunk):
+    """Hand transactions.csv / transaction_items.csv to `sink` chunk by chunk.
+
+    sink(file_name, columns, first) defaults to appending to data/raw;
+    generate_to_staging.py passes one that streams into COPY instead.
+    Returns record counts, referential-integrity issues and a profile of the
+    generated skew instead of the rows themselves, so memory does not grow
+    with transaction_count.
+    """
+    import numpy as np
+
+    distribution = distribution or {}
+    date_range = date_range or {
+        "start_date": f"{datetime.now().year}-01-01",
+        "end_date": datetime.now().strftime("%Y-%m-%d")
+    }
+    rng = np.random.default_rng(distribution.get("seed"))
+    fake = get_fake()
 
-    pd.DataFrame(transactions).to_csv(f"{RAW_PATH}/transactions.csv", index=False)
-    pd.DataFrame(items).to_csv(f"{RAW_PATH}/transaction_items.csv", index=False)
+    customer_ids = customers_df["customer_id"].to_numpy(dtype=object)
+    product_ids = products_df["product_id"].to_numpy(dtype=object)
+    product_prices = products_df["price"].to_numpy(dtype=float)
 
-    return transactions, items
+    dist = build_distributions(distribution, date_range, len(customer_ids), len(product_ids), rng)
+    payment_methods = np.array(dist["payment_methods"], dtype=object)
+
+    # Faker is far too slow per row at scale; each customer ships to one
+    # address from a fixed pool
+    addresses = np.array(
+        [fake.address().replace("\n", ", ") for _ in range(min(ADDRESS_POOL_SIZE, len(customer_ids)))],
+        dtype=object
+    )
+
+    customer_orders = np.zeros(len(customer_ids), dtype=np.int64)
+    product_items = np.zeros(len(product_ids), dtype=np.int64)
+    day_orders = np.zeros(len(dist["days"]), dtype=np.int64)
+    payment_orders = np.zeros(len(payment_methods), dtype=np.int64)
+    failed_checks = set()
+    customer_id_set = set(customer_ids)
+    product_id_set = set(product_ids)
+
+    item_count = 0
+    for chunk_start in range(0, transaction_count, chunk_size):
+        n = min(chunk_size, transaction_count - chunk_start)
+
+        customer_idx = sample(dist["customer_cdf"], n, rng)
+        day_idx = sample(dist["day_cdf"], n, rng)
+        payment_idx = sample(dist["payment_cdf"], n, rng)
+        seconds = sample(dist["hour_cdf"], n, rng) * 3600 + rng.integers(0, 3600, n)
+
+        items_per_txn = rng.integers(1, 6, n)
+        item_txn = np.repeat(np.arange(n), items_per_txn)
+        m = len(item_txn)
+
+        product_idx = sample(dist["product_cdf"], m, rng)
+        quantity = rng.integers(1, 6, m)
+        discount = rng.choice([0, 5, 10, 15], m)
+        unit_price = product_prices[product_idx]
+        line_total = np.round(quantity * unit_price * (1 - discount / 100), 2)
+
+        txn_ids = format_ids("TXN", np.arange(chunk_start + 1, chunk_start + n + 1), 5)
+
+        transactions = {
+            "transaction_id": txn_ids,
+            "customer_id": customer_ids[customer_idx],
+            "transaction_date": dist["days"][day_idx],
+            "transaction_time": format_times(seconds),
+            "payment_method": payment_methods[payment_idx],
+            "shipping_address": addresses[customer_idx % len(addresses)],
+            "total_amount": np.round(np.bincount(item_txn, weights=line_total, minlength=n), 2)
+        }
+
+        items = {
+            "item_id": format_ids("ITEM", np.arange(item_count + 1, item_count + m + 1), 5),
+            "transaction_id": txn_ids[item_txn],
+            "product_id": product_ids[product_idx],
+            "quantity": quantity,
+            "unit_price": unit_price,
+            "discount_percentage": discount,
+            "line_total": line_total
+        }
+
+        first = chunk_start == 0
+        sink("transactions.csv", transactions, first)
+        sink("transaction_items.csv", items, first)
+
+        failed_checks |= referential_issues(transactions, items, customer_id_set, product_id_set)
+
+        customer_orders += np.bincount(customer_idx, minlength=len(customer_ids))
+        product_items += np.bincount(product_idx, minlength=len(product_ids))
+        day_orders += np.bincount(day_idx, minlength=len(day_orders))
+        payment_orders += np.bincount(payment_idx, minlength=len(payment_methods))
+        item_count += m
+
+    return {
+        "transactions": transaction_count,
+        "transaction_items": item_count,
+        "failed_checks": failed_checks,
+        "profile": distribution_profile(customer_orders, product_items, day_orders, payment_orders, payment_methods)
+    }
+
+def distribution_profile(customer_orders, product_items, day_orders, payment_orders, payment_methods):
+    """How skewed the generated data actually is (hot keys, hot days)."""
+    import numpy as np
+
+    def top_share(counts, fraction=0.01):
+        total = counts.sum()
+        if not total:
+            return 0.0
+        top = max(1, int(len(counts) * fraction))
+        return round(float(np.sort(counts)[-top:].sum() / total), 4)
+
+    active_days = day_orders[day_orders > 0]
+    return {
+        "top_1pct_customers_order_share": top_share(customer_orders),
+        "top_1pct_products_item_share": top_share(product_items),
+        "customers_without_orders": int((customer_orders == 0).sum()),
+        "peak_day_orders": int(day_orders.max()) if len(day_orders) else 0,
+        "median_day_orders": float(np.median(active_days)) if len(active_days) else 0,
+        "payment_method_share": {
+            method: round(float(count / payment_orders.sum()), 4) if payment_orders.sum() else 0.0
+            for method, count in zip(payment_methods, payment_orders)
+        }
+    }
 
 # --------------------------------------------------
 # Validation
 # --------------------------------------------------
-def validate_referential_integrity(customers, products, transactions, items):
-    issues = 0
+def referential_issues(transactions, items, customer_id_set, product_id_set):
+    """Checks the ids a chunk emits against the ids of their parents: customers
+    and products as generated, transactions as emitted in the same chunk
+    (items never reference a transaction from another chunk)."""
+    issues = set()
+
+    if not customer_id_set.issuperset(transactions["customer_id"]):
+        issues.add("transactions.customer_id")
 
-    if not set(t["customer_id"] for t in transactions).issubset(
-        set(customers["customer_id"])
-    ):
-        issues += 1
+    if not product_id_set.issuperset(items["product_id"]):
+        issues.add("transaction_items.product_id")
 
-    if not set(i["product_id"] for i in items).issubset(
-        set(products["product_id"])
-    ):
-        issues += 1
+    if not set(transactions["transaction_id"]).issuperset(items["transaction_id"]):
+        issues.add("transaction_items.transaction_id")
 
-    if not set(i["transaction_id"] for i in items).issubset(
-        set(t["transaction_id"] for t in transactions)
-    ):
-        issues += 1
+    return issues
 
+def validate_referential_integrity(failed_checks):
+    issues = len(failed_checks)
     score = 100 if issues == 0 else max(0, 100 - issues * 20)
 
     return {
@@ -171,27 +366,43 @@ def validate_referential_integrity(customers, products, transactions, items):
 # --------------------------------------------------
 # Main
 # --------------------------------------------------
-if __name__ == "__main__":
-    customers_df = generate_customers()
-    products_df = generate_products()
-    transactions, items = generate_transactions(customers_df, products_df)
-
-    validation = validate_referential_integrity(
-        customers_df, products_df, transactions, items
+def main():
+    config = load_config()
+    os.makedirs(RAW_PATH, exist_ok=True)
+
+    generation = config["data_generation"]
+    customers_df = generate_customers(generation["customers"]["record_count"])
+    products_df = generate_products(generation["products"]["record_count"])
+    result = generate_transactions(
+        customers_df,
+        products_df,
+        generation["orders"]["record_count"],
+        distribution=generation.get("distribution"),
+        date_range=generation.get("date_range"),
+        chunk_size=generation.get("chunk_size", DEFAULT_CHUNK_SIZE)
     )
 
+    validation = validate_referential_integrity(result["failed_checks"])
+
     metadata = {
         "generation_timestamp": datetime.now(timezone.utc).isoformat(),
         "record_counts": {
             "customers": len(customers_df),
             "products": len(products_df),
-            "transactions": len(transactions),
-            "transaction_items": len(items)
+            "transactions": result["transactions"],
+            "transaction_items": result["transaction_items"]
         },
-        "data_quality": validation
+        "data_quality": validation,
+        "distribution_profile": result["profile"]
     }
 
     with open(f"{RAW_PATH}/generation_metadata.json", "w") as f:
         json.dump(metadata, f, indent=4)
 
     print("Data generation completed successfully")
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from profiling import run_stage
+    run_stage("data_generation", main, profile="--profile" in sys.argv)
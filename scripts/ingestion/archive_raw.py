@@ -0,0 +1,201 @@
+import io
+import os
+import sys
+import json
+import glob
+import gzip
+import shutil
+import hashlib
+import argparse
+from datetime import datetime, timezone
+
+# --------------------------------------------------
+# Paths
+# --------------------------------------------------
+RAW_DATA_PATH = "data/raw"
+INGESTION_SUMMARY = "data/staging/ingestion_summary.json"
+SINGLE_PASS_SUMMARY = "data/processed/transformation_summary.json"
+RAW_FILES = ["customers.csv", "products.csv", "transactions.csv", "transaction_items.csv"]
+MANIFEST_FILE = "manifest.json"
+CHUNK_SIZE = 1024 * 1024
+
+CODEC_EXTENSIONS = {"gzip": ".gz", "zstd": ".zst"}
+
+def load_archive_config():
+    import yaml
+    with open("config/config.yaml", "r") as f:
+        return yaml.safe_load(f)["archive"]
+
+def get_execution_id():
+    return os.environ.get(
+        "PIPELINE_EXECUTION_ID",
+        f"MANUAL_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    )
+
+# --------------------------------------------------
+# Codecs
+# --------------------------------------------------
+def open_compressed_writer(path, codec, level):
+    if codec == "zstd":
+        import zstandard
+        return zstandard.ZstdCompressor(level=level).stream_writer(open(path, "wb"), closefd=True)
+    return gzip.open(path, "wb", compresslevel=level)
+
+def open_raw(path):
+    """Open a raw CSV as text, decompressing .gz / .zst on the fly.
+
+    Used by ingestion so archived files stream straight into COPY without
+    being unpacked to disk first.
+    """
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    if path.endswith(".zst"):
+        import zstandard
+        reader = zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+        return io.TextIOWrapper(reader, encoding="utf-8", newline="")
+    return open(path, "r", encoding="utf-8", newline="")
+
+def resolve_raw_file(directory, file_name):
+    """Find file_name in directory as plain, .gz or .zst."""
+    for extension in ["", ".gz", ".zst"]:
+        path = os.path.join(directory, file_name + extension)
+        if os.path.exists(path):
+            return path
+    return None
+
+# --------------------------------------------------
+# Ingestion check
+# --------------------------------------------------
+def latest_archive(file_names):
+    """Newest archive partition whose manifest lists every one of file_names, or None."""
+    config = load_archive_config()
+    newest = None
+    for manifest_path in glob.glob(os.path.join(config["path"], "dt=*", "*", MANIFEST_FILE)):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        if not all(name in manifest["files"] for name in file_names):
+            continue
+        if newest is None or manifest["archived_at"] > newest[0]:
+            newest = (manifest["archived_at"], os.path.dirname(manifest_path))
+    return newest[1] if newest else None
+
+def read_summary(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def ingestion_succeeded(execution_id):
+    """Whether this execution's ingestion committed the raw files, per the
+    summary ingest_to_staging.py (or the single-pass ingest) wrote for it."""
+    staging = read_summary(INGESTION_SUMMARY)
+    if staging.get("execution_id") == execution_id and staging.get("status") == "success":
+        return True
+
+    # the single-pass summary is only written after its commit
+    single_pass = read_summary(SINGLE_PASS_SUMMARY)
+    return single_pass.get("mode") == "single_pass" and single_pass.get("execution_id") == execution_id
+
+# --------------------------------------------------
+# Archive one file (single pass: hash + row count + compress)
+# --------------------------------------------------
+def archive_file(source, target, codec, level):
+    sha256 = hashlib.sha256()
+    lines = 0
+    rows = 0
+    open_quotes = False
+
+    with open(source, "rb") as src, open_compressed_writer(target, codec, level) as dst:
+        for line in src:
+            sha256.update(line)
+            dst.write(line)
+            lines += 1
+
+            # A CSV record can span lines inside a quoted field; it ends at a
+            # newline only when the number of quotes seen so far is even.
+            if line.count(b'"') % 2:
+                open_quotes = not open_quotes
+            if not open_quotes:
+                rows += 1
+
+    return {
+        "sha256": sha256.hexdigest(),
+        "rows": max(rows - 1, 0),  # minus header
+        "raw_bytes": os.path.getsize(source),
+        "compressed_bytes": os.path.getsize(target)
+    }
+
+# --------------------------------------------------
+# Main
+# --------------------------------------------------
+def archive_raw(keep_source=False, force=False):
+    config = load_archive_config()
+    codec = config.get("codec", "gzip")
+    level = config.get("level", 6)
+    execution_id = get_execution_id()
+
+    # files leave data/raw only once they are in staging; otherwise the
+    # file-arrival scheduler would never see them again
+    if not keep_source and not force and not ingestion_succeeded(execution_id):
+        raise RuntimeError(
+            f"No successful ingestion recorded for {execution_id}; raw files left in {RAW_DATA_PATH} "
+            f"(--keep-source to archive a copy, --force to move them anyway)"
+        )
+    now = datetime.now(timezone.utc)
+
+    partition = os.path.join(config["path"], f"dt={now.strftime('%Y-%m-%d')}", execution_id)
+    os.makedirs(partition, exist_ok=True)
+
+    manifest = {
+        "execution_id": execution_id,
+        "archived_at": now.isoformat(),
+        "codec": codec,
+        "files": {}
+    }
+
+    for file_name in RAW_FILES:
+        source = os.path.join(RAW_DATA_PATH, file_name)
+        if not os.path.exists(source):
+            continue
+
+        archive_name = file_name + CODEC_EXTENSIONS[codec]
+        entry = archive_file(source, os.path.join(partition, archive_name), codec, level)
+        entry["archive_file"] = archive_name
+        manifest["files"][file_name] = entry
+
+        if not keep_source:
+            os.remove(source)
+
+    metadata = os.path.join(RAW_DATA_PATH, "generation_metadata.json")
+    if os.path.exists(metadata):
+        shutil.copy2(metadata, partition)
+
+    raw_total = sum(f["raw_bytes"] for f in manifest["files"].values())
+    compressed_total = sum(f["compressed_bytes"] for f in manifest["files"].values())
+    manifest["raw_bytes"] = raw_total
+    manifest["compressed_bytes"] = compressed_total
+    manifest["compression_ratio"] = round(raw_total / compressed_total, 2) if compressed_total else None
+
+    with open(os.path.join(partition, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent=4)
+
+    print(
+        f"Archived {len(manifest['files'])} raw files to {partition} "
+        f"({raw_total} -> {compressed_total} bytes)"
+    )
+    return partition
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Move ingested raw files into the compressed archive")
+    parser.add_argument("--keep-source", action="store_true", help="Copy instead of move")
+    parser.add_argument("--force", action="store_true",
+                        help="Move the files even if no successful ingestion is recorded for this execution")
+    parser.add_argument("--profile", action="store_true")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from profiling import run_stage
+    run_stage("raw_archive", archive_raw, args.keep_source, args.force, profile=args.profile)
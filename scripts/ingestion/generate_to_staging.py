@@ -0,0 +1,269 @@
+import io
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import traceback
+from datetime import datetime
+from queue import Empty
+
+# sibling modules resolve however the script is started (runpy, other cwd)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from archive_raw import get_execution_id
+from ingest_to_staging import (
+    SUMMARY_PATH,
+    copy_options,
+    current_wal_lsn,
+    get_connection,
+    load_staging_profile,
+    prepare_staging_load,
+    register_batch,
+    setup_logging,
+    validate_staging_load,
+    wal_bytes_since
+)
+
+# --------------------------------------------------
+# Generator -> COPY pipe (load tests)
+#
+# A producer process runs the data generator and hands CSV-encoded chunks to
+# this process through a bounded multiprocessing queue; this process COPYs
+# each chunk into staging.* as it arrives. Generation and loading overlap on
+# separate cores and nothing touches data/raw unless --tee is given.
+# --------------------------------------------------
+GENERATOR_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data_generation")
+PIPE_CHUNK_SIZE = 200000
+QUEUE_CHUNKS = 4
+# How often a waiting consumer checks that the producer is still alive
+PRODUCER_POLL_SECONDS = 5
+
+TABLES = {
+    "customers.csv": "staging.customers",
+    "products.csv": "staging.products",
+    "transactions.csv": "staging.transactions",
+    "transaction_items.csv": "staging.transaction_items"
+}
+
+DONE = "__done__"
+FAILED = "__failed__"
+
+# --------------------------------------------------
+# Producer (child process)
+# --------------------------------------------------
+def produce(queue, chunk_size, tee_dir):
+    blocked_seconds = 0.0
+
+    def sink(file_name, columns, first):
+        nonlocal blocked_seconds
+        data = generate_data.encode_chunk(columns, header=first)
+
+        if tee_dir:
+            with open(os.path.join(tee_dir, file_name), "wb" if first else "ab") as f:
+                f.write(data)
+
+        rows = len(next(iter(columns.values())))
+        start = time.time()
+        queue.put((file_name, list(columns), data, first, rows))
+        blocked_seconds += time.time() - start
+
+    try:
+        start = time.time()
+        sys.path.insert(0, GENERATOR_DIR)
+        import generate_data
+
+        config = generate_data.load_config()["data_generation"]
+        if tee_dir:
+            os.makedirs(tee_dir, exist_ok=True)
+
+        customers_df = generate_data.generate_customers(config["customers"]["record_count"], write_csv=False)
+        products_df = generate_data.generate_products(config["products"]["record_count"], write_csv=False)
+        for file_name, df in [("customers.csv", customers_df), ("products.csv", products_df)]:
+            sink(file_name, {c: df[c].to_numpy() for c in df.columns}, True)
+
+        result = generate_data.generate_transactions(
+            customers_df,
+            products_df,
+            config["orders"]["record_count"],
+            distribution=config.get("distribution"),
+            date_range=config.get("date_range"),
+            chunk_size=chunk_size,
+            sink=sink
+        )
+
+        queue.put((DONE, {
+            "transactions": result["transactions"],
+            "transaction_items": result["transaction_items"],
+            "failed_checks": sorted(result["failed_checks"]),
+            "distribution_profile": result["profile"],
+            "producer_seconds": round(time.time() - start, 2),
+            "producer_blocked_seconds": round(blocked_seconds, 2)
+        }))
+    except Exception:
+        queue.put((FAILED, traceback.format_exc()))
+
+# --------------------------------------------------
+# Consumer (this process)
+# --------------------------------------------------
+def consume(cursor, queue, profile, producer):
+    rows = {table: 0 for table in TABLES.values()}
+    stats = {"chunks": 0, "bytes": 0, "copy_seconds": 0.0, "waiting_seconds": 0.0}
+
+    while True:
+        # A producer killed without posting FAILED (OOM, SIGKILL) must not
+        # leave the COPY transaction waiting forever. Whatever it sent before
+        # exiting is already in the pipe, so an empty queue after it exited
+        # means nothing more is coming.
+        start = time.time()
+        alive = producer.is_alive()
+        try:
+            message = queue.get(timeout=PRODUCER_POLL_SECONDS)
+        except Empty:
+            if alive:
+                continue
+            raise RuntimeError(f"Generator process exited with code {producer.exitcode} before finishing")
+        finally:
+            stats["waiting_seconds"] += time.time() - start
+
+        if message[0] == DONE:
+            return rows, stats, message[1]
+        if message[0] == FAILED:
+            raise RuntimeError(f"Generator failed:\n{message[1]}")
+
+        file_name, columns, data, has_header, chunk_rows = message
+        table = TABLES[file_name]
+
+        start = time.time()
+        cursor.copy_expert(
+            f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH ({copy_options(profile, has_header)})",
+            io.BytesIO(data)
+        )
+        stats["copy_seconds"] += time.time() - start
+
+        rows[table] += chunk_rows
+        stats["chunks"] += 1
+        stats["bytes"] += len(data)
+
+def generate_to_staging(chunk_size=PIPE_CHUNK_SIZE, tee_dir=None, profile_name=None):
+    import multiprocessing
+
+    setup_logging()
+    os.makedirs(SUMMARY_PATH, exist_ok=True)
+
+    start_time = time.time()
+    profile = load_staging_profile(profile_name)
+    summary = {
+        "ingestion_timestamp": datetime.utcnow().isoformat(),
+        "mode": "generator_pipe",
+        "tee_directory": tee_dir,
+        "staging_profile": profile,
+        "status": "running",
+        "tables_loaded": {},
+        "total_execution_time_seconds": 0
+    }
+
+    queue = multiprocessing.Queue(maxsize=QUEUE_CHUNKS)
+    producer = multiprocessing.Process(target=produce, args=(queue, chunk_size, tee_dir), daemon=True)
+
+    conn = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        conn.autocommit = False
+
+        start_lsn = current_wal_lsn(cursor)
+        prepare_staging_load(cursor, TABLES.values(), profile)
+
+        producer.start()
+        logging.info(f"Generator pipe started (profile: {profile['name']})")
+
+        rows, stats, generation = consume(cursor, queue, profile, producer)
+
+        for table, expected in rows.items():
+            valid, db_rows = validate_staging_load(cursor, table, expected)
+            if not valid:
+                raise ValueError(f"Row count mismatch for {table}: generated={expected}, DB={db_rows}")
+            summary["tables_loaded"][table] = {"rows_loaded": db_rows, "status": "success"}
+            logging.info(f"Loaded {db_rows} rows into {table}")
+
+        register_batch(cursor, get_execution_id(), "generator_pipe")
+        conn.commit()
+        summary["status"] = "success"
+        summary["wal_bytes"] = wal_bytes_since(cursor, start_lsn)
+        logging.info("Generator pipe committed successfully")
+
+        elapsed = time.time() - start_time
+        total_rows = sum(rows.values())
+        summary["generation"] = generation
+        summary["throughput"] = {
+            "rows": total_rows,
+            "megabytes": round(stats["bytes"] / 1024 / 1024, 2),
+            "chunks": stats["chunks"],
+            "rows_per_second": round(total_rows / elapsed, 2) if elapsed else None,
+            "megabytes_per_second": round(stats["bytes"] / 1024 / 1024 / elapsed, 2) if elapsed else None,
+            "copy_seconds": round(stats["copy_seconds"], 2),
+            "consumer_waiting_seconds": round(stats["waiting_seconds"], 2),
+            # the side that spends less time waiting on the queue is the one holding the pipe back
+            "bottleneck": (
+                "generation" if stats["waiting_seconds"] > generation["producer_blocked_seconds"] else "database"
+            )
+        }
+
+    except Exception as e:
+        if conn:
+            conn.rollback()
+        logging.error(f"Generator pipe failed: {str(e)}")
+
+        summary["status"] = "failed"
+        for table in TABLES.values():
+            if table not in summary["tables_loaded"]:
+                summary["tables_loaded"][table] = {
+                    "rows_loaded": 0,
+                    "status": "failed",
+                    "error_message": str(e)
+                }
+
+        # exit non-zero so the orchestrator retries the stage
+        write_summary(summary, start_time)
+        raise
+    finally:
+        if producer.is_alive():
+            producer.terminate()
+        if conn:
+            conn.close()
+
+    write_summary(summary, start_time)
+
+def write_summary(summary, start_time):
+    summary["total_execution_time_seconds"] = round(time.time() - start_time, 2)
+
+    with open(f"{SUMMARY_PATH}/ingestion_summary.json", "w") as f:
+        json.dump(summary, f, indent=4)
+
+    if summary["status"] == "success":
+        print(
+            f"Generated and loaded {summary['throughput']['rows']} rows in "
+            f"{summary['total_execution_time_seconds']}s "
+            f"({summary['throughput']['rows_per_second']} rows/s)"
+        )
+    else:
+        print("Generator pipe failed. Check logs and summary.")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate data straight into staging through COPY")
+    parser.add_argument("--chunk-size", type=int, default=PIPE_CHUNK_SIZE, help="Transactions per COPY chunk")
+    parser.add_argument("--tee", metavar="DIR", help="Also write the raw CSVs here for replay, e.g. data/raw")
+    parser.add_argument(
+        "--staging-profile",
+        metavar="NAME",
+        help="Override staging_load.profile from config.yaml (fast | durable)"
+    )
+    parser.add_argument("--profile", action="store_true")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from profiling import run_stage
+    run_stage("data_generation_pipe", generate_to_staging, args.chunk_size, args.tee, args.staging_profile, profile=args.profile)
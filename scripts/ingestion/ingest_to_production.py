@@ -0,0 +1,518 @@
+import io
+import os
+import re
+import csv
+import sys
+import json
+import time
+import logging
+import argparse
+from collections import Counter
+from datetime import datetime
+
+# sibling modules resolve however the script is started (runpy, other cwd)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from archive_raw import open_raw, resolve_raw_file
+from ingest_to_staging import (
+    RAW_DATA_PATH,
+    copy_csv,
+    get_connection,
+    load_staging_profile,
+    prepare_staging_load,
+    setup_logging
+)
+
+# Same reload semantics, summary and load stats as the SQL transform stage
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "transformation"))
+from staging_to_production import (
+    get_execution_id,
+    load_dimensions,
+    load_facts,
+    new_summary,
+    record_load_stats,
+    reload_streamed_events,
+    reset_daily_counts,
+    resolve_keys,
+    write_summary
+)
+
+# --------------------------------------------------
+# Single-pass ingest: data/raw -> production.*
+#
+# Reads the raw CSVs in Arrow record batches, applies the cleansing and
+# business-rule filters of staging_to_production.py in Python, and COPYs the
+# result straight into production, so every row is written once instead of
+# twice (staging + INSERT ... SELECT). --parity-check runs both paths inside
+# one rolled-back transaction and compares the tables.
+#
+# Exactness notes: values are read as text and treated the way staging's
+# column types would (NUMERIC input rounds half away from zero, empty
+# unquoted fields are NULL, quoted empty strings are ''); money is handled
+# as integer cents, never floats; TRIM strips spaces only; INITCAP starts a
+# word after any non-alphanumeric character.
+# --------------------------------------------------
+STAGE_NAME = "ingest_to_production"
+PARITY_FILE = "data/processed/single_pass_parity.json"
+BLOCK_SIZE = 16 * 1024 * 1024
+
+FILES = {
+    "customers": "customers.csv",
+    "products": "products.csv",
+    "transactions": "transactions.csv",
+    "transaction_items": "transaction_items.csv"
+}
+
+# key column -> (key_map entity, natural id column); the first one is the row's own key
+KEY_COLUMNS = {
+    "customers": [("customer_key", "customer", "customer_id")],
+    "products": [("product_key", "product", "product_id")],
+    "transactions": [
+        ("transaction_key", "transaction", "transaction_id"),
+        ("customer_key", "customer", "customer_id")
+    ],
+    "transaction_items": [
+        ("item_key", "item", "item_id"),
+        ("transaction_key", "transaction", "transaction_id"),
+        ("product_key", "product", "product_id")
+    ]
+}
+
+INITCAP_WORD_START = re.compile(r"(?:(?<=[\W_])|^)[^\W_]")
+
+def import_pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.csv as pa_csv
+    except ImportError:
+        raise RuntimeError("Single-pass ingest requires pyarrow (pip install pyarrow)")
+    return pa, pc, pa_csv
+
+# --------------------------------------------------
+# Reading
+# --------------------------------------------------
+def read_batches(path):
+    """Record batches of a raw CSV with every column as text (COPY CSV null rules)."""
+    pa, _, pa_csv = import_pyarrow()
+
+    with open_raw(path) as f:
+        header = next(csv.reader([f.readline()]))
+
+    reader = pa_csv.open_csv(
+        pa.input_stream(path, compression="detect"),
+        read_options=pa_csv.ReadOptions(block_size=BLOCK_SIZE),
+        convert_options=pa_csv.ConvertOptions(
+            column_types={name: pa.string() for name in header},
+            null_values=[""],
+            strings_can_be_null=True,
+            quoted_strings_can_be_null=False
+        )
+    )
+    for batch in reader:
+        yield batch
+
+# --------------------------------------------------
+# SQL function equivalents (Arrow arrays in, Arrow arrays out)
+# --------------------------------------------------
+def trim(values):
+    _, pc, _ = import_pyarrow()
+    return pc.utf8_trim(values, characters=" ")
+
+def lower(values):
+    _, pc, _ = import_pyarrow()
+    return pc.utf8_lower(values)
+
+def digits_only(values):
+    _, pc, _ = import_pyarrow()
+    return pc.replace_substring_regex(values, pattern="[^0-9]", replacement="")
+
+def initcap(values):
+    # Arrow's utf8_title also starts a word after a digit ("3Rd"); INITCAP
+    # does not, so this one runs per value. Only used on name columns.
+    pa, _, _ = import_pyarrow()
+    return pa.array(
+        [
+            None if v is None else INITCAP_WORD_START.sub(lambda m: m.group(0).upper(), v.lower())
+            for v in values.to_pylist()
+        ],
+        type=pa.string()
+    )
+
+def numeric_units(values, scale=2):
+    """Text -> int64 in units of 10^-scale, rounded like input to NUMERIC(p, scale)."""
+    from decimal import Decimal
+    pa, pc, _ = import_pyarrow()
+
+    decimals = pc.cast(values, pa.decimal128(20, 10))
+    rounded = pc.round(decimals, ndigits=scale, round_mode="half_towards_infinity")
+    scaled = pc.multiply(rounded, pa.scalar(Decimal(10 ** scale), pa.decimal128(6, 0)))
+    return pc.cast(scaled, pa.int64())
+
+def from_cents(units):
+    # float64 of an exact cent value prints back as that decimal, which
+    # NUMERIC parses exactly
+    import numpy as np
+    pa, _, _ = import_pyarrow()
+    array = pa.array(units) if not isinstance(units, pa.Array) else units
+    mask = array.is_null().to_numpy(zero_copy_only=False)
+    values = array.fill_null(0).to_numpy(zero_copy_only=False).astype(np.float64) / 100
+    return pa.array(values, mask=mask, type=pa.float64())
+
+def round_half_away(numerator, denominator):
+    """ROUND(numerator / denominator) for int64 numpy arrays, denominator > 0."""
+    import numpy as np
+    return np.sign(numerator) * ((np.abs(numerator) * 2 + denominator) // (2 * denominator))
+
+# --------------------------------------------------
+# Cleansing (mirrors staging_to_production.load_dimensions / load_facts)
+# --------------------------------------------------
+def cleanse_customers(batch):
+    pa, pc, _ = import_pyarrow()
+    keep = pc.is_valid(batch.column("email"))
+
+    table = pa.table({
+        "customer_id": batch.column("customer_id"),
+        "first_name": initcap(trim(batch.column("first_name"))),
+        "last_name": initcap(trim(batch.column("last_name"))),
+        "email": lower(trim(batch.column("email"))),
+        "phone": digits_only(batch.column("phone")),
+        "registration_date": pc.cast(batch.column("registration_date"), pa.date32()),
+        "city": trim(batch.column("city")),
+        "state": trim(batch.column("state")),
+        "country": trim(batch.column("country")),
+        "age_group": trim(batch.column("age_group"))
+    }).filter(keep)
+
+    return table, {"null_email": batch.num_rows - table.num_rows}
+
+def cleanse_products(batch):
+    import numpy as np
+    pa, pc, _ = import_pyarrow()
+
+    price = numeric_units(batch.column("price"))
+    cost = numeric_units(batch.column("cost"))
+    keep = pc.and_kleene(pc.greater(price, 0), pc.less(cost, price))
+
+    table = pa.table({
+        "product_id": batch.column("product_id"),
+        "product_name": initcap(trim(batch.column("product_name"))),
+        "category": trim(batch.column("category")),
+        "sub_category": trim(batch.column("sub_category")),
+        "price": price,
+        "cost": cost,
+        "brand": trim(batch.column("brand")),
+        "stock_quantity": pc.cast(batch.column("stock_quantity"), pa.int32()),
+        "supplier_id": batch.column("supplier_id")
+    }).filter(keep)
+
+    # after the filter price > 0 and cost < price, so neither is NULL
+    p = table.column("price").to_numpy().astype(np.int64)
+    c = table.column("cost").to_numpy().astype(np.int64)
+    profit_margin = round_half_away((p - c) * 10000, p)
+    price_category = np.where(p < 5000, "Budget", np.where(p < 20000, "Mid-range", "Premium"))
+
+    table = (
+        table
+        .set_column(table.schema.get_field_index("price"), "price", from_cents(p))
+        .set_column(table.schema.get_field_index("cost"), "cost", from_cents(c))
+        .append_column("profit_margin", from_cents(profit_margin))
+        .append_column("price_category", pa.array(price_category, type=pa.string()))
+    )
+
+    return table, {"invalid_price_or_cost": batch.num_rows - table.num_rows}
+
+def cleanse_transactions(batch):
+    pa, pc, _ = import_pyarrow()
+
+    total_amount = numeric_units(batch.column("total_amount"))
+    keep = pc.greater(total_amount, 0)
+
+    table = pa.table({
+        "transaction_id": batch.column("transaction_id"),
+        "customer_id": batch.column("customer_id"),
+        "transaction_date": pc.cast(batch.column("transaction_date"), pa.date32()),
+        "transaction_time": batch.column("transaction_time"),
+        "payment_method": batch.column("payment_method"),
+        "shipping_address": batch.column("shipping_address"),
+        "total_amount": from_cents(total_amount)
+    }).filter(keep)
+
+    return table, {"non_positive_total_amount": batch.num_rows - table.num_rows}
+
+def cleanse_transaction_items(batch):
+    import numpy as np
+    pa, pc, _ = import_pyarrow()
+
+    quantity = pc.cast(batch.column("quantity"), pa.int64())
+    unit_price = numeric_units(batch.column("unit_price"))
+    discount = numeric_units(batch.column("discount_percentage"))
+
+    # ROUND(quantity * unit_price * (1 - discount_percentage / 100), 2) in
+    # integer units: cents * hundredths-of-percent / 10^4
+    missing = pc.or_(pc.or_(quantity.is_null(), unit_price.is_null()), discount.is_null())
+    q = quantity.fill_null(0).to_numpy()
+    u = unit_price.fill_null(0).to_numpy()
+    d = discount.fill_null(0).to_numpy()
+    line_total = round_half_away(q * u * (10000 - d), 10000)
+
+    table = pa.table({
+        "item_id": batch.column("item_id"),
+        "transaction_id": batch.column("transaction_id"),
+        "product_id": batch.column("product_id"),
+        "quantity": quantity,
+        "unit_price": from_cents(unit_price),
+        "discount_percentage": from_cents(discount),
+        "line_total": pc.if_else(missing, pa.scalar(None, pa.float64()), from_cents(line_total))
+    }).filter(pc.greater(quantity, 0))
+
+    return table, {"non_positive_quantity": batch.num_rows - table.num_rows}
+
+CLEANSERS = {
+    "customers": cleanse_customers,
+    "products": cleanse_products,
+    "transactions": cleanse_transactions,
+    "transaction_items": cleanse_transaction_items
+}
+
+# --------------------------------------------------
+# Load
+# --------------------------------------------------
+def add_keys(cur, entity, table):
+    """Surrogate key columns from production.key_map, resolved once per distinct id in the batch."""
+    pa, pc, _ = import_pyarrow()
+
+    for i, (key_column, key_entity, id_column) in enumerate(KEY_COLUMNS[entity]):
+        if i == 0:
+            # the SQL path joins on the row's own key, so rows without an id never load
+            table = table.filter(pc.is_valid(table.column(id_column)))
+
+        ids = table.column(id_column)
+        keys = resolve_keys(cur, key_entity, pc.unique(ids).to_pylist())
+        natural = pa.array(list(keys), type=pa.string())
+        surrogate = pa.array(list(keys.values()), type=pa.int64())
+        table = table.append_column(key_column, surrogate.take(pc.index_in(ids, value_set=natural)))
+
+    return table
+
+def copy_table(cur, target, table):
+    _, _, pa_csv = import_pyarrow()
+    buffer = io.BytesIO()
+    pa_csv.write_csv(table, buffer)
+    buffer.seek(0)
+    cur.copy_expert(
+        f"COPY {target} ({', '.join(table.column_names)}) FROM STDIN WITH (FORMAT csv, HEADER)",
+        buffer
+    )
+
+def load_entity(cur, source_dir, entity, on_table=None):
+    path = resolve_raw_file(source_dir, FILES[entity])
+    if path is None:
+        raise FileNotFoundError(f"{FILES[entity]} not found in {source_dir}")
+
+    input_rows = 0
+    output_rows = 0
+    rejected = Counter()
+
+    for batch in read_batches(path):
+        table, reasons = CLEANSERS[entity](batch)
+        table = add_keys(cur, entity, table)
+        input_rows += batch.num_rows
+        output_rows += table.num_rows
+        rejected.update(reasons)
+
+        if table.num_rows:
+            copy_table(cur, f"production.{entity}", table)
+            if on_table:
+                on_table(table)
+
+    return {
+        "input": input_rows,
+        "output": output_rows,
+        "filtered": input_rows - output_rows,
+        "rejected_reasons": dict(rejected)
+    }
+
+def single_pass_load(cur, source_dir, execution_id, summary):
+    """Everything staging_to_production does, straight from raw files, on cur."""
+    import pyarrow.compute as pc
+
+    # Same full reload as the SQL path: TRUNCATE ... CASCADE also empties
+    # the fact tables, so the "incremental" fact loads are plain COPYs here
+    cur.execute("TRUNCATE production.customers CASCADE")
+    reset_daily_counts(cur, "production.transactions")
+    summary["records_processed"]["customers"] = load_entity(cur, source_dir, "customers")
+    record_load_stats(cur, execution_id, "production.customers",
+                      summary["records_processed"]["customers"]["output"], stage=STAGE_NAME)
+
+    cur.execute("TRUNCATE production.products CASCADE")
+    summary["records_processed"]["products"] = load_entity(cur, source_dir, "products")
+    record_load_stats(cur, execution_id, "production.products",
+                      summary["records_processed"]["products"]["output"], stage=STAGE_NAME)
+
+    daily_counts = Counter()
+
+    def count_days(table):
+        for entry in pc.value_counts(table.column("transaction_date")).to_pylist():
+            daily_counts[entry["values"]] += entry["counts"]
+
+    summary["records_processed"]["transactions"] = load_entity(cur, source_dir, "transactions", count_days)
+
+    if daily_counts:
+        from psycopg2.extras import execute_values
+        execute_values(cur, """
+            INSERT INTO monitoring.daily_counts (table_name, stat_date, row_count)
+            VALUES %s
+            ON CONFLICT (table_name, stat_date) DO UPDATE
+            SET row_count = monitoring.daily_counts.row_count + EXCLUDED.row_count,
+                updated_at = CURRENT_TIMESTAMP
+        """, [("production.transactions", day, count) for day, count in daily_counts.items()])
+
+    dated = [day for day in daily_counts if day is not None]
+    record_load_stats(cur, execution_id, "production.transactions",
+                      summary["records_processed"]["transactions"]["output"],
+                      max(dated) if dated else None, stage=STAGE_NAME)
+
+    summary["records_processed"]["transaction_items"] = load_entity(cur, source_dir, "transaction_items")
+    record_load_stats(cur, execution_id, "production.transaction_items",
+                      summary["records_processed"]["transaction_items"]["output"], stage=STAGE_NAME)
+
+    summary["streamed_events_reloaded"] = reload_streamed_events(cur)
+
+def ingest_to_production(source_dir=RAW_DATA_PATH):
+    setup_logging()
+    import_pyarrow()
+
+    start_time = time.time()
+    summary = new_summary()
+    summary["mode"] = "single_pass"
+    summary["execution_id"] = get_execution_id()
+    summary["source_directory"] = source_dir
+
+    conn = get_connection()
+    cur = conn.cursor()
+    conn.autocommit = False
+
+    try:
+        single_pass_load(cur, source_dir, summary["execution_id"], summary)
+        conn.commit()
+        logging.info("Single-pass ingest committed successfully")
+
+    except Exception as e:
+        conn.rollback()
+        logging.error(f"Single-pass ingest failed: {str(e)}")
+        raise e
+
+    finally:
+        conn.close()
+
+    summary["total_execution_time_seconds"] = round(time.time() - start_time, 2)
+    write_summary(summary)
+    print("Single-pass ingest into production completed successfully")
+
+# --------------------------------------------------
+# Parity check: SQL path vs single pass, nothing is committed
+# --------------------------------------------------
+PARITY_TABLES = {
+    "production.customers": None,
+    "production.products": None,
+    "production.transactions": None,
+    "production.transaction_items": None,
+    "monitoring.daily_counts": "table_name = 'production.transactions'"
+}
+
+def compared_columns(cur, table):
+    schema, name = table.split(".")
+    cur.execute("""
+        SELECT column_name FROM information_schema.columns
+        WHERE table_schema = %s AND table_name = %s
+          AND column_name NOT IN ('created_at', 'updated_at')
+        ORDER BY ordinal_position
+    """, (schema, name))
+    return ", ".join(row[0] for row in cur.fetchall())
+
+def parity_check(source_dir=RAW_DATA_PATH):
+    setup_logging()
+    import_pyarrow()
+    execution_id = f"PARITY_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+
+    conn = get_connection()
+    cur = conn.cursor()
+    conn.autocommit = False
+    report = {"parity_timestamp": datetime.utcnow().isoformat(), "source_directory": source_dir, "tables": {}}
+
+    try:
+        # 1. the existing path: raw -> staging -> SQL transforms
+        staging_tables = {f"staging.{entity}": file_name for entity, file_name in FILES.items()}
+        prepare_staging_load(cur, staging_tables.keys(), load_staging_profile())
+        for table, file_name in staging_tables.items():
+            copy_csv(cur, table, resolve_raw_file(source_dir, file_name), load_staging_profile())
+
+        start = time.time()
+        load_dimensions(cur, execution_id, new_summary())
+        load_facts(cur, execution_id, new_summary())
+        report["sql_path_seconds"] = round(time.time() - start, 2)
+
+        columns = {}
+        for i, (table, where) in enumerate(PARITY_TABLES.items()):
+            columns[table] = compared_columns(cur, table)
+            cur.execute(f"""
+                CREATE TEMP TABLE parity_{i} ON COMMIT DROP AS
+                SELECT {columns[table]} FROM {table} {f'WHERE {where}' if where else ''}
+            """)
+
+        # 2. the single pass, over the same production tables
+        start = time.time()
+        single_pass_load(cur, source_dir, execution_id, new_summary())
+        report["single_pass_seconds"] = round(time.time() - start, 2)
+
+        for i, (table, where) in enumerate(PARITY_TABLES.items()):
+            current = f"SELECT {columns[table]} FROM {table} {f'WHERE {where}' if where else ''}"
+            cur.execute(f"""
+                SELECT
+                    (SELECT COUNT(*) FROM parity_{i}),
+                    (SELECT COUNT(*) FROM ({current}) c),
+                    (SELECT COUNT(*) FROM (SELECT * FROM parity_{i} EXCEPT ALL {current}) m),
+                    (SELECT COUNT(*) FROM ({current} EXCEPT ALL SELECT * FROM parity_{i}) u)
+            """)
+            sql_rows, single_pass_rows, missing, unexpected = cur.fetchone()
+            report["tables"][table] = {
+                "sql_path_rows": sql_rows,
+                "single_pass_rows": single_pass_rows,
+                "missing_in_single_pass": missing,
+                "only_in_single_pass": unexpected,
+                "match": missing == 0 and unexpected == 0
+            }
+
+    finally:
+        conn.rollback()
+        conn.close()
+
+    report["match"] = all(t["match"] for t in report["tables"].values())
+
+    os.makedirs(os.path.dirname(PARITY_FILE), exist_ok=True)
+    with open(PARITY_FILE, "w") as f:
+        json.dump(report, f, indent=4)
+
+    print(json.dumps(report["tables"], indent=2))
+    if not report["match"]:
+        sys.exit(f"Single-pass output differs from the SQL path, see {PARITY_FILE}")
+    print("Single-pass output matches the SQL path")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Cleanse raw CSV files straight into the production schema")
+    parser.add_argument("--source-dir", default=RAW_DATA_PATH)
+    parser.add_argument(
+        "--parity-check",
+        action="store_true",
+        help="Run the SQL path and the single pass in one rolled-back transaction and compare"
+    )
+    parser.add_argument("--profile", action="store_true")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    run = parity_check if args.parity_check else ingest_to_production
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from profiling import run_stage
+    run_stage("single_pass_ingest", run, args.source_dir, profile=args.profile)
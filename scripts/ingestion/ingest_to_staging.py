@@ -1,59 +1,222 @@
 import os
+import sys
+import csv
 import json
 import time
+import hashlib
 import logging
+import argparse
 from datetime import datetime
-import pandas as pd
-import psycopg2
-import yaml
+
+# sibling modules resolve however the script is started (runpy, other cwd)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from archive_raw import MANIFEST_FILE, get_execution_id, open_raw, resolve_raw_file
 
 # --------------------------------------------------
-# Load configuration
+# Paths
 # --------------------------------------------------
-with open("config/config.yaml", "r") as f:
-    config = yaml.safe_load(f)
-
-DB_CONFIG = config["database"]
-
 RAW_DATA_PATH = "data/raw"
 SUMMARY_PATH = "data/staging"
 LOG_PATH = "logs"
 
-os.makedirs(SUMMARY_PATH, exist_ok=True)
-os.makedirs(LOG_PATH, exist_ok=True)
+# --------------------------------------------------
+# Load configuration
+# --------------------------------------------------
+def load_db_config():
+    import yaml
+    with open("config/config.yaml", "r") as f:
+        return yaml.safe_load(f)["database"]
+
+# --------------------------------------------------
+# Staging load profile (see staging_load in config.yaml)
+# --------------------------------------------------
+DEFAULT_STAGING_PROFILES = {
+    "fast": {"unlogged_tables": True, "copy_freeze": True, "synchronous_commit": "off"},
+    "durable": {"unlogged_tables": False, "copy_freeze": False, "synchronous_commit": "on"}
+}
+
+def load_staging_profile(name=None):
+    import yaml
+    with open("config/config.yaml", "r") as f:
+        settings = yaml.safe_load(f).get("staging_load", {})
+
+    profiles = dict(DEFAULT_STAGING_PROFILES, **settings.get("profiles", {}))
+    name = name or settings.get("profile", "durable")
+    if name not in profiles:
+        raise ValueError(f"Unknown staging_load profile: {name}")
+    return dict(profiles[name], name=name)
+
+CHUNK_INDEXES = [
+    "staging.idx_staging_transactions_date",
+    "staging.idx_staging_transaction_items_transaction"
+]
+
+def prepare_staging_load(cursor, tables, profile):
+    """Truncate the tables and apply the profile, inside the load transaction.
+
+    Truncating in the same transaction as the COPY is what allows FREEZE;
+    SET [UN]LOGGED rewrites the table, so it only runs when the persistence
+    differs from the profile, and right after the TRUNCATE while it is empty.
+    """
+    cursor.execute(f"SET LOCAL synchronous_commit = {profile['synchronous_commit']}")
+
+    # built after the load by chunked staging_to_production; COPY would
+    # otherwise maintain them row by row
+    for index in CHUNK_INDEXES:
+        cursor.execute(f"DROP INDEX IF EXISTS {index}")
+
+    for table in tables:
+        cursor.execute(f"TRUNCATE TABLE {table}")
+
+        schema, name = table.split(".")
+        cursor.execute("""
+            SELECT c.relpersistence
+            FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = %s AND c.relname = %s
+        """, (schema, name))
+        unlogged = cursor.fetchone()[0] == "u"
+
+        if unlogged != profile["unlogged_tables"]:
+            cursor.execute(f"ALTER TABLE {table} SET {'UNLOGGED' if profile['unlogged_tables'] else 'LOGGED'}")
+            logging.info(f"{table} set {'UNLOGGED' if profile['unlogged_tables'] else 'LOGGED'}")
+
+def copy_options(profile, header):
+    options = ["FORMAT csv"]
+    if header:
+        options.append("HEADER")
+    if profile["copy_freeze"]:
+        options.append("FREEZE")
+    return ", ".join(options)
+
+# --------------------------------------------------
+# WAL accounting (cluster-wide: concurrent activity is included)
+# --------------------------------------------------
+def current_wal_lsn(cursor):
+    cursor.execute("SELECT pg_current_wal_lsn()")
+    return cursor.fetchone()[0]
+
+def wal_bytes_since(cursor, lsn):
+    cursor.execute("SELECT pg_wal_lsn_diff(pg_current_wal_lsn(), %s)", (lsn,))
+    return int(cursor.fetchone()[0])
 
 # --------------------------------------------------
 # Logging configuration
 # --------------------------------------------------
-log_file = f"{LOG_PATH}/staging_ingestion_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
+def setup_logging():
+    os.makedirs(LOG_PATH, exist_ok=True)
+    log_file = f"{LOG_PATH}/staging_ingestion_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
 
-logging.basicConfig(
-    filename=log_file,
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s"
-)
+    logging.basicConfig(
+        filename=log_file,
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s"
+    )
 
 # --------------------------------------------------
 # Database connection
 # --------------------------------------------------
 def get_connection():
+    import psycopg2
+    db_config = load_db_config()
     return psycopg2.connect(
-        host=os.getenv("DB_HOST", DB_CONFIG["host"]),
-        port=os.getenv("DB_PORT", DB_CONFIG["port"]),
-        dbname=os.getenv("DB_NAME", DB_CONFIG["name"]),
-        user=os.getenv("DB_USER", DB_CONFIG["user"]),
-        password=os.getenv("DB_PASSWORD", DB_CONFIG["password"])
+        host=os.getenv("DB_HOST", db_config["host"]),
+        port=os.getenv("DB_PORT", db_config["port"]),
+        dbname=os.getenv("DB_NAME", db_config["name"]),
+        user=os.getenv("DB_USER", db_config["user"]),
+        password=os.getenv("DB_PASSWORD", db_config["password"])
     )
 
 # --------------------------------------------------
-# Bulk load using COPY
+# Row count (csv module instead of pandas, no DataFrame needed)
+# --------------------------------------------------
+def count_csv_rows(file_path):
+    with open_raw(file_path) as f:
+        reader = csv.reader(f)
+        next(reader, None)  # header
+        return sum(1 for _ in reader)
+
+def load_manifest(source_dir):
+    # Archived batches carry their row counts and hashes, so no extra decompression pass
+    manifest_path = os.path.join(source_dir, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return {}
+    with open(manifest_path) as f:
+        return json.load(f)["files"]
+
+# --------------------------------------------------
+# Content fingerprints (monitoring.raw_files / monitoring.staging_batches)
 # --------------------------------------------------
-def copy_csv(cursor, table_name, file_path):
-    with open(file_path, "r", encoding="utf-8") as f:
+class HashingReader:
+    """Text file wrapper that hashes whatever COPY reads through it.
+
+    The digest is the sha256 of the raw UTF-8 bytes, the same value
+    archive_raw.py records in its manifest.
+    """
+
+    def __init__(self, f):
+        self.f = f
+        self.sha256 = hashlib.sha256()
+        self.bytes = 0
+
+    def _update(self, data):
+        encoded = data.encode("utf-8")
+        self.sha256.update(encoded)
+        self.bytes += len(encoded)
+        return data
+
+    def read(self, size=-1):
+        return self._update(self.f.read(size))
+
+    def readline(self, size=-1):
+        return self._update(self.f.readline(size))
+
+def loaded_files(cursor, hashes):
+    """{sha256: execution_id} for files whose latest batch reached production."""
+    cursor.execute("""
+        SELECT f.sha256, f.last_execution_id
+        FROM monitoring.raw_files f
+        JOIN monitoring.staging_batches b ON b.execution_id = f.last_execution_id
+        WHERE b.status = 'loaded' AND f.sha256 = ANY(%s)
+    """, (list(hashes),))
+    return dict(cursor.fetchall())
+
+def record_files(cursor, execution_id, files, batch=True):
+    """Upsert the fingerprints; with batch=True they now belong to execution_id."""
+    for file_name, entry in files.items():
+        cursor.execute("""
+            INSERT INTO monitoring.raw_files
+                (sha256, file_name, rows_loaded, bytes, first_execution_id, last_execution_id)
+            VALUES (%s, %s, %s, %s, %s, %s)
+            ON CONFLICT (sha256) DO UPDATE SET
+                deliveries = monitoring.raw_files.deliveries + 1,
+                last_seen_at = CURRENT_TIMESTAMP,
+                last_execution_id = CASE WHEN %s THEN EXCLUDED.last_execution_id
+                                         ELSE monitoring.raw_files.last_execution_id END
+        """, (entry["sha256"], file_name, entry["rows"], entry["bytes"], execution_id, execution_id, batch))
+
+def register_batch(cursor, execution_id, source):
+    cursor.execute("""
+        INSERT INTO monitoring.staging_batches (execution_id, source, status)
+        VALUES (%s, %s, 'staged')
+        ON CONFLICT (execution_id) DO UPDATE SET
+            source = EXCLUDED.source, status = 'staged',
+            staged_at = CURRENT_TIMESTAMP, loaded_at = NULL
+    """, (execution_id, source))
+
+# --------------------------------------------------
+# Bulk load using COPY (.gz / .zst are decompressed while streaming)
+# --------------------------------------------------
+def copy_csv(cursor, table_name, file_path, profile):
+    """COPY one file and return its sha256 and size, computed in the stream."""
+    with open_raw(file_path) as raw:
+        f = HashingReader(raw)
+        # explicit column list from the header: loaded_at is filled by its default
+        columns = next(csv.reader([f.readline()]))
         cursor.copy_expert(
-            sql=f"COPY {table_name} FROM STDIN WITH CSV HEADER",
+            sql=f"COPY {table_name} ({', '.join(columns)}) FROM STDIN WITH ({copy_options(profile, header=False)})",
             file=f
         )
+    return f.sha256.hexdigest(), f.bytes
 
 # --------------------------------------------------
 # Validation function
@@ -63,13 +226,49 @@ def validate_staging_load(cursor, table, csv_rows):
     db_rows = cursor.fetchone()[0]
     return db_rows == csv_rows, db_rows
 
+# --------------------------------------------------
+# Re-delivered batches
+# --------------------------------------------------
+def is_redelivery(cursor, files):
+    """Mark each file with the batch it duplicates; True if every file does."""
+    loaded = loaded_files(cursor, {entry["sha256"] for entry in files.values()})
+    for entry in files.values():
+        entry["duplicate_of"] = loaded.get(entry["sha256"])
+    return all(entry["duplicate_of"] for entry in files.values())
+
+def record_no_op(cursor, execution_id, summary):
+    # count the delivery without moving the files off the batch that loaded them
+    record_files(cursor, execution_id, summary["files"], batch=False)
+    summary["no_op"] = True
+    for table in summary["tables_loaded"]:
+        summary["tables_loaded"][table] = {"rows_loaded": 0, "status": "skipped"}
+    logging.info("All files were already loaded into production; staging left unchanged")
+
 # --------------------------------------------------
 # Main ingestion
 # --------------------------------------------------
-def ingest_to_staging():
+def ingest_to_staging(source_dir=RAW_DATA_PATH, profile_name=None, force=False):
+    """Load a batch of raw files into staging.
+
+    A batch whose files (by content hash) all belong to batches that already
+    reached production is a no-op: staging keeps its contents, the delivery
+    is counted in monitoring.raw_files, and staging_to_production skips it.
+    force=True loads it regardless.
+    """
+    setup_logging()
+    os.makedirs(SUMMARY_PATH, exist_ok=True)
+
     start_time = time.time()
+    execution_id = get_execution_id()
+    profile = load_staging_profile(profile_name)
     summary = {
         "ingestion_timestamp": datetime.utcnow().isoformat(),
+        "execution_id": execution_id,
+        "source_directory": source_dir,
+        "staging_profile": profile,
+        "status": "running",
+        "no_op": False,
+        "files": {},
         "tables_loaded": {},
         "total_execution_time_seconds": 0
     }
@@ -82,30 +281,53 @@ def ingest_to_staging():
     }
 
     conn = None
+    manifest = load_manifest(source_dir)
 
     try:
         conn = get_connection()
         cursor = conn.cursor()
         conn.autocommit = False  # BEGIN TRANSACTION
 
-        logging.info("Starting staging ingestion")
+        # Archived batches are fingerprinted already, so a re-delivery is
+        # recognised before anything is truncated or read
+        if not force and all(name in manifest for name in tables.values()):
+            summary["files"] = {
+                name: {"sha256": manifest[name]["sha256"], "rows": manifest[name]["rows"],
+                       "bytes": manifest[name]["raw_bytes"]}
+                for name in tables.values()
+            }
+            if is_redelivery(cursor, summary["files"]):
+                summary["tables_loaded"] = dict.fromkeys(tables)
+                record_no_op(cursor, execution_id, summary)
+                conn.commit()
+                summary["status"] = "success"
+                return write_summary(summary, start_time)
+            summary["files"] = {}
+
+        logging.info(f"Starting staging ingestion (profile: {profile['name']})")
+        start_lsn = current_wal_lsn(cursor)
 
         # Truncate tables first (idempotent)
-        for table in tables.keys():
-            cursor.execute(f"TRUNCATE TABLE {table}")
-            logging.info(f"Truncated {table}")
+        prepare_staging_load(cursor, tables.keys(), profile)
+        logging.info("Truncated staging tables")
 
         # Load data
         for table, file_name in tables.items():
-            file_path = os.path.join(RAW_DATA_PATH, file_name)
+            file_path = resolve_raw_file(source_dir, file_name)
 
-            if not os.path.exists(file_path):
-                raise FileNotFoundError(f"{file_name} not found")
+            if file_path is None:
+                raise FileNotFoundError(f"{file_name} not found in {source_dir}")
 
-            df = pd.read_csv(file_path)
-            rows = len(df)
+            rows = manifest.get(file_name, {}).get("rows")
+            if rows is None:
+                rows = count_csv_rows(file_path)
 
-            copy_csv(cursor, table, file_path)
+            table_lsn = current_wal_lsn(cursor)
+            table_start = time.time()
+            sha256, file_bytes = copy_csv(cursor, table, file_path, profile)
+            load_seconds = time.time() - table_start
+            wal_bytes = wal_bytes_since(cursor, table_lsn)
+            summary["files"][file_name] = {"sha256": sha256, "rows": rows, "bytes": file_bytes}
 
             valid, db_rows = validate_staging_load(cursor, table, rows)
 
@@ -116,12 +338,26 @@ def ingest_to_staging():
 
             summary["tables_loaded"][table] = {
                 "rows_loaded": db_rows,
+                "load_seconds": round(load_seconds, 3),
+                "wal_bytes": wal_bytes,
                 "status": "success"
             }
 
-            logging.info(f"Loaded {db_rows} rows into {table}")
+            logging.info(f"Loaded {db_rows} rows into {table} ({wal_bytes} WAL bytes)")
+
+        if not force and is_redelivery(cursor, summary["files"]):
+            # plain files are only fingerprinted by the COPY itself; rolling
+            # back restores the staging contents the earlier load left behind
+            conn.rollback()
+            record_no_op(cursor, execution_id, summary)
+        else:
+            record_files(cursor, execution_id, summary["files"])
+            register_batch(cursor, execution_id, source_dir)
 
         conn.commit()
+        summary["status"] = "success"
+        # includes the commit record and the TRUNCATE / SET [UN]LOGGED work
+        summary["wal_bytes"] = wal_bytes_since(cursor, start_lsn)
         logging.info("Staging ingestion committed successfully")
 
     except Exception as e:
@@ -129,6 +365,7 @@ def ingest_to_staging():
             conn.rollback()
         logging.error(f"Ingestion failed: {str(e)}")
 
+        summary["status"] = "failed"
         for table in tables.keys():
             if table not in summary["tables_loaded"]:
                 summary["tables_loaded"][table] = {
@@ -137,10 +374,17 @@ def ingest_to_staging():
                     "error_message": str(e)
                 }
 
+        # exit non-zero so the orchestrator retries and never archives the files
+        write_summary(summary, start_time)
+        raise
+
     finally:
         if conn:
             conn.close()
 
+    write_summary(summary, start_time)
+
+def write_summary(summary, start_time):
     summary["total_execution_time_seconds"] = round(
         time.time() - start_time, 2
     )
@@ -148,10 +392,40 @@ def ingest_to_staging():
     with open(f"{SUMMARY_PATH}/ingestion_summary.json", "w") as f:
         json.dump(summary, f, indent=4)
 
-    print("Staging ingestion completed. Check logs and summary.")
+    if summary["status"] == "failed":
+        print("Staging ingestion failed. Check logs and summary.")
+    elif summary["no_op"]:
+        print("Staging ingestion skipped: every file was already loaded.")
+    else:
+        print("Staging ingestion completed. Check logs and summary.")
 
 # --------------------------------------------------
 # Run
 # --------------------------------------------------
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load raw CSV files into the staging schema")
+    parser.add_argument(
+        "--from-archive",
+        metavar="DIR",
+        help="Replay an archived batch, e.g. data/archive/raw/dt=2025-01-01/PIPE_20250101_100000"
+    )
+    parser.add_argument(
+        "--staging-profile",
+        metavar="NAME",
+        help="Override staging_load.profile from config.yaml (fast | durable)"
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Load the batch even if every file was already loaded into production"
+    )
+    parser.add_argument("--profile", action="store_true")
+    return parser.parse_args()
+
 if __name__ == "__main__":
-    ingest_to_staging()
+    args = parse_args()
+    source_dir = args.from_archive or RAW_DATA_PATH
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from profiling import run_stage
+    run_stage("data_ingestion", ingest_to_staging, source_dir, args.staging_profile, args.force, profile=args.profile)
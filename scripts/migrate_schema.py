@@ -0,0 +1,66 @@
+import os
+import sys
+import glob
+import argparse
+
+# --------------------------------------------------
+# Schema migration
+#
+# Docker runs sql/ddl/*.sql only when the database volume is first created,
+# so an existing database never sees later DDL changes. This applies the
+# same files in the same (alphabetical) order; they are idempotent (IF NOT
+# EXISTS / guarded DO blocks), so it is safe on every deploy. Afterwards the
+# data backfills that DDL alone cannot do are run:
+#   - daily HyperLogLog sketches for fact_sales days that have none
+# --------------------------------------------------
+DDL_DIR = "sql/ddl"
+
+def get_conn():
+    import psycopg2
+    return psycopg2.connect(
+        host=os.environ.get("DB_HOST", "localhost"),
+        port=int(os.environ.get("DB_PORT", 5432)),
+        dbname=os.environ.get("DB_NAME", "ecommerce_db"),
+        user=os.environ.get("DB_USER", "admin"),
+        password=os.environ.get("DB_PASSWORD", "password")
+    )
+
+def apply_ddl(conn, ddl_dir=DDL_DIR):
+    applied = []
+    for path in sorted(glob.glob(os.path.join(ddl_dir, "*.sql"))):
+        with open(path, "r") as f:
+            sql = f.read()
+        # one transaction per file: a failing file leaves the earlier ones applied
+        with conn.cursor() as cur:
+            cur.execute(sql)
+        conn.commit()
+        applied.append(os.path.basename(path))
+        print(f"Applied {path}")
+    return applied
+
+def backfill(conn):
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "transformation"))
+    from unique_counts import rebuild_daily_sketches
+
+    result = rebuild_daily_sketches(conn, missing_only=True)
+    print(f"Daily sketches seeded for {result['days_rebuilt']} day(s) without one")
+
+def main(skip_backfill=False):
+    conn = get_conn()
+    try:
+        apply_ddl(conn)
+        if not skip_backfill:
+            backfill(conn)
+    finally:
+        conn.close()
+
+    print("Schema migration completed successfully")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Apply sql/ddl to an existing database and backfill derived data")
+    parser.add_argument("--skip-backfill", action="store_true", help="Only apply the DDL files")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    main(args.skip_backfill)
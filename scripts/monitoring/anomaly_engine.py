@@ -0,0 +1,200 @@
+import os
+import sys
+import json
+import math
+import time
+from datetime import datetime, timezone
+
+STATE_FILE = "data/processed/anomaly_state.json"
+OUTPUT_FILE = "data/processed/anomaly_report.json"
+
+DB_CONFIG = {
+    "host": os.environ.get("DB_HOST", "localhost"),
+    "port": os.environ.get("DB_PORT", "5432"),
+    "dbname": os.environ.get("DB_NAME", "ecommerce_db"),
+    "user": os.environ.get("DB_USER", "admin"),
+    "password": os.environ.get("DB_PASSWORD", "password"),
+}
+
+# ---------- SETTINGS ----------
+
+ALPHA = 0.1          # EWMA smoothing factor (~ last 10 loads dominate)
+Z_THRESHOLD = 3.5    # |z| above this is an anomaly
+WARMUP_OBSERVATIONS = 5
+
+# ---------- HELPERS ----------
+
+def utc_now():
+    return datetime.now(timezone.utc)
+
+def get_conn():
+    import psycopg2
+    return psycopg2.connect(**DB_CONFIG)
+
+def load_state():
+    if not os.path.exists(STATE_FILE):
+        return {"watermark": None, "series": {}}
+    with open(STATE_FILE) as f:
+        return json.load(f)
+
+def save_state(state):
+    os.makedirs(os.path.dirname(STATE_FILE), exist_ok=True)
+    tmp_file = f"{STATE_FILE}.tmp"
+    with open(tmp_file, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_file, STATE_FILE)
+
+# ---------- DELTA ----------
+
+# Every series is derived from one GROUP BY over the rows loaded since the
+# last run (created_at > watermark), not from the full history.
+DELTA_SQL = """
+    SELECT
+        GROUPING(t.payment_method) AS all_methods,
+        GROUPING(p.category) AS all_categories,
+        t.payment_method,
+        p.category,
+        COUNT(DISTINCT t.transaction_key) AS orders,
+        COUNT(*) AS items,
+        SUM(ti.quantity) AS units,
+        SUM(ti.line_total) AS revenue,
+        MAX(t.created_at) AS max_created_at
+    FROM production.transactions t
+    JOIN production.transaction_items ti
+    ON ti.transaction_key = t.transaction_key
+    JOIN production.products p
+    ON p.product_key = ti.product_key
+    WHERE t.created_at > %s
+    GROUP BY GROUPING SETS ((t.payment_method), (p.category), ());
+"""
+
+def fetch_delta(conn, watermark):
+    cur = conn.cursor()
+    cur.execute(DELTA_SQL, (watermark or "-infinity",))
+    rows = cur.fetchall()
+    cur.close()
+    return rows
+
+def delta_observations(rows, known_series):
+    observations = {}
+    new_watermark = None
+    totals = None
+
+    for all_methods, all_categories, method, category, orders, items, units, revenue, max_ts in rows:
+        if all_methods and all_categories:
+            totals = orders
+            new_watermark = max_ts
+            observations["revenue"] = float(revenue)
+            observations["orders"] = orders
+            observations["items_per_order"] = items / orders
+        elif all_categories:
+            observations[f"payment_mix:{method}"] = orders
+        else:
+            observations[f"category_units:{category}"] = int(units)
+            observations[f"category_revenue:{category}"] = float(revenue)
+
+    if not totals:
+        return {}, None
+
+    for key in list(observations):
+        if key.startswith("payment_mix:"):
+            observations[key] = observations[key] / totals
+
+    # A series we have seen before that is missing from this delta is a zero
+    for key in known_series:
+        if key.startswith(("payment_mix:", "category_units:", "category_revenue:")):
+            observations.setdefault(key, 0.0)
+
+    return observations, new_watermark
+
+# ---------- ROLLING STATISTICS ----------
+
+def update_series(series, value):
+    """Score `value` against the series' EWMA mean/variance, then fold it in.
+
+    Once warmed up, the value is clipped to mean +/- Z_THRESHOLD * std before
+    updating, so a single outlier is reported but does not drag the baseline.
+    """
+    if series is None:
+        return {"observations": 1, "mean": value, "variance": 0.0, "last_value": value}, None
+
+    mean = series["mean"]
+    std = math.sqrt(series["variance"])
+    warmed_up = series["observations"] >= WARMUP_OBSERVATIONS
+
+    z = (value - mean) / std if std > 0 else 0.0
+    anomaly = warmed_up and abs(z) > Z_THRESHOLD
+
+    update_value = value
+    if warmed_up and std > 0:
+        update_value = min(max(value, mean - Z_THRESHOLD * std), mean + Z_THRESHOLD * std)
+
+    diff = update_value - mean
+    increment = ALPHA * diff
+
+    series = {
+        "observations": series["observations"] + 1,
+        "mean": mean + increment,
+        "variance": (1 - ALPHA) * (series["variance"] + diff * increment),
+        "last_value": value
+    }
+
+    if not anomaly:
+        return series, None
+
+    return series, {
+        "value": round(value, 4),
+        "expected": round(mean, 4),
+        "z_score": round(z, 2),
+        "direction": "spike" if z > 0 else "drop"
+    }
+
+def detect(state, observations):
+    anomalies = {}
+    for key, value in observations.items():
+        state["series"][key], anomaly = update_series(state["series"].get(key), value)
+        if anomaly:
+            anomalies[key] = anomaly
+    return anomalies
+
+# ---------- MAIN ----------
+
+def main():
+    state = load_state()
+    conn = get_conn()
+
+    start = time.time()
+    rows = fetch_delta(conn, state["watermark"])
+    query_ms = (time.time() - start) * 1000
+    conn.close()
+
+    start = time.time()
+    observations, new_watermark = delta_observations(rows, state["series"])
+    anomalies = detect(state, observations)
+    detection_ms = (time.time() - start) * 1000
+
+    if new_watermark is not None:
+        state["watermark"] = new_watermark.isoformat()
+        save_state(state)
+
+    report = {
+        "detection_timestamp": utc_now().isoformat(),
+        "status": "anomaly_detected" if anomalies else "ok" if observations else "no_new_data",
+        "watermark": state["watermark"],
+        "series_tracked": len(state["series"]),
+        "series_updated": len(observations),
+        "anomalies": anomalies,
+        "delta_query_ms": round(query_ms, 2),
+        "detection_time_ms": round(detection_ms, 3)
+    }
+
+    os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
+    with open(OUTPUT_FILE, "w") as f:
+        json.dump(report, f, indent=4)
+
+    print(f"Anomaly detection finished: {len(anomalies)} anomalies across {len(observations)} series")
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from profiling import run_stage
+    run_stage("anomaly_detection", main, profile="--profile" in sys.argv)
@@ -0,0 +1,157 @@
+import time
+import asyncio
+import argparse
+
+from pipeline_monitor import (
+    DB_CONFIG,
+    FRESHNESS_SQL,
+    VOLUME_SQL,
+    ORPHAN_ITEMS_SQL,
+    NULL_EMAILS_SQL,
+    CONNECTIONS_SQL,
+    utc_now,
+    check_last_execution,
+    evaluate_freshness,
+    evaluate_volume,
+    evaluate_quality,
+    evaluate_db_health,
+    build_report,
+    write_report,
+)
+
+# ---------- SETTINGS ----------
+
+CHECK_TIMEOUT_SECONDS = 2.0
+DAEMON_INTERVAL_SECONDS = 30
+
+# ---------- CONNECTION POOL ----------
+
+async def create_pool(timeout):
+    import asyncpg
+
+    # One connection per DB check so all of them can run at the same time.
+    # statement_timeout makes Postgres abandon the query too, not just the
+    # client side wait_for().
+    return await asyncpg.create_pool(
+        host=DB_CONFIG["host"],
+        port=int(DB_CONFIG["port"]),
+        database=DB_CONFIG["dbname"],
+        user=DB_CONFIG["user"],
+        password=DB_CONFIG["password"],
+        min_size=4,
+        max_size=4,
+        timeout=timeout,
+        server_settings={"statement_timeout": str(int(timeout * 1000))}
+    )
+
+# ---------- ASYNC CHECKS ----------
+
+async def check_data_freshness(pool):
+    async with pool.acquire() as conn:
+        row = await conn.fetchrow(FRESHNESS_SQL)
+    return evaluate_freshness(tuple(row))
+
+async def check_volume_anomalies(pool):
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(VOLUME_SQL)
+    return evaluate_volume([tuple(r) for r in rows])
+
+async def check_data_quality(pool):
+    async with pool.acquire() as conn:
+        orphan_items = await conn.fetchval(ORPHAN_ITEMS_SQL)
+        nulls = await conn.fetchval(NULL_EMAILS_SQL)
+    return evaluate_quality(orphan_items, nulls)
+
+async def check_db_health(pool):
+    start = time.time()
+    async with pool.acquire() as conn:
+        await conn.fetchval("SELECT 1;")
+        connections = await conn.fetchval(CONNECTIONS_SQL)
+    return evaluate_db_health((time.time() - start) * 1000, connections)
+
+async def run_check(name, coro, timeout):
+    start = time.time()
+    try:
+        result = await asyncio.wait_for(coro, timeout)
+    except asyncio.TimeoutError:
+        result = {"status": "timeout", "error_message": f"{name} exceeded {timeout}s"}
+    except Exception as e:
+        result = {"status": "error", "error_message": str(e)}
+
+    result["check_duration_ms"] = round((time.time() - start) * 1000, 2)
+    return result
+
+# ---------- EVALUATION ----------
+
+async def evaluate(pool, timeout):
+    start = time.time()
+
+    freshness, volume, quality, db = await asyncio.gather(
+        run_check("data_freshness", check_data_freshness(pool), timeout),
+        run_check("data_volume_anomalies", check_volume_anomalies(pool), timeout),
+        run_check("data_quality", check_data_quality(pool), timeout),
+        run_check("database_connectivity", check_db_health(pool), timeout)
+    )
+
+    report = build_report(check_last_execution(), freshness, volume, quality, db)
+    report["evaluation_time_ms"] = round((time.time() - start) * 1000, 2)
+    return report
+
+def unreachable_report(error, start):
+    # No pool, so no check can run: report the outage itself as critical
+    skipped = {"status": "skipped", "error_message": "database unreachable"}
+    db = {"status": "critical", "error_message": str(error) or type(error).__name__}
+    report = build_report(check_last_execution(), dict(skipped), dict(skipped), dict(skipped), db)
+    report["evaluation_time_ms"] = round((time.time() - start) * 1000, 2)
+    return report
+
+async def run(daemon, interval, timeout):
+    # The pool is (re)created at the start of an interval while it is
+    # missing, so the daemon keeps alerting through a database outage
+    pool = None
+
+    try:
+        while True:
+            if pool is None:
+                start = time.time()
+                try:
+                    pool = await create_pool(timeout)
+                except ImportError:
+                    raise
+                except Exception as e:
+                    report = unreachable_report(e, start)
+
+            if pool is not None:
+                report = await evaluate(pool, timeout)
+            write_report(report)
+
+            print(
+                f"{utc_now().isoformat()} health={report['pipeline_health']} "
+                f"alerts={len(report['alerts'])} in {report['evaluation_time_ms']} ms"
+            )
+
+            if not daemon:
+                break
+            await asyncio.sleep(interval)
+    finally:
+        if pool is not None:
+            await pool.close()
+
+# ---------- MAIN ----------
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Concurrent pipeline health monitor")
+    parser.add_argument("--daemon", action="store_true", help="Re-evaluate every --interval seconds")
+    parser.add_argument("--interval", type=float, default=DAEMON_INTERVAL_SECONDS)
+    parser.add_argument("--timeout", type=float, default=CHECK_TIMEOUT_SECONDS, help="Per-check timeout in seconds")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    try:
+        asyncio.run(run(args.daemon, args.interval, args.timeout))
+    except KeyboardInterrupt:
+        print("Async monitor stopped")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+import os
+import json
+import time
+import argparse
+import threading
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# --------------------------------------------------
+# Prometheus / OpenMetrics text exporter
+#
+#   python scripts/monitoring/metrics_exporter.py                 # serve :9108/metrics
+#   python scripts/monitoring/metrics_exporter.py --textfile out.prom
+#   curl -s localhost:9108/metrics                                # local scrape
+# --------------------------------------------------
+PIPELINE_REPORT = "data/processed/pipeline_execution_report.json"
+QUALITY_REPORT = "data/quality/data_quality_report.json"
+
+DEFAULT_PORT = 9108
+CACHE_TTL_SECONDS = 10
+RESPONSE_TIME_BUCKETS = [0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5]
+
+DB_CONFIG = {
+    "host": os.environ.get("DB_HOST", "localhost"),
+    "port": os.environ.get("DB_PORT", "5432"),
+    "dbname": os.environ.get("DB_NAME", "ecommerce_db"),
+    "user": os.environ.get("DB_USER", "admin"),
+    "password": os.environ.get("DB_PASSWORD", "password"),
+}
+
+# ---------- CONNECTION ----------
+
+_conn = None
+
+def get_conn():
+    # A single long-lived connection reused across scrapes; dropped and
+    # re-opened on the next collection if it breaks.
+    global _conn
+    if _conn is None or _conn.closed:
+        import psycopg2
+        _conn = psycopg2.connect(**DB_CONFIG)
+        _conn.autocommit = True
+    return _conn
+
+def reset_conn():
+    global _conn
+    if _conn is not None:
+        try:
+            _conn.close()
+        except Exception:
+            pass
+    _conn = None
+
+# ---------- METRIC RENDERING ----------
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.total += 1
+        self.sum += value
+
+    def samples(self, name):
+        lines = [
+            f'{name}_bucket{{le="{bound}"}} {count}'
+            for bound, count in zip(self.buckets, self.counts)
+        ]
+        lines.append(f'{name}_bucket{{le="+Inf"}} {self.total}')
+        lines.append(f"{name}_sum {self.sum}")
+        lines.append(f"{name}_count {self.total}")
+        return lines
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def family(name, metric_type, help_text, samples):
+    """samples: list of (labels_dict, value)."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}"]
+    for labels, value in samples:
+        if value is None:
+            continue
+        label_str = ",".join(f'{k}="{escape_label(v)}"' for k, v in labels.items())
+        lines.append(f"{name}{{{label_str}}} {value}" if label_str else f"{name} {value}")
+    return lines
+
+# ---------- COLLECTION ----------
+
+db_response_histogram = Histogram(RESPONSE_TIME_BUCKETS)
+collect_histogram = Histogram(RESPONSE_TIME_BUCKETS)
+stats = {"scrapes": 0, "cache_hits": 0, "collect_errors": 0}
+
+def read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+def collect_pipeline_metrics():
+    lines = []
+    report = read_json(PIPELINE_REPORT)
+    steps = (report or {}).get("steps_executed", {})
+
+    lines += family(
+        "pipeline_stage_duration_seconds", "gauge",
+        "Duration of each stage in the last pipeline run",
+        [({"stage": s}, r.get("duration_seconds")) for s, r in steps.items()]
+    )
+    lines += family(
+        "pipeline_stage_retries", "gauge",
+        "Retry attempts of each stage in the last pipeline run",
+        [({"stage": s}, r.get("retry_attempts")) for s, r in steps.items()]
+    )
+    lines += family(
+        "pipeline_stage_timeouts", "gauge",
+        "Attempts of each stage that ran out of their time budget in the last pipeline run",
+        [({"stage": s}, r.get("timeouts")) for s, r in steps.items()]
+    )
+    lines += family(
+        "pipeline_stage_success", "gauge",
+        "1 if the stage succeeded in the last pipeline run",
+        [({"stage": s}, int(r.get("status") == "success")) for s, r in steps.items()]
+    )
+
+    if report and report.get("end_time"):
+        end = datetime.fromisoformat(report["end_time"])
+        if end.tzinfo is None:
+            end = end.replace(tzinfo=timezone.utc)
+        lines += family(
+            "pipeline_last_run_timestamp_seconds", "gauge",
+            "End time of the last pipeline run", [({}, end.timestamp())]
+        )
+        lines += family(
+            "pipeline_last_run_duration_seconds", "gauge",
+            "Total duration of the last pipeline run", [({}, report.get("total_duration_seconds"))]
+        )
+
+    quality = read_json(QUALITY_REPORT)
+    lines += family(
+        "data_quality_score", "gauge",
+        "Overall staging data quality score (0-100)",
+        [({}, (quality or {}).get("overall_quality_score"))]
+    )
+    return lines
+
+def collect_db_metrics():
+    lines = []
+    conn = get_conn()
+    cur = conn.cursor()
+
+    start = time.time()
+    cur.execute("SELECT 1;")
+    cur.fetchone()
+    response = time.time() - start
+    db_response_histogram.observe(response)
+
+    cur.execute("""
+        SELECT COALESCE(state, 'unknown'), COUNT(*)
+        FROM pg_stat_activity
+        GROUP BY 1;
+    """)
+    connections = cur.fetchall()
+
+    # Latest load per table from the loaders' by-product stats
+    cur.execute("""
+        SELECT DISTINCT ON (table_name)
+            table_name, rows_loaded,
+            EXTRACT(EPOCH FROM (CURRENT_TIMESTAMP - loaded_at))
+        FROM monitoring.load_stats
+        ORDER BY table_name, loaded_at DESC;
+    """)
+    loads = cur.fetchall()
+    cur.close()
+
+    lines += family("db_up", "gauge", "1 if the database answered", [({}, 1)])
+    lines += family(
+        "db_response_time_seconds_last", "gauge",
+        "Round trip time of SELECT 1 at the last collection", [({}, round(response, 6))]
+    )
+    lines += ["# HELP db_response_time_seconds Round trip time of SELECT 1",
+              "# TYPE db_response_time_seconds histogram"]
+    lines += db_response_histogram.samples("db_response_time_seconds")
+    lines += family(
+        "pg_stat_activity_connections", "gauge",
+        "Connections in pg_stat_activity by state",
+        [({"state": state}, count) for state, count in connections]
+    )
+    lines += family(
+        "pipeline_rows_loaded", "gauge",
+        "Rows written by the latest load of each table",
+        [({"table": t}, rows) for t, rows, _ in loads]
+    )
+    lines += family(
+        "pipeline_freshness_lag_seconds", "gauge",
+        "Seconds since each table was last loaded",
+        [({"table": t}, round(float(lag), 1)) for t, _, lag in loads]
+    )
+    return lines
+
+def collect():
+    start = time.time()
+    lines = collect_pipeline_metrics()
+
+    try:
+        lines += collect_db_metrics()
+    except Exception:
+        stats["collect_errors"] += 1
+        reset_conn()
+        lines += family("db_up", "gauge", "1 if the database answered", [({}, 0)])
+
+    collect_histogram.observe(time.time() - start)
+    lines += ["# HELP exporter_collect_duration_seconds Time spent collecting metrics",
+              "# TYPE exporter_collect_duration_seconds histogram"]
+    lines += collect_histogram.samples("exporter_collect_duration_seconds")
+    lines += family("exporter_collect_errors_total", "counter", "Failed DB collections", [({}, stats["collect_errors"])])
+    return lines
+
+# ---------- TTL CACHE ----------
+
+class MetricsCache:
+    """Serves the same payload for `ttl` seconds; one collection at a time."""
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self.lines = []
+        self.expires_at = 0.0
+        self.lock = threading.Lock()
+
+    def get(self):
+        with self.lock:
+            stats["scrapes"] += 1
+            if time.time() < self.expires_at:
+                stats["cache_hits"] += 1
+            else:
+                self.lines = collect()
+                self.expires_at = time.time() + self.ttl
+
+            lines = list(self.lines)
+
+        lines += family("exporter_scrapes_total", "counter", "Scrapes served", [({}, stats["scrapes"])])
+        lines += family("exporter_cache_hits_total", "counter", "Scrapes served from cache", [({}, stats["cache_hits"])])
+        return "\n".join(lines) + "\n"
+
+# ---------- HTTP ----------
+
+def make_handler(cache):
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+
+            body = cache.get().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return MetricsHandler
+
+# ---------- MAIN ----------
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Prometheus exporter for pipeline and database health")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--ttl", type=float, default=CACHE_TTL_SECONDS, help="Seconds to cache collected metrics")
+    parser.add_argument("--textfile", help="Write metrics once to this file (node_exporter textfile collector) and exit")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    cache = MetricsCache(args.ttl)
+
+    if args.textfile:
+        tmp_file = f"{args.textfile}.tmp"
+        with open(tmp_file, "w") as f:
+            f.write(cache.get())
+        os.replace(tmp_file, args.textfile)
+        reset_conn()
+        print(f"Metrics written to {args.textfile}")
+        return
+
+    server = ThreadingHTTPServer(("0.0.0.0", args.port), make_handler(cache))
+    print(f"Serving metrics on :{args.port}/metrics")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        reset_conn()
+
+if __name__ == "__main__":
+    main()
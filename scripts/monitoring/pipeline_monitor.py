@@ -1,6 +1,6 @@
-import psycopg2
 import json
 import os
+import sys
 from datetime import datetime, timezone
 import statistics
 import time
@@ -28,6 +28,7 @@ def hours_diff(ts):
     return (utc_now() - ts).total_seconds() / 3600
 
 def get_conn():
+    import psycopg2
     return psycopg2.connect(**DB_CONFIG)
 
 # ---------- CHECKS ----------
@@ -55,24 +56,67 @@ def check_last_execution():
         "threshold_hours": 25
     }
 
+# SQL and result evaluation are kept apart so the async engine
+# (async_monitor.py) can run the same checks over asyncpg.
+
+# Freshness and volume come from monitoring.load_stats / daily_counts, which
+# the loaders maintain as a by-product of each load. Both are index lookups
+# whose cost does not grow with the production or warehouse table sizes.
+FRESHNESS_SQL = """
+    SELECT
+        (
+            SELECT loaded_at FROM monitoring.load_stats
+            WHERE table_name = 'production.customers' AND rows_loaded > 0
+            ORDER BY loaded_at DESC LIMIT 1
+        ),
+        (
+            SELECT loaded_at FROM monitoring.load_stats
+            WHERE table_name = 'production.transactions' AND rows_loaded > 0
+            ORDER BY loaded_at DESC LIMIT 1
+        ),
+        (
+            SELECT MAX(max_business_date) FROM monitoring.load_stats
+            WHERE table_name = 'warehouse.fact_sales'
+        );
+"""
+
+VOLUME_SQL = """
+    SELECT stat_date, row_count
+    FROM monitoring.daily_counts
+    WHERE table_name = 'production.transactions'
+    ORDER BY stat_date DESC
+    LIMIT 30;
+"""
+
+ORPHAN_ITEMS_SQL = """
+    SELECT COUNT(*)
+    FROM production.transaction_items ti
+    LEFT JOIN production.transactions t
+    ON ti.transaction_key = t.transaction_key
+    WHERE t.transaction_key IS NULL;
+"""
+
+NULL_EMAILS_SQL = """
+    SELECT COUNT(*)
+    FROM production.customers
+    WHERE email IS NULL;
+"""
+
+CONNECTIONS_SQL = """
+    SELECT COUNT(*) FROM pg_stat_activity;
+"""
+
 def check_data_freshness(conn):
     cur = conn.cursor()
-
-    cur.execute("""
-        SELECT
-            (SELECT MAX(created_at) FROM production.customers),
-            (SELECT MAX(created_at) FROM production.transactions),
-            (
-                SELECT MAX(d.full_date)
-                FROM warehouse.fact_sales f
-                JOIN warehouse.dim_date d
-                ON f.date_key = d.date_key
-            );
-    """)
-
-    prod_ts, trans_ts, wh_date = cur.fetchone()
+    cur.execute(FRESHNESS_SQL)
+    row = cur.fetchone()
     cur.close()
 
+    return evaluate_freshness(row)
+
+def evaluate_freshness(row):
+    prod_ts, trans_ts, wh_date = row
+
     # convert DATE to datetime for comparison
     if wh_date:
         wh_ts = datetime.combine(wh_date, datetime.min.time(), tzinfo=timezone.utc)
@@ -103,16 +147,13 @@ def check_data_freshness(conn):
 
 def check_volume_anomalies(conn):
     cur = conn.cursor()
-    cur.execute("""
-        SELECT DATE(t.transaction_date), COUNT(*)
-        FROM production.transactions t
-        GROUP BY DATE(t.transaction_date)
-        ORDER BY DATE(t.transaction_date) DESC
-        LIMIT 30;
-    """)
+    cur.execute(VOLUME_SQL)
     rows = cur.fetchall()
     cur.close()
 
+    return evaluate_volume(rows)
+
+def evaluate_volume(rows):
     if len(rows) < 5:
         return {"status": "ok", "anomaly_detected": False}
 
@@ -134,24 +175,17 @@ def check_volume_anomalies(conn):
 def check_data_quality(conn):
     cur = conn.cursor()
 
-    cur.execute("""
-        SELECT COUNT(*)
-        FROM production.transaction_items ti
-        LEFT JOIN production.transactions t
-        ON ti.transaction_id = t.transaction_id
-        WHERE t.transaction_id IS NULL;
-    """)
+    cur.execute(ORPHAN_ITEMS_SQL)
     orphan_items = cur.fetchone()[0]
 
-    cur.execute("""
-        SELECT COUNT(*)
-        FROM production.customers
-        WHERE email IS NULL;
-    """)
+    cur.execute(NULL_EMAILS_SQL)
     nulls = cur.fetchone()[0]
 
     cur.close()
 
+    return evaluate_quality(orphan_items, nulls)
+
+def evaluate_quality(orphan_items, nulls):
     score = 100
     if orphan_items > 0:
         score -= 30
@@ -173,14 +207,15 @@ def check_db_health(conn):
     cur.execute("SELECT 1;")
     cur.fetchone()
 
-    cur.execute("""
-        SELECT COUNT(*) FROM pg_stat_activity;
-    """)
+    cur.execute(CONNECTIONS_SQL)
     connections = cur.fetchone()[0]
     cur.close()
 
     response_ms = (time.time() - start) * 1000
 
+    return evaluate_db_health(response_ms, connections)
+
+def evaluate_db_health(response_ms, connections):
     return {
         "status": "ok",
         "response_time_ms": round(response_ms, 2),
@@ -189,16 +224,9 @@ def check_db_health(conn):
 
 # ---------- MAIN ----------
 
-def main():
-    conn = get_conn()
+def build_report(last_exec, freshness, volume, quality, db):
     alerts = []
 
-    last_exec = check_last_execution()
-    freshness = check_data_freshness(conn)
-    volume = check_volume_anomalies(conn)
-    quality = check_data_quality(conn)
-    db = check_db_health(conn)
-
     if last_exec["status"] == "critical":
         alerts.append({
             "severity": "critical",
@@ -207,6 +235,14 @@ def main():
             "timestamp": utc_now().isoformat()
         })
 
+    if db["status"] == "critical":
+        alerts.append({
+            "severity": "critical",
+            "check": "database_connectivity",
+            "message": f"Database unreachable: {db.get('error_message')}",
+            "timestamp": utc_now().isoformat()
+        })
+
     if volume.get("anomaly_detected"):
         alerts.append({
             "severity": "warning",
@@ -215,6 +251,23 @@ def main():
             "timestamp": utc_now().isoformat()
         })
 
+    checks = {
+        "last_execution": last_exec,
+        "data_freshness": freshness,
+        "data_volume_anomalies": volume,
+        "data_quality": quality,
+        "database_connectivity": db
+    }
+
+    for name, result in checks.items():
+        if result["status"] in ("timeout", "error"):
+            alerts.append({
+                "severity": "warning",
+                "check": name,
+                "message": f"Check did not complete: {result.get('error_message', result['status'])}",
+                "timestamp": utc_now().isoformat()
+            })
+
     overall = "healthy"
     if alerts:
         overall = "critical" if any(a["severity"] == "critical" for a in alerts) else "degraded"
@@ -222,23 +275,34 @@ def main():
     report = {
         "monitoring_timestamp": utc_now().isoformat(),
         "pipeline_health": overall,
-        "checks": {
-            "last_execution": last_exec,
-            "data_freshness": freshness,
-            "data_volume_anomalies": volume,
-            "data_quality": quality,
-            "database_connectivity": db
-        },
+        "checks": checks,
         "alerts": alerts,
-        "overall_health_score": quality["quality_score"]
+        "overall_health_score": quality.get("quality_score")
     }
 
+    return report
+
+def write_report(report):
     os.makedirs("data/processed", exist_ok=True)
     with open(OUTPUT_FILE, "w") as f:
         json.dump(report, f, indent=4)
 
+def main():
+    conn = get_conn()
+
+    report = build_report(
+        check_last_execution(),
+        check_data_freshness(conn),
+        check_volume_anomalies(conn),
+        check_data_quality(conn),
+        check_db_health(conn)
+    )
+    write_report(report)
+
     conn.close()
     print("Monitoring report generated successfully")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from profiling import run_stage
+    run_stage("pipeline_monitoring", main, profile="--profile" in sys.argv)
@@ -1,39 +1,187 @@
+import os
 import time
 import json
 import logging
+import argparse
 from datetime import datetime
+import signal
 import subprocess
 import sys
 
+from stage_watchdog import StageWatchdog
+
 # ---------------- LOGGING SETUP ----------------
 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-log_file = f"logs/pipeline_orchestrator_{timestamp}.log"
-
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-    handlers=[
-        logging.FileHandler(log_file),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+
+def setup_logging():
+    os.makedirs("logs", exist_ok=True)
+    log_file = f"logs/pipeline_orchestrator_{timestamp}.log"
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(message)s",
+        handlers=[
+            logging.FileHandler(log_file),
+            logging.StreamHandler(sys.stdout)
+        ]
+    )
+
+# ---------------- RUN LOCK ----------------
+# outside logs/, which the retention policy purges by mtime: the lock file
+# is never written, so it would age out and be unlinked under a running holder
+LOCK_FILE = "data/processed/pipeline.lock"
+EXIT_LOCKED = 75   # EX_TEMPFAIL: try again later
+
+# An OS-level lock on LOCK_FILE, taken by every orchestrator run, so
+# a run started by scheduler.py, cron or by hand can never overlap another
+# one. A run that finds it held exits with EXIT_LOCKED. The OS releases it if
+# the holder dies, so there are no stale locks to clean up.
+class PipelineLock:
+    def __init__(self, path):
+        self.path = path
+        self.handle = None
+
+    def acquire(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.handle = open(self.path, "a+")
+        try:
+            if os.name == "nt":
+                import msvcrt
+                msvcrt.locking(self.handle.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(self.handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            self.handle.close()
+            self.handle = None
+            return False
+        return True
+
+    def release(self):
+        if self.handle is None:
+            return
+        if os.name == "nt":
+            import msvcrt
+            msvcrt.locking(self.handle.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(self.handle.fileno(), fcntl.LOCK_UN)
+        self.handle.close()
+        self.handle = None
+
+# ---------------- TIME BUDGETS ----------------
+# pipeline.timeout_seconds bounds every statement (statement_timeout, set on
+# the stage's connections through PGOPTIONS) and pipeline.stage_timeout_seconds
+# bounds every attempt of a stage; pipeline.stages overrides either per stage.
+# 0 turns a budget off.
+# A stage past its budget has its queries cancelled, then its process group
+# killed, and is retried like any other failure.
+WATCHDOG_POLL_SECONDS = 5
+KILL_GRACE_SECONDS = 30
+
+def load_pipeline_config():
+    import yaml
+    with open("config/config.yaml", "r") as f:
+        return yaml.safe_load(f)["pipeline"]
+
+def stage_budget(config, name):
+    overrides = (config.get("stages") or {}).get(name, {})
+    return {
+        "stage_timeout_seconds": overrides.get("stage_timeout_seconds", config.get("stage_timeout_seconds", 0)),
+        "statement_timeout_seconds": overrides.get("timeout_seconds", config.get("timeout_seconds", 0))
+    }
+
+def worst_case_seconds(budgets, retries):
+    # every attempt of every stage runs out its budget (plus the kill grace)
+    backoff = sum(2 ** (attempt - 1) for attempt in range(1, retries))
+    return sum(
+        retries * (b["stage_timeout_seconds"] + KILL_GRACE_SECONDS) + backoff
+        for b in budgets.values()
+    ) if all(b["stage_timeout_seconds"] for b in budgets.values()) else None
+
+def stage_environment(name, budget, execution_id):
+    env = dict(os.environ)
+    # libpq reads both, so every psycopg2 connection the stage opens carries them
+    env["PGAPPNAME"] = f"{execution_id}:{name}"
+    if budget["statement_timeout_seconds"]:
+        env["PGOPTIONS"] = (
+            f"{env.get('PGOPTIONS', '')} -c statement_timeout={int(budget['statement_timeout_seconds'] * 1000)}"
+        ).strip()
+    return env
+
+def kill_process_group(process):
+    # the stage runs in its own session, so this also reaches its children
+    # (e.g. the generator process of generate_to_staging.py)
+    try:
+        if os.name == "nt":
+            process.kill()
+        else:
+            os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+def run_attempt(name, command, budget, env, watchdog):
+    """Run the stage once; returns (returncode, timed_out)."""
+    process = subprocess.Popen(command, env=env, start_new_session=True)
+    stage_timeout = budget["stage_timeout_seconds"]
+    deadline = time.time() + stage_timeout if stage_timeout else None
+
+    try:
+        while True:
+            try:
+                return process.wait(timeout=WATCHDOG_POLL_SECONDS), False
+            except subprocess.TimeoutExpired:
+                pass
+
+            watchdog.inspect()
+            if deadline and time.time() >= deadline:
+                break
+
+        cancelled = watchdog.cancel_all()
+        logging.error(f"{name} exceeded its {stage_timeout}s budget, cancelled {cancelled} running statement(s)")
+        try:
+            # a cancelled stage normally rolls back and exits by itself
+            process.wait(timeout=KILL_GRACE_SECONDS)
+        except subprocess.TimeoutExpired:
+            logging.error(f"{name} still running {KILL_GRACE_SECONDS}s after cancellation, killing it")
+            kill_process_group(process)
+            process.wait()
+        return process.returncode, True
+
+    except BaseException:
+        kill_process_group(process)
+        raise
+
+    finally:
+        watchdog.terminate_all()
 
 # ---------------- HELPER FUNCTION ----------------
-def run_step(name, command, retries=3):
+def run_step(name, command, budget, execution_id, retries=3):
     logging.info(f"STARTING STEP: {name}")
     start = time.time()
+    env = stage_environment(name, budget, execution_id)
+    watchdog = StageWatchdog(execution_id, name, budget["statement_timeout_seconds"]).connect()
+    timeouts = 0
 
-    for attempt in range(1, retries + 1):
-        try:
-            subprocess.run(command, check=True)
-            duration = round(time.time() - start, 2)
-            logging.info(f"COMPLETED STEP: {name} in {duration}s")
-            return {
-                "status": "success",
-                "duration_seconds": duration,
-                "retry_attempts": attempt - 1
-            }
-        except Exception as e:
+    try:
+        for attempt in range(1, retries + 1):
+            returncode, timed_out = run_attempt(name, command, budget, env, watchdog)
+            if returncode == 0 and not timed_out:
+                duration = round(time.time() - start, 2)
+                logging.info(f"COMPLETED STEP: {name} in {duration}s")
+                return {
+                    "status": "success",
+                    "duration_seconds": duration,
+                    "retry_attempts": attempt - 1,
+                    "timeouts": timeouts,
+                    "slow_statements_logged": watchdog.events
+                }
+
+            timeouts += int(timed_out)
+            e = (
+                f"{name} exceeded its {budget['stage_timeout_seconds']}s stage budget" if timed_out
+                else subprocess.CalledProcessError(returncode, command)
+            )
             logging.error(f"{name} failed (attempt {attempt}): {e}")
             if attempt < retries:
                 wait = 2 ** (attempt - 1)
@@ -43,14 +191,48 @@ def run_step(name, command, retries=3):
                     "status": "failed",
                     "duration_seconds": round(time.time() - start, 2),
                     "retry_attempts": retries,
+                    "timeouts": timeouts,
+                    "slow_statements_logged": watchdog.events,
                     "error_message": str(e)
                 }
+    finally:
+        watchdog.close()
 
 # ---------------- PIPELINE ----------------
-def main():
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run the ecommerce data pipeline")
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Profile every stage and write .pstats/.collapsed files to logs/profiles/<execution_id>/"
+    )
+    parser.add_argument(
+        "--skip-generation",
+        action="store_true",
+        help="Ingest files that already landed in data/raw instead of generating new ones"
+    )
+    load_mode = parser.add_mutually_exclusive_group()
+    load_mode.add_argument(
+        "--direct-load",
+        action="store_true",
+        help="Stream generated data straight into staging (no data/raw files, so no raw archive)"
+    )
+    load_mode.add_argument(
+        "--single-pass",
+        action="store_true",
+        help="Cleanse data/raw straight into production, skipping staging and its quality checks"
+    )
+    return parser.parse_args()
+
+def run_pipeline(args):
+    execution_id = f"PIPE_{timestamp}"
+
+    # Child stages read this to group their profiles under the same run
+    os.environ["PIPELINE_EXECUTION_ID"] = execution_id
+
     pipeline_start = time.time()
     report = {
-        "pipeline_execution_id": f"PIPE_{timestamp}",
+        "pipeline_execution_id": execution_id,
         "start_time": datetime.utcnow().isoformat(),
         "steps_executed": {},
         "errors": [],
@@ -60,14 +242,46 @@ def main():
     steps = [
         ("data_generation", ["python", "scripts/data_generation/generate_data.py"]),
         ("data_ingestion", ["python", "scripts/ingestion/ingest_to_staging.py"]),
+        ("raw_archive", ["python", "scripts/ingestion/archive_raw.py"]),
         ("data_quality", ["python", "scripts/quality_checks/validate_data.py"]),
         ("staging_to_production", ["python", "scripts/transformation/staging_to_production.py"]),
+        ("anomaly_detection", ["python", "scripts/monitoring/anomaly_engine.py"]),
         ("warehouse_load", ["python", "scripts/transformation/load_warehouse.py"]),
+        ("warehouse_publish", ["python", "scripts/transformation/publish_warehouse.py"]),
         ("analytics_generation", ["python", "scripts/transformation/generate_analytics.py"])
     ]
 
+    if args.skip_generation:
+        steps = [(name, cmd) for name, cmd in steps if name != "data_generation"]
+    elif args.direct_load:
+        steps = [("data_generation_pipe", ["python", "scripts/ingestion/generate_to_staging.py"])] + [
+            (name, cmd) for name, cmd in steps
+            if name not in ("data_generation", "data_ingestion", "raw_archive")
+        ]
+
+    if args.single_pass:
+        steps = [
+            ("single_pass_ingest", ["python", "scripts/ingestion/ingest_to_production.py"])
+            if name == "data_ingestion" else (name, cmd)
+            for name, cmd in steps
+            if name not in ("data_quality", "staging_to_production")
+        ]
+
+    if args.profile:
+        steps = [(name, cmd + ["--profile"]) for name, cmd in steps]
+        report["profile_directory"] = f"logs/profiles/{execution_id}"
+
+    config = load_pipeline_config()
+    retries = config.get("retry_attempts", 3)
+    budgets = {name: stage_budget(config, name) for name, _ in steps}
+    report["time_budget"] = {
+        "stages": budgets,
+        "retry_attempts": retries,
+        "worst_case_seconds": worst_case_seconds(budgets, retries)
+    }
+
     for name, cmd in steps:
-        result = run_step(name, cmd)
+        result = run_step(name, cmd, budgets[name], execution_id, retries)
         report["steps_executed"][name] = result
 
         if result["status"] == "failed":
@@ -80,10 +294,29 @@ def main():
     report.setdefault("status", "success")
 
     # Save report
+    os.makedirs("data/processed", exist_ok=True)
     with open("data/processed/pipeline_execution_report.json", "w") as f:
         json.dump(report, f, indent=4)
 
     logging.info("PIPELINE EXECUTION FINISHED")
+    return report
+
+def main():
+    args = parse_args()
+    setup_logging()
+
+    lock = PipelineLock(LOCK_FILE)
+    if not lock.acquire():
+        logging.warning("Another pipeline run holds the run lock, exiting")
+        sys.exit(EXIT_LOCKED)
+
+    try:
+        report = run_pipeline(args)
+    finally:
+        lock.release()
+
+    if report["status"] == "failed":
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
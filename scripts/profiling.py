@@ -0,0 +1,93 @@
+import os
+import sys
+import time
+import cProfile
+import threading
+from collections import Counter
+from datetime import datetime
+
+PROFILE_ROOT = "logs/profiles"
+SAMPLE_INTERVAL_SECONDS = 0.005
+
+# --------------------------------------------------
+# Wall-clock stack sampler
+# --------------------------------------------------
+# Runs in a background thread and snapshots the main thread's Python stack
+# with sys._current_frames(). Because it samples wall-clock time, frames that
+# are blocked inside psycopg2 / pandas C calls (waiting on Postgres, disk I/O)
+# are counted too, which is what tells Python time apart from database time.
+class StackSampler(threading.Thread):
+    def __init__(self, target_thread_id, interval=SAMPLE_INTERVAL_SECONDS):
+        super().__init__(daemon=True)
+        self.target_thread_id = target_thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.target_thread_id)
+            if frame is None:
+                continue
+
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+
+            self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def write_collapsed(self, path):
+        # Brendan Gregg "collapsed stack" format, consumable by flamegraph.pl / speedscope
+        with open(path, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+# --------------------------------------------------
+# Stage wrapper
+# --------------------------------------------------
+def get_execution_id():
+    return os.environ.get(
+        "PIPELINE_EXECUTION_ID",
+        f"PIPE_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    )
+
+def profile_stage(stage_name, func, *args, **kwargs):
+    output_dir = os.path.join(PROFILE_ROOT, get_execution_id())
+    os.makedirs(output_dir, exist_ok=True)
+
+    profiler = cProfile.Profile()
+    sampler = StackSampler(threading.main_thread().ident)
+
+    start = time.time()
+    sampler.start()
+    profiler.enable()
+
+    try:
+        return func(*args, **kwargs)
+    finally:
+        profiler.disable()
+        sampler.stop()
+
+        pstats_file = os.path.join(output_dir, f"{stage_name}.pstats")
+        collapsed_file = os.path.join(output_dir, f"{stage_name}.collapsed")
+
+        profiler.dump_stats(pstats_file)
+        sampler.write_collapsed(collapsed_file)
+
+        print(
+            f"Profile for {stage_name} ({round(time.time() - start, 2)}s, "
+            f"{sum(sampler.stacks.values())} samples) written to {output_dir}"
+        )
+
+def run_stage(stage_name, func, *args, profile=False, **kwargs):
+    # Entry point of every stage script: `--profile` wraps the run in
+    # profile_stage, otherwise the stage runs as is
+    if profile:
+        return profile_stage(stage_name, func, *args, **kwargs)
+    return func(*args, **kwargs)
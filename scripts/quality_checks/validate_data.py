@@ -1,24 +1,15 @@
 import json
-import psycopg2
 from datetime import datetime, timezone
 import os
-import yaml
-
-# --------------------------------------------------
-# Load config
-# --------------------------------------------------
-with open("config/config.yaml", "r") as f:
-    config = yaml.safe_load(f)
-
-DB = config["database"]
+import sys
 
 OUTPUT_DIR = "data/quality"
-os.makedirs(OUTPUT_DIR, exist_ok=True)
 
 # --------------------------------------------------
 # Database connection (FINAL SAFE VERSION)
 # --------------------------------------------------
 def get_conn():
+    import psycopg2
     return psycopg2.connect(
         host=os.environ.get("DB_HOST", "localhost"),
         port=int(os.environ.get("DB_PORT", 5432)),
@@ -151,6 +142,7 @@ def run_quality_checks():
 
     conn.close()
 
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
     with open(f"{OUTPUT_DIR}/data_quality_report.json", "w") as f:
         json.dump(report, f, indent=4)
 
@@ -158,4 +150,6 @@ def run_quality_checks():
 
 # --------------------------------------------------
 if __name__ == "__main__":
-    run_quality_checks()
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from profiling import run_stage
+    run_stage("data_quality", run_quality_checks, profile="--profile" in sys.argv)
@@ -1,32 +1,157 @@
-import schedule
+import os
+import json
 import time
-import subprocess
 import logging
-import os
+import argparse
+import subprocess
+from datetime import datetime, timedelta
 
-os.makedirs("logs", exist_ok=True)
+from pipeline_orchestrator import EXIT_LOCKED
 
-logging.basicConfig(
-    filename="logs/scheduler_activity.log",
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s"
-)
+PIPELINE_REPORT = "data/processed/pipeline_execution_report.json"
+ORCHESTRATOR = ["python", "scripts/pipeline_orchestrator.py"]
+WATCHED_SUFFIXES = (".csv", ".csv.gz", ".csv.zst")
+RETRY_BACKOFF_SECONDS = 300
 
-def run_pipeline():
+def load_scheduler_config():
+    import yaml
+    with open("config/config.yaml", "r") as f:
+        return yaml.safe_load(f)["scheduler"]
+
+def setup_logging():
+    os.makedirs("logs", exist_ok=True)
+    logging.basicConfig(
+        filename="logs/scheduler_activity.log",
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(message)s"
+    )
+    # APScheduler logs every job execution at INFO; with frequent polls that drowns the log
+    logging.getLogger("apscheduler").setLevel(logging.WARNING)
+
+# ---------------- PIPELINE RUN ----------------
+def run_pipeline(extra_args=()):
+    # The orchestrator takes the run lock itself and reports through its exit
+    # status: 0 success, EXIT_LOCKED another run in progress, anything else failed
     logging.info("Scheduled pipeline started")
     try:
-        subprocess.run(
-            ["python", "scripts/pipeline_orchestrator.py"],
-            check=True
-        )
-        logging.info("Pipeline finished successfully")
+        result = subprocess.run(ORCHESTRATOR + list(extra_args))
     except Exception as e:
         logging.error(f"Pipeline failed: {e}")
+        return False
+
+    if result.returncode == 0:
+        logging.info("Pipeline finished successfully")
+        return True
+    if result.returncode == EXIT_LOCKED:
+        logging.warning("Previous pipeline run still in progress, trigger skipped")
+    else:
+        logging.error(f"Pipeline failed with exit status {result.returncode}")
+    return False
+
+def last_run_time():
+    try:
+        with open(PIPELINE_REPORT) as f:
+            return datetime.fromisoformat(json.load(f)["end_time"])
+    except Exception:
+        return None
+
+# ---------------- FILE ARRIVAL ----------------
+class RawFileWatcher:
+    """Triggers a run once new raw files have landed and stopped changing.
+
+    One os.scandir of a single directory per poll; the archive stage moves
+    ingested files away, so the directory only ever holds unprocessed input.
+    """
+
+    def __init__(self, directory, settle_seconds):
+        self.directory = directory
+        self.settle_seconds = settle_seconds
+        self.previous = {}
+        self.processed = {}
+        self.changed_at = time.time()
+        self.retry_after = 0
 
-schedule.every().day.at("10:00").do(run_pipeline)
+    def snapshot(self):
+        if not os.path.exists(self.directory):
+            return {}
+        return {
+            entry.name: (entry.stat().st_size, entry.stat().st_mtime)
+            for entry in os.scandir(self.directory)
+            if entry.is_file() and entry.name.endswith(WATCHED_SUFFIXES)
+        }
 
-logging.info("Scheduler is running")
+    def poll(self):
+        current = self.snapshot()
+
+        if current != self.previous:
+            self.previous = current
+            self.changed_at = time.time()
+            return
+
+        if not current or current == self.processed:
+            return
+        if time.time() - self.changed_at < self.settle_seconds or time.time() < self.retry_after:
+            return
+
+        landed_at = min(mtime for _, mtime in current.values())
+        logging.info(f"New raw files detected: {sorted(current)}")
+
+        if run_pipeline(["--skip-generation"]):
+            self.processed = current
+            logging.info(f"File landing to warehouse latency: {round(time.time() - landed_at, 1)}s")
+        else:
+            # same files are retried, but not on every poll
+            self.retry_after = time.time() + RETRY_BACKOFF_SECONDS
+
+# ---------------- MAIN ----------------
+def parse_args():
+    parser = argparse.ArgumentParser(description="Schedule pipeline runs")
+    parser.add_argument("--mode", choices=["interval", "daily", "file_arrival"])
+    parser.add_argument("--interval-minutes", type=float)
+    return parser.parse_args()
+
+def main():
+    from apscheduler.schedulers.blocking import BlockingScheduler
+
+    args = parse_args()
+    setup_logging()
+
+    config = load_scheduler_config()
+    mode = args.mode or config["mode"]
+    interval_minutes = args.interval_minutes or config["interval_minutes"]
+
+    # coalesce: a backlog of missed triggers collapses into a single run
+    # max_instances: the scheduler itself never starts a second concurrent run
+    scheduler = BlockingScheduler(job_defaults={
+        "coalesce": True,
+        "max_instances": 1,
+        "misfire_grace_time": config["misfire_grace_seconds"]
+    })
+
+    # Catch up once at startup if the last run is older than one period
+    last_run = last_run_time()
+
+    if mode == "interval":
+        job_options = {}
+        if last_run is None or datetime.utcnow() - last_run > timedelta(minutes=interval_minutes):
+            job_options["next_run_time"] = datetime.now()
+        scheduler.add_job(run_pipeline, "interval", minutes=interval_minutes, **job_options)
+    elif mode == "daily":
+        hour, minute = config["daily_at"].split(":")
+        scheduler.add_job(run_pipeline, "cron", hour=int(hour), minute=int(minute))
+        if last_run is None or datetime.utcnow() - last_run > timedelta(days=1):
+            scheduler.add_job(run_pipeline, next_run_time=datetime.now())
+    else:
+        watcher = RawFileWatcher(config["watch_directory"], config["settle_seconds"])
+        scheduler.add_job(watcher.poll, "interval", seconds=config["poll_seconds"])
+
+    logging.info(f"Scheduler started in {mode} mode")
+    print(f"Scheduler running in {mode} mode (Ctrl+C to stop)")
+
+    try:
+        scheduler.start()
+    except (KeyboardInterrupt, SystemExit):
+        logging.info("Scheduler stopped")
 
-while True:
-    schedule.run_pending()
-    time.sleep(60)
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+import os
+import re
+import json
+import logging
+from datetime import datetime
+
+SLOW_QUERY_ROOT = "logs/slow_queries"
+EXPLAIN_AFTER_FRACTION = 0.8
+EXPLAIN_TIMEOUT_MS = 5000
+EXPLAINABLE = ("select", "insert", "update", "delete", "with")
+
+def get_conn():
+    import psycopg2
+    return psycopg2.connect(
+        host=os.environ.get("DB_HOST", "postgres"),
+        port=int(os.environ.get("DB_PORT", 5432)),
+        dbname=os.environ.get("DB_NAME", "ecommerce_db"),
+        user=os.environ.get("DB_USER", "admin"),
+        password=os.environ.get("DB_PASSWORD", "password"),
+        application_name="pipeline_watchdog"
+    )
+
+# --------------------------------------------------
+# Stage watchdog
+# --------------------------------------------------
+# The orchestrator starts every stage with PGAPPNAME=<execution_id>:<stage>,
+# so all of the stage's Postgres sessions can be found in pg_stat_activity
+# without the stage cooperating. Polled between waits on the stage process:
+#   inspect()        statements past EXPLAIN_AFTER_FRACTION of the statement
+#                    budget are logged with their plan, before
+#                    statement_timeout cancels them
+#   cancel_all()     stage budget exhausted: log and pg_cancel_backend every
+#                    running statement, so the stage can roll back and exit
+#   terminate_all()  after the process is gone, drop sessions it left behind
+# Without a database connection the watchdog does nothing and the stage is
+# still bounded by statement_timeout and the process kill.
+class StageWatchdog:
+    def __init__(self, execution_id, stage, statement_timeout):
+        self.stage = stage
+        self.application_name = f"{execution_id}:{stage}"
+        self.statement_timeout = statement_timeout
+        self.log_file = os.path.join(SLOW_QUERY_ROOT, f"{execution_id}.jsonl")
+        self.logged = set()
+        self.events = 0
+        self.conn = None
+
+    def connect(self):
+        try:
+            self.conn = get_conn()
+            self.conn.autocommit = True
+            self.conn.cursor().execute(f"SET statement_timeout = {EXPLAIN_TIMEOUT_MS}")
+        except Exception as e:
+            self.conn = None
+            logging.warning(f"Stage watchdog for {self.stage} disabled, no database connection: {e}")
+        return self
+
+    def close(self):
+        if self.conn:
+            self.conn.close()
+            self.conn = None
+
+    def active_statements(self):
+        cur = self.conn.cursor()
+        cur.execute("""
+            SELECT pid, query_start, EXTRACT(EPOCH FROM now() - query_start), query
+            FROM pg_stat_activity
+            WHERE application_name = %s AND state = 'active' AND pid <> pg_backend_pid()
+        """, (self.application_name,))
+        return cur.fetchall()
+
+    def inspect(self):
+        if not self.conn or not self.statement_timeout:
+            return
+        try:
+            for pid, started, elapsed, query in self.active_statements():
+                if elapsed >= self.statement_timeout * EXPLAIN_AFTER_FRACTION:
+                    self.log_statement(pid, started, elapsed, query, "near_statement_timeout")
+        except Exception as e:
+            logging.warning(f"Stage watchdog for {self.stage} could not inspect sessions: {e}")
+
+    def cancel_all(self):
+        if not self.conn:
+            return 0
+        cancelled = 0
+        try:
+            cur = self.conn.cursor()
+            for pid, started, elapsed, query in self.active_statements():
+                self.log_statement(pid, started, elapsed, query, "stage_timeout")
+                cur.execute("SELECT pg_cancel_backend(%s)", (pid,))
+                cancelled += int(cur.fetchone()[0])
+        except Exception as e:
+            logging.warning(f"Stage watchdog for {self.stage} could not cancel statements: {e}")
+        return cancelled
+
+    def terminate_all(self):
+        if not self.conn:
+            return 0
+        try:
+            cur = self.conn.cursor()
+            cur.execute("""
+                SELECT COUNT(*) FILTER (WHERE pg_terminate_backend(pid))
+                FROM pg_stat_activity
+                WHERE application_name = %s AND pid <> pg_backend_pid()
+            """, (self.application_name,))
+            return cur.fetchone()[0]
+        except Exception as e:
+            logging.warning(f"Stage watchdog for {self.stage} could not terminate sessions: {e}")
+            return 0
+
+    # --------------------------------------------------
+    # Slow statement log (one JSON object per line)
+    # --------------------------------------------------
+    def explain(self, query):
+        # a server-side cursor shows up as DECLARE ... CURSOR ... FOR <query>
+        query = re.sub(r"^\s*DECLARE\s.*?\bCURSOR\b.*?\bFOR\s", "", query, count=1, flags=re.I | re.S)
+        if not query.lstrip().lower().startswith(EXPLAINABLE):
+            return None
+        try:
+            cur = self.conn.cursor()
+            cur.execute("EXPLAIN " + query)
+            return "\n".join(row[0] for row in cur.fetchall())
+        except Exception as e:
+            # pg_stat_activity truncates long queries (track_activity_query_size)
+            return f"EXPLAIN failed: {str(e).strip()}"
+
+    def log_statement(self, pid, started, elapsed, query, reason):
+        if (pid, started) in self.logged:
+            return
+        self.logged.add((pid, started))
+        self.events += 1
+
+        event = {
+            "logged_at": datetime.utcnow().isoformat(),
+            "stage": self.stage,
+            "reason": reason,
+            "pid": pid,
+            "elapsed_seconds": round(float(elapsed), 2),
+            "statement_timeout_seconds": self.statement_timeout,
+            "query": query,
+            "plan": self.explain(query)
+        }
+        os.makedirs(SLOW_QUERY_ROOT, exist_ok=True)
+        with open(self.log_file, "a") as f:
+            f.write(json.dumps(event) + "\n")
+
+        logging.warning(
+            f"{self.stage}: statement on pid {pid} running {event['elapsed_seconds']}s ({reason}), "
+            f"plan logged to {self.log_file}"
+        )
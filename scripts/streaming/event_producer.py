@@ -0,0 +1,186 @@
+import os
+import sys
+import csv
+import json
+import time
+import random
+import argparse
+from datetime import datetime
+
+# open_raw / resolve_raw_file also read the compressed archive copies
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ingestion"))
+from archive_raw import RAW_DATA_PATH, latest_archive, open_raw, resolve_raw_file
+
+# --------------------------------------------------
+# Local order-event producer
+#
+# Appends one JSON line per order (transaction + its items) to rolling
+# segment files. Every event carries event_time so the consumer can measure
+# end-to-end latency.
+# --------------------------------------------------
+PAYMENT_METHODS = ["Credit Card", "Debit Card", "UPI", "Cash on Delivery", "Net Banking"]
+ADDRESS_POOL_SIZE = 200
+
+def load_streaming_config():
+    import yaml
+    with open("config/config.yaml", "r") as f:
+        return yaml.safe_load(f)["streaming"]
+
+REFERENCE_FILES = ["customers.csv", "products.csv"]
+
+def reference_directory(directory=None):
+    """directory if given, else data/raw, else the newest archived batch.
+
+    raw_archive moves the files out of data/raw after every batch run, so
+    between runs they are only in the archive.
+    """
+    if directory:
+        return directory
+    if all(resolve_raw_file(RAW_DATA_PATH, name) for name in REFERENCE_FILES):
+        return RAW_DATA_PATH
+    return latest_archive(REFERENCE_FILES) or RAW_DATA_PATH
+
+def load_reference_data(directory):
+    """Customer ids and product prices from the batch generator's output."""
+    customers_file = resolve_raw_file(directory, "customers.csv")
+    products_file = resolve_raw_file(directory, "products.csv")
+    if customers_file is None or products_file is None:
+        raise FileNotFoundError(
+            f"customers.csv / products.csv not found in {directory} or the raw archive; "
+            "run scripts/data_generation/generate_data.py first"
+        )
+
+    with open_raw(customers_file) as f:
+        customer_ids = [row["customer_id"] for row in csv.DictReader(f)]
+    with open_raw(products_file) as f:
+        product_prices = {row["product_id"]: float(row["price"]) for row in csv.DictReader(f)}
+
+    return customer_ids, product_prices
+
+# --------------------------------------------------
+# Segments
+# --------------------------------------------------
+class SegmentWriter:
+    def __init__(self, directory, max_events, max_seconds):
+        self.directory = directory
+        self.max_events = max_events
+        self.max_seconds = max_seconds
+        self.handle = None
+        os.makedirs(directory, exist_ok=True)
+
+    def _roll(self):
+        if self.handle:
+            self.handle.close()
+        name = f"events_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.jsonl"
+        self.handle = open(os.path.join(self.directory, name), "a", encoding="utf-8")
+        self.events = 0
+        self.opened_at = time.time()
+
+    def write(self, event):
+        if (
+            self.handle is None
+            or self.events >= self.max_events
+            or time.time() - self.opened_at >= self.max_seconds
+        ):
+            self._roll()
+
+        # one write + flush per event: the consumer only ever reads whole lines
+        self.handle.write(json.dumps(event, separators=(",", ":")) + "\n")
+        self.handle.flush()
+        self.events += 1
+
+    def close(self):
+        if self.handle:
+            self.handle.close()
+
+# --------------------------------------------------
+# Events
+# --------------------------------------------------
+def make_event(seq, run_id, customer_ids, product_ids, product_prices, addresses):
+    now = datetime.now()
+    txn_id = f"TXS{run_id}{seq:06d}"
+    items = []
+    total = 0.0
+
+    for n in range(random.randint(1, 5)):
+        product_id = random.choice(product_ids)
+        quantity = random.randint(1, 5)
+        discount = random.choice([0, 5, 10, 15])
+        unit_price = product_prices[product_id]
+        line_total = round(quantity * unit_price * (1 - discount / 100), 2)
+        total += line_total
+
+        items.append({
+            "item_id": f"ITS{run_id}{seq:06d}{n}",
+            "transaction_id": txn_id,
+            "product_id": product_id,
+            "quantity": quantity,
+            "unit_price": unit_price,
+            "discount_percentage": discount,
+            "line_total": line_total
+        })
+
+    return {
+        "event_id": txn_id,
+        "event_time": time.time(),
+        "transaction": {
+            "transaction_id": txn_id,
+            "customer_id": random.choice(customer_ids),
+            "transaction_date": now.strftime("%Y-%m-%d"),
+            "transaction_time": now.strftime("%H:%M:%S"),
+            "payment_method": random.choice(PAYMENT_METHODS),
+            "shipping_address": random.choice(addresses),
+            "total_amount": round(total, 2)
+        },
+        "items": items
+    }
+
+def produce(rate, duration, reference_dir):
+    from faker import Faker
+
+    config = load_streaming_config()
+    customer_ids, product_prices = load_reference_data(reference_directory(reference_dir))
+    product_ids = list(product_prices)
+
+    # Faker is far too slow to call per event at high rates; draw from a pool
+    fake = Faker()
+    addresses = [fake.address().replace("\n", ", ") for _ in range(ADDRESS_POOL_SIZE)]
+
+    # 9 digits of epoch seconds keeps ids within VARCHAR(20) and unique per run
+    run_id = f"{int(time.time()) % 10**9:09d}"
+    writer = SegmentWriter(
+        config["segment_directory"], config["segment_max_events"], config["segment_max_seconds"]
+    )
+
+    start = time.time()
+    seq = 0
+    try:
+        while duration is None or time.time() - start < duration:
+            writer.write(make_event(seq, run_id, customer_ids, product_ids, product_prices, addresses))
+            seq += 1
+
+            # pace to the target rate
+            ahead = seq / rate - (time.time() - start)
+            if ahead > 0:
+                time.sleep(ahead)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        writer.close()
+
+    elapsed = time.time() - start
+    print(f"Produced {seq} events in {round(elapsed, 1)}s ({round(seq / elapsed, 1)} events/s)")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Append order events to rolling JSONL segments")
+    parser.add_argument("--rate", type=float, default=100, help="Target events per second")
+    parser.add_argument("--duration", type=float, help="Seconds to run (default: until Ctrl+C)")
+    parser.add_argument(
+        "--reference-dir",
+        help="Where customers.csv/products.csv live (default: data/raw, else the newest archived batch)"
+    )
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    produce(args.rate, args.duration, args.reference_dir)
@@ -0,0 +1,299 @@
+import io
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+from collections import deque
+from datetime import datetime, timezone
+
+# Same incremental transforms as the batch staging_to_production stage
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "transformation"))
+from staging_to_production import (
+    get_conn,
+    get_execution_id,
+    load_transactions,
+    load_transaction_items,
+    record_load_stats,
+    STREAM_TRANSACTIONS,
+    STREAM_TRANSACTION_ITEMS,
+)
+
+# --------------------------------------------------
+# Micro-batch consumer
+#
+# Tails the producer's JSONL segments, COPYs each micro-batch into temp
+# tables, runs the production transforms on it, appends it to
+# staging.stream_* and commits. Segment offsets are checkpointed only after
+# the commit; a crash replays the last batch, which the LEFT JOIN dedup in
+# the transforms turns into a no-op.
+#
+# staging.stream_* keeps every event until retention removes it: the batch
+# reload (TRUNCATE production.customers CASCADE) empties production and
+# re-reads them (staging_to_production.reload_streamed_events), so streamed
+# events survive until load_warehouse has copied them into fact_sales.
+# --------------------------------------------------
+STAGE_NAME = "stream_ingest"
+REPORT_FILE = "data/processed/stream_ingest_report.json"
+REPORT_INTERVAL_SECONDS = 5
+LATENCY_WINDOW = 100000
+
+TRANSACTION_COLUMNS = [
+    "transaction_id", "customer_id", "transaction_date", "transaction_time",
+    "payment_method", "shipping_address", "total_amount"
+]
+ITEM_COLUMNS = [
+    "item_id", "transaction_id", "product_id", "quantity",
+    "unit_price", "discount_percentage", "line_total"
+]
+
+def load_streaming_config():
+    import yaml
+    with open("config/config.yaml", "r") as f:
+        return yaml.safe_load(f)["streaming"]
+
+# --------------------------------------------------
+# Segment tailing
+# --------------------------------------------------
+class SegmentTailer:
+    def __init__(self, directory, checkpoint_file):
+        self.directory = directory
+        self.checkpoint_file = checkpoint_file
+        self.offsets = {}
+        self.pending = {}
+
+        if os.path.exists(checkpoint_file):
+            with open(checkpoint_file) as f:
+                self.offsets = json.load(f)
+
+    def read(self, max_events):
+        """Return up to max_events complete lines not yet committed."""
+        events = []
+        self.pending = dict(self.offsets)
+
+        if not os.path.exists(self.directory):
+            return events
+
+        for entry in sorted(os.scandir(self.directory), key=lambda e: e.name):
+            if not entry.name.endswith(".jsonl"):
+                continue
+
+            offset = self.pending.get(entry.name, 0)
+            if entry.stat().st_size <= offset:
+                continue
+
+            with open(entry.path, "rb") as f:
+                f.seek(offset)
+                for line in f:
+                    # a line without "\n" is still being written by the producer
+                    if not line.endswith(b"\n"):
+                        break
+                    events.append(json.loads(line))
+                    offset += len(line)
+                    if len(events) >= max_events:
+                        break
+
+            self.pending[entry.name] = offset
+            if len(events) >= max_events:
+                break
+
+        return events
+
+    def commit(self):
+        # forget segments that retention has already removed
+        self.offsets = {
+            name: offset for name, offset in self.pending.items()
+            if os.path.exists(os.path.join(self.directory, name))
+        }
+        os.makedirs(os.path.dirname(self.checkpoint_file), exist_ok=True)
+        tmp_file = f"{self.checkpoint_file}.tmp"
+        with open(tmp_file, "w") as f:
+            json.dump(self.offsets, f)
+        os.replace(tmp_file, self.checkpoint_file)
+
+# --------------------------------------------------
+# Micro-batch load
+# --------------------------------------------------
+def to_csv_buffer(rows, columns):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([row[c] for c in columns])
+    buffer.seek(0)
+    return buffer
+
+# temp table -> durable staging table it is appended to
+BATCH_TABLES = {
+    "stream_batch_transactions": STREAM_TRANSACTIONS,
+    "stream_batch_transaction_items": STREAM_TRANSACTION_ITEMS
+}
+
+def create_batch_tables(conn):
+    """Per-connection temp tables holding only the current micro-batch."""
+    cur = conn.cursor()
+    for temp_table, table in BATCH_TABLES.items():
+        cur.execute(f"""
+            CREATE TEMP TABLE IF NOT EXISTS {temp_table}
+            (LIKE {table} INCLUDING DEFAULTS) ON COMMIT DELETE ROWS
+        """)
+    conn.commit()
+    cur.close()
+
+def load_batch(conn, events):
+    transactions = [e["transaction"] for e in events]
+    items = [item for e in events for item in e["items"]]
+
+    cur = conn.cursor()
+    try:
+        cur.copy_expert(
+            f"COPY stream_batch_transactions ({', '.join(TRANSACTION_COLUMNS)}) FROM STDIN WITH CSV",
+            to_csv_buffer(transactions, TRANSACTION_COLUMNS)
+        )
+        cur.copy_expert(
+            f"COPY stream_batch_transaction_items ({', '.join(ITEM_COLUMNS)}) FROM STDIN WITH CSV",
+            to_csv_buffer(items, ITEM_COLUMNS)
+        )
+
+        txn_inserted, max_date = load_transactions(cur, "stream_batch_transactions")
+        items_inserted = load_transaction_items(cur, "stream_batch_transaction_items")
+
+        # kept for the next batch reload, in the same transaction as production
+        for temp_table, table in BATCH_TABLES.items():
+            cur.execute(f"INSERT INTO {table} SELECT * FROM {temp_table}")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+
+    return txn_inserted, items_inserted, max_date
+
+# --------------------------------------------------
+# Metrics
+# --------------------------------------------------
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return round(sorted_values[index] * 1000, 2)
+
+def write_report(stats, latencies):
+    ordered = sorted(latencies)
+    busy = stats["busy_seconds"]
+    elapsed = time.time() - stats["started_at"]
+
+    report = {
+        "report_timestamp": datetime.now(timezone.utc).isoformat(),
+        "events_ingested": stats["events"],
+        "transactions_inserted": stats["transactions"],
+        "items_inserted": stats["items"],
+        "batches": stats["batches"],
+        "avg_batch_size": round(stats["events"] / stats["batches"], 1) if stats["batches"] else 0,
+        "elapsed_seconds": round(elapsed, 2),
+        "events_per_second": round(stats["events"] / elapsed, 2) if elapsed else None,
+        # throughput while actually loading = capacity ceiling of this consumer
+        "events_per_busy_second": round(stats["events"] / busy, 2) if busy else None,
+        "end_to_end_latency_ms": {
+            "p50": percentile(ordered, 50),
+            "p95": percentile(ordered, 95),
+            "p99": percentile(ordered, 99),
+            "max": percentile(ordered, 100)
+        }
+    }
+
+    os.makedirs(os.path.dirname(REPORT_FILE), exist_ok=True)
+    with open(REPORT_FILE, "w") as f:
+        json.dump(report, f, indent=4)
+    return report
+
+# --------------------------------------------------
+# Main loop
+# --------------------------------------------------
+def run(max_idle_seconds=None):
+    config = load_streaming_config()
+    tailer = SegmentTailer(config["segment_directory"], config["checkpoint_file"])
+    poll_seconds = config["poll_interval_ms"] / 1000
+    execution_id = get_execution_id()
+
+    conn = get_conn()
+    conn.autocommit = False
+    create_batch_tables(conn)
+
+    stats = {"events": 0, "transactions": 0, "items": 0, "batches": 0,
+             "busy_seconds": 0.0, "started_at": time.time()}
+    latencies = deque(maxlen=LATENCY_WINDOW)
+    unrecorded = {"transactions": 0, "items": 0, "max_date": None}
+    last_stats_at = last_report_at = last_event_at = time.time()
+
+    try:
+        while True:
+            events = tailer.read(config["batch_max_events"])
+
+            if not events:
+                if max_idle_seconds is not None and time.time() - last_event_at > max_idle_seconds:
+                    break
+                time.sleep(poll_seconds)
+                continue
+
+            start = time.time()
+            txn_inserted, items_inserted, max_date = load_batch(conn, events)
+            committed_at = time.time()
+            tailer.commit()
+
+            stats["busy_seconds"] += committed_at - start
+            stats["batches"] += 1
+            stats["events"] += len(events)
+            stats["transactions"] += txn_inserted
+            stats["items"] += items_inserted
+            latencies.extend(committed_at - e["event_time"] for e in events)
+            last_event_at = committed_at
+
+            unrecorded["transactions"] += txn_inserted
+            unrecorded["items"] += items_inserted
+            if max_date and (unrecorded["max_date"] is None or max_date > unrecorded["max_date"]):
+                unrecorded["max_date"] = max_date
+
+            # load_stats once per interval rather than once per micro-batch
+            if committed_at - last_stats_at >= config["load_stats_interval_seconds"]:
+                flush_load_stats(conn, execution_id, unrecorded)
+                last_stats_at = committed_at
+
+            if committed_at - last_report_at >= REPORT_INTERVAL_SECONDS:
+                write_report(stats, latencies)
+                last_report_at = committed_at
+    except KeyboardInterrupt:
+        pass
+    finally:
+        flush_load_stats(conn, execution_id, unrecorded)
+        conn.close()
+
+    report = write_report(stats, latencies)
+    print(
+        f"Streamed {report['events_ingested']} events in {report['batches']} batches, "
+        f"{report['events_per_second']} events/s, p95 latency {report['end_to_end_latency_ms']['p95']} ms"
+    )
+
+def flush_load_stats(conn, execution_id, unrecorded):
+    if not unrecorded["transactions"] and not unrecorded["items"]:
+        return
+
+    cur = conn.cursor()
+    record_load_stats(cur, execution_id, "production.transactions",
+                      unrecorded["transactions"], unrecorded["max_date"], stage=STAGE_NAME)
+    record_load_stats(cur, execution_id, "production.transaction_items",
+                      unrecorded["items"], stage=STAGE_NAME)
+    conn.commit()
+    cur.close()
+
+    unrecorded.update({"transactions": 0, "items": 0, "max_date": None})
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Tail event segments and load micro-batches into production")
+    parser.add_argument("--max-idle-seconds", type=float, help="Exit after this long without new events")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    run(args.max_idle_seconds)
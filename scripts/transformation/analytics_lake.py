@@ -0,0 +1,247 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+
+# --------------------------------------------------
+# Parquet analytics lake + embedded DuckDB engine
+#
+# The warehouse tables are exported once per run to Parquet (fact_sales
+# hive-partitioned by month) and exposed as warehouse.* views in DuckDB, so
+# generate_analytics.QUERIES and ad-hoc/BI queries run unchanged without
+# scanning Postgres. data/lake/analytics.duckdb holds the same views for
+# BI tools and notebooks.
+# --------------------------------------------------
+LAKE_DIR = "data/lake/warehouse"
+LAKE_DATABASE = "data/lake/analytics.duckdb"
+LAKE_BATCH_SIZE = 50000
+
+# table -> (source SQL, partition column or None)
+LAKE_TABLES = {
+    "fact_sales": ("SELECT fs.*, fs.date_key / 100 AS sale_month FROM warehouse.fact_sales fs", "sale_month"),
+    "dim_date": ("SELECT * FROM warehouse.dim_date", None),
+    "dim_customers": ("SELECT * FROM warehouse.dim_customers", None),
+    "dim_products": ("SELECT * FROM warehouse.dim_products", None),
+    "dim_payment_method": ("SELECT * FROM warehouse.dim_payment_method", None),
+    "customer_lifetime": ("SELECT * FROM warehouse.customer_lifetime", None)
+}
+
+def get_conn():
+    import psycopg2
+    return psycopg2.connect(
+        host=os.environ.get("DB_HOST", "postgres"),
+        port=int(os.environ.get("DB_PORT", 5432)),
+        dbname=os.environ.get("DB_NAME", "ecommerce_db"),
+        user=os.environ.get("DB_USER", "admin"),
+        password=os.environ.get("DB_PASSWORD", "password")
+    )
+
+def import_pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("The analytics lake requires pyarrow (pip install pyarrow)")
+    return pa, pq
+
+def import_duckdb():
+    try:
+        import duckdb
+    except ImportError:
+        raise RuntimeError("The DuckDB engine requires duckdb (pip install duckdb)")
+    return duckdb
+
+# --------------------------------------------------
+# Export
+# --------------------------------------------------
+def arrow_schema(description):
+    """Arrow schema from cursor.description, so every batch has the same types."""
+    pa, _ = import_pyarrow()
+    types = {
+        16: pa.bool_(),
+        20: pa.int64(),
+        21: pa.int16(),
+        23: pa.int32(),
+        700: pa.float32(),
+        701: pa.float64(),
+        1082: pa.date32(),
+        1114: pa.timestamp("us"),
+        1184: pa.timestamp("us", tz="UTC")
+    }
+
+    fields = []
+    for column in description:
+        if column.type_code == 1700:
+            # NUMERIC keeps its declared precision, so sums match Postgres exactly
+            precision = column.precision if column.precision and column.precision <= 38 else 38
+            scale = column.scale if column.scale is not None and column.scale >= 0 else 10
+            fields.append(pa.field(column.name, pa.decimal128(precision, scale)))
+        else:
+            fields.append(pa.field(column.name, types.get(column.type_code, pa.string())))
+    return pa.schema(fields)
+
+def export_table(conn, sql, target_dir, partition_column):
+    pa, pq = import_pyarrow()
+    os.makedirs(target_dir, exist_ok=True)
+
+    rows = 0
+    writers = {}
+    schema = None
+
+    with conn.cursor(name=f"lake_{os.path.basename(target_dir)}") as cur:
+        cur.itersize = LAKE_BATCH_SIZE
+        cur.execute(sql)
+
+        try:
+            while True:
+                batch = cur.fetchmany(LAKE_BATCH_SIZE)
+                if schema is None:
+                    schema = arrow_schema(cur.description)
+                if not batch:
+                    break
+
+                table = pa.Table.from_pylist(
+                    [dict(zip(schema.names, row)) for row in batch], schema=schema
+                )
+
+                if partition_column is None:
+                    groups = {None: table}
+                else:
+                    # one open writer per partition: a single file per month, no sort needed
+                    import pyarrow.compute as pc
+                    values = table.column(partition_column)
+                    groups = {}
+                    for value in pc.unique(values).to_pylist():
+                        mask = pc.is_null(values) if value is None else pc.equal(values, value)
+                        # rows without a date go to partition 0 rather than being dropped
+                        key = 0 if value is None else value
+                        groups[key] = table.filter(mask).drop_columns([partition_column])
+
+                for value, part in groups.items():
+                    if value not in writers:
+                        directory = target_dir if value is None else os.path.join(target_dir, f"{partition_column}={value}")
+                        os.makedirs(directory, exist_ok=True)
+                        writers[value] = pq.ParquetWriter(os.path.join(directory, "part-0.parquet"), part.schema)
+                    writers[value].write_table(part)
+
+                rows += len(batch)
+        finally:
+            for writer in writers.values():
+                writer.close()
+
+    # DuckDB cannot create a view over zero files; leave an empty file behind
+    if not writers:
+        if partition_column is None:
+            pq.write_table(schema.empty_table(), os.path.join(target_dir, "part-0.parquet"))
+        else:
+            directory = os.path.join(target_dir, f"{partition_column}=0")
+            os.makedirs(directory, exist_ok=True)
+            empty = schema.empty_table().drop_columns([partition_column])
+            pq.write_table(empty, os.path.join(directory, "part-0.parquet"))
+
+    return rows, len(writers)
+
+def export_lake(conn, lake_dir=LAKE_DIR):
+    """Export every LAKE_TABLES entry; the new lake replaces the old one only when complete."""
+    staging_dir = f"{lake_dir}.tmp"
+    if os.path.exists(staging_dir):
+        shutil.rmtree(staging_dir)
+
+    results = {}
+    for table, (sql, partition_column) in LAKE_TABLES.items():
+        start = time.time()
+        rows, files = export_table(conn, sql, os.path.join(staging_dir, table), partition_column)
+        results[table] = {
+            "rows": rows,
+            "files": files,
+            "execution_time_ms": round((time.time() - start) * 1000, 2)
+        }
+
+    previous_dir = f"{lake_dir}.old"
+    if os.path.exists(lake_dir):
+        os.replace(lake_dir, previous_dir)
+    os.replace(staging_dir, lake_dir)
+    if os.path.exists(previous_dir):
+        shutil.rmtree(previous_dir)
+
+    return results
+
+# --------------------------------------------------
+# DuckDB
+# --------------------------------------------------
+def open_lake(lake_dir=LAKE_DIR, database=":memory:"):
+    duckdb = import_duckdb()
+    con = duckdb.connect(database)
+    con.execute("CREATE SCHEMA IF NOT EXISTS warehouse")
+
+    for table, (_, partition_column) in LAKE_TABLES.items():
+        path = os.path.abspath(os.path.join(lake_dir, table)).replace("\\", "/")
+        if partition_column:
+            source = f"read_parquet('{path}/*/*.parquet', hive_partitioning = true)"
+        else:
+            source = f"read_parquet('{path}/*.parquet')"
+        con.execute(f"CREATE OR REPLACE VIEW warehouse.{table} AS SELECT * FROM {source}")
+
+    return con
+
+def build_lake_database(lake_dir=LAKE_DIR, database=LAKE_DATABASE):
+    """Persist the warehouse.* views in a DuckDB file for BI tools and analysts."""
+    os.makedirs(os.path.dirname(database), exist_ok=True)
+    open_lake(lake_dir, database).close()
+
+# --------------------------------------------------
+# Result comparison
+# --------------------------------------------------
+def frames_match(left, right, rtol=1e-6):
+    """Same rows regardless of order; numbers compared with a relative tolerance."""
+    import numpy as np
+    import pandas as pd
+
+    if list(left.columns) != list(right.columns) or len(left) != len(right):
+        return False
+
+    def normalize(df):
+        df = df.copy()
+        for column in df.columns:
+            if df[column].dtype == object:
+                converted = pd.to_numeric(df[column], errors="coerce")
+                if converted.notna().sum() == df[column].notna().sum():
+                    df[column] = converted.astype(float)
+        return df.sort_values(list(df.columns), na_position="last").reset_index(drop=True)
+
+    left, right = normalize(left), normalize(right)
+    for column in left.columns:
+        a, b = left[column], right[column]
+        if pd.api.types.is_numeric_dtype(a) and pd.api.types.is_numeric_dtype(b):
+            if not np.allclose(a.astype(float), b.astype(float), rtol=rtol, equal_nan=True):
+                return False
+        elif not a.astype(str).equals(b.astype(str)):
+            return False
+    return True
+
+# --------------------------------------------------
+# Main
+# --------------------------------------------------
+def main():
+    conn = get_conn()
+    try:
+        results = export_lake(conn)
+    finally:
+        conn.close()
+    build_lake_database()
+
+    print(json.dumps(results, indent=2))
+    print(f"Analytics lake refreshed in {LAKE_DIR} ({LAKE_DATABASE})")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Export the warehouse to the Parquet analytics lake")
+    parser.add_argument("--profile", action="store_true")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from profiling import run_stage
+    run_stage("analytics_lake", main, profile=args.profile)
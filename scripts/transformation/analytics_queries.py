@@ -0,0 +1,135 @@
+# --------------------------------------------------
+# Analytical queries, shared by generate_analytics.py (batch report) and
+# scripts/api/analytics_api.py (HTTP service)
+#
+# Placeholders:
+#   {schema}   warehouse schema (warehouse, warehouse_published, or the
+#              DuckDB lake's warehouse.* views)
+#   {filters}  WHERE conditions on fact_sales fs; TRUE for the batch report
+#   {limit}    row limit; a literal for the report, %(limit)s in the API
+#
+# "report" is the batch output name (data/processed/analytics/<report>.csv).
+# "api" queries are served by the API with the listed request parameters.
+# No trailing semicolons, so the SQL can be wrapped or parameterised.
+# --------------------------------------------------
+FACT_FILTERS = ["start_date", "end_date", "category"]
+DEFAULT_LIMIT = 10
+
+QUERIES = {
+    "top_products": {
+        "report": "query1_top_products",
+        "api": True,
+        "description": "Products by revenue",
+        "parameters": FACT_FILTERS + ["limit"],
+        "sql": """
+            SELECT dp.product_name, dp.category,
+                   SUM(fs.line_total) AS total_revenue,
+                   SUM(fs.quantity) AS units_sold,
+                   AVG(fs.unit_price) AS avg_price
+            FROM {schema}.fact_sales fs
+            JOIN {schema}.dim_products dp ON fs.product_key = dp.product_key
+            WHERE {filters}
+            GROUP BY dp.product_name, dp.category
+            ORDER BY total_revenue DESC
+            LIMIT {limit}
+        """
+    },
+
+    # total_transactions / unique_customers are merged in from the daily
+    # HyperLogLog sketches (unique_counts.py) instead of COUNT(DISTINCT)
+    "monthly_trend": {
+        "report": "query2_monthly_trend",
+        "api": True,
+        "unique_counts": "month",
+        "description": "Revenue, transactions, average line value and unique customers per month",
+        "parameters": FACT_FILTERS,
+        "sql": """
+            SELECT d.year, d.month,
+                   SUM(fs.line_total) AS total_revenue,
+                   AVG(fs.line_total) AS average_order_value
+            FROM {schema}.fact_sales fs
+            JOIN {schema}.dim_date d ON fs.date_key = d.date_key
+            WHERE {filters}
+            GROUP BY d.year, d.month
+            ORDER BY d.year, d.month
+        """
+    },
+
+    # Customer-level queries read customer_lifetime (one row per customer,
+    # maintained by load_warehouse.py), so they take no date filters
+    "customer_segmentation": {
+        "report": "query3_customer_segmentation",
+        "api": True,
+        "description": "Customers and revenue per spending segment (lifetime, not date-filtered)",
+        "parameters": [],
+        "sql": """
+            SELECT spending_segment,
+                   COUNT(*) AS customer_count,
+                   SUM(total_spent) AS total_revenue,
+                   AVG(total_spent) AS avg_transaction_value
+            FROM {schema}.customer_lifetime
+            GROUP BY spending_segment
+            ORDER BY total_revenue DESC
+        """
+    },
+
+    "category_performance": {
+        "report": "query4_category_performance",
+        "api": True,
+        "description": "Revenue, profit and margin per category",
+        "parameters": FACT_FILTERS,
+        "sql": """
+            SELECT dp.category,
+                   SUM(fs.line_total) AS total_revenue,
+                   SUM(fs.profit) AS total_profit,
+                   (SUM(fs.profit) / NULLIF(SUM(fs.line_total), 0)) * 100 AS profit_margin_pct,
+                   SUM(fs.quantity) AS units_sold
+            FROM {schema}.fact_sales fs
+            JOIN {schema}.dim_products dp ON fs.product_key = dp.product_key
+            WHERE {filters}
+            GROUP BY dp.category
+            ORDER BY total_revenue DESC
+        """
+    },
+
+    "payment_distribution": {
+        "report": "query5_payment_distribution",
+        "api": True,
+        "description": "Transactions and revenue share per payment method",
+        "parameters": FACT_FILTERS,
+        "sql": """
+            SELECT pm.payment_method_name,
+                   COUNT(*) AS transaction_count,
+                   SUM(fs.line_total) AS total_revenue,
+                   COUNT(*) * 100.0 / SUM(COUNT(*)) OVER () AS pct_of_transactions,
+                   SUM(fs.line_total) * 100.0 / NULLIF(SUM(SUM(fs.line_total)) OVER (), 0) AS pct_of_revenue
+            FROM {schema}.fact_sales fs
+            JOIN {schema}.dim_payment_method pm ON fs.payment_method_key = pm.payment_method_key
+            WHERE {filters}
+            GROUP BY pm.payment_method_name
+            ORDER BY total_revenue DESC
+        """
+    },
+
+    "rfm_distribution": {
+        "report": "query6_rfm_distribution",
+        "api": False,
+        "description": "Customers and revenue per RFM score combination",
+        "parameters": [],
+        "sql": """
+            SELECT recency_score, frequency_score, monetary_score,
+                   COUNT(*) AS customer_count,
+                   SUM(total_spent) AS total_revenue
+            FROM {schema}.customer_lifetime
+            GROUP BY recency_score, frequency_score, monetary_score
+            ORDER BY recency_score DESC, frequency_score DESC, monetary_score DESC
+        """
+    }
+}
+
+def render(name, schema="warehouse", filters="TRUE", limit=DEFAULT_LIMIT):
+    return QUERIES[name]["sql"].format(schema=schema, filters=filters, limit=limit)
+
+def report_queries(schema="warehouse"):
+    """{report name: SQL} for the batch report: every query, unfiltered."""
+    return {q["report"]: render(name, schema) for name, q in QUERIES.items()}
@@ -0,0 +1,186 @@
+import time
+
+# --------------------------------------------------
+# Dimension surrogate-key cache
+#
+# Loads the current natural -> surrogate key map of each dimension once and
+# resolves whole batches of fact rows against it in Python, instead of joining
+# every fact batch to the (growing) SCD dimension tables.
+#
+# Keys missing from a dimension (late-arriving members) get an inferred
+# placeholder row, which the next dimension load fills in with real
+# attributes while keeping the same surrogate key.
+# --------------------------------------------------
+DIMENSIONS = {
+    "customer": {
+        "load_sql": """
+            SELECT customer_id, customer_key
+            FROM warehouse.dim_customers
+            WHERE is_current;
+        """,
+        "infer_sql": """
+            INSERT INTO warehouse.dim_customers (
+                customer_id, full_name, effective_date, is_current, is_inferred
+            )
+            SELECT k, 'Unknown', CURRENT_DATE, TRUE, TRUE
+            FROM unnest(%s::text[]) AS k
+            ON CONFLICT (customer_id) WHERE is_current DO NOTHING
+            RETURNING customer_id, customer_key;
+        """,
+        "lookup_sql": """
+            SELECT customer_id, customer_key
+            FROM warehouse.dim_customers
+            WHERE is_current AND customer_id = ANY(%s::text[]);
+        """
+    },
+    "product": {
+        "load_sql": """
+            SELECT product_id, product_key
+            FROM warehouse.dim_products
+            WHERE is_current;
+        """,
+        "infer_sql": """
+            INSERT INTO warehouse.dim_products (
+                product_id, product_name, effective_date, is_current, is_inferred
+            )
+            SELECT k, 'Unknown', CURRENT_DATE, TRUE, TRUE
+            FROM unnest(%s::text[]) AS k
+            ON CONFLICT (product_id) WHERE is_current DO NOTHING
+            RETURNING product_id, product_key;
+        """,
+        "lookup_sql": """
+            SELECT product_id, product_key
+            FROM warehouse.dim_products
+            WHERE is_current AND product_id = ANY(%s::text[]);
+        """
+    },
+    "payment_method": {
+        "load_sql": """
+            SELECT payment_method_name, payment_method_key
+            FROM warehouse.dim_payment_method;
+        """,
+        "infer_sql": """
+            INSERT INTO warehouse.dim_payment_method (payment_method_name)
+            SELECT unnest(%s::text[])
+            ON CONFLICT (payment_method_name) DO NOTHING
+            RETURNING payment_method_name, payment_method_key;
+        """,
+        "lookup_sql": """
+            SELECT payment_method_name, payment_method_key
+            FROM warehouse.dim_payment_method
+            WHERE payment_method_name = ANY(%s::text[]);
+        """
+    },
+    # dim_date members are derived from the date itself, so a "miss" simply
+    # creates the complete row
+    "date": {
+        "load_sql": """
+            SELECT full_date, date_key
+            FROM warehouse.dim_date;
+        """,
+        "infer_sql": """
+            INSERT INTO warehouse.dim_date (
+                date_key, full_date, year, quarter, month, day,
+                month_name, day_name, week_of_year, is_weekend
+            )
+            SELECT
+                TO_CHAR(d, 'YYYYMMDD')::INT,
+                d,
+                EXTRACT(YEAR FROM d),
+                EXTRACT(QUARTER FROM d),
+                EXTRACT(MONTH FROM d),
+                EXTRACT(DAY FROM d),
+                TRIM(TO_CHAR(d, 'Month')),
+                TRIM(TO_CHAR(d, 'Day')),
+                EXTRACT(WEEK FROM d),
+                EXTRACT(ISODOW FROM d) IN (6, 7)
+            FROM unnest(%s::date[]) AS d
+            ON CONFLICT (date_key) DO NOTHING
+            RETURNING full_date, date_key;
+        """,
+        "lookup_sql": """
+            SELECT full_date, date_key
+            FROM warehouse.dim_date
+            WHERE full_date = ANY(%s::date[]);
+        """
+    }
+}
+
+class DimensionKeyCache:
+    def __init__(self):
+        self.maps = {}
+        self.stats = {
+            name: {
+                "loads": 0, "members": 0, "lookups": 0, "hits": 0, "misses": 0,
+                "inferred_members": 0, "load_seconds": 0.0, "lookup_seconds": 0.0
+            }
+            for name in DIMENSIONS
+        }
+
+    def invalidate(self, name=None):
+        """Drop a cached map (or all of them); call after inserting into a dimension."""
+        if name is None:
+            self.maps.clear()
+        else:
+            self.maps.pop(name, None)
+
+    def _load(self, cur, name):
+        start = time.perf_counter()
+        cur.execute(DIMENSIONS[name]["load_sql"])
+        mapping = dict(cur.fetchall())
+        self.maps[name] = mapping
+
+        stats = self.stats[name]
+        stats["loads"] += 1
+        stats["members"] = len(mapping)
+        stats["load_seconds"] += time.perf_counter() - start
+        return mapping
+
+    def _add_members(self, cur, name, natural_keys):
+        mapping = self.maps[name]
+        keys = sorted(natural_keys)
+
+        cur.execute(DIMENSIONS[name]["infer_sql"], (keys,))
+        inserted = cur.fetchall()
+        mapping.update(inserted)
+        self.stats[name]["inferred_members"] += len(inserted)
+
+        # rows that hit ON CONFLICT were added by someone else since our load
+        if len(inserted) < len(keys):
+            cur.execute(DIMENSIONS[name]["lookup_sql"], (keys,))
+            mapping.update(cur.fetchall())
+
+        self.stats[name]["members"] = len(mapping)
+
+    def resolve(self, cur, name, natural_keys):
+        """Surrogate keys for a batch of natural keys, in the same order."""
+        mapping = self.maps.get(name)
+        if mapping is None:
+            mapping = self._load(cur, name)
+
+        start = time.perf_counter()
+        keys = [mapping.get(k) for k in natural_keys]
+        missing = {k for k, v in zip(natural_keys, keys) if v is None and k is not None}
+
+        misses = 0
+        if missing:
+            misses = sum(1 for k in natural_keys if k in missing)
+            self._add_members(cur, name, missing)
+            keys = [mapping.get(k) for k in natural_keys]
+
+        stats = self.stats[name]
+        stats["lookups"] += len(natural_keys)
+        stats["misses"] += misses
+        stats["hits"] += len(natural_keys) - misses
+        stats["lookup_seconds"] += time.perf_counter() - start
+        return keys
+
+    def report(self):
+        report = {}
+        for name, stats in self.stats.items():
+            entry = dict(stats)
+            entry["hit_rate"] = round(stats["hits"] / stats["lookups"], 4) if stats["lookups"] else None
+            entry["load_seconds"] = round(stats["load_seconds"], 4)
+            entry["lookup_seconds"] = round(stats["lookup_seconds"], 4)
+            report[name] = entry
+        return report
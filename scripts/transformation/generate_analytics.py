@@ -1,14 +1,20 @@
-import psycopg2
-import pandas as pd
 import os
+import sys
 import json
 import time
+import argparse
 from datetime import datetime
 
+# sibling modules resolve however the script is started (runpy, other cwd)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from analytics_queries import QUERIES as SHARED_QUERIES, report_queries
+
 OUTPUT_DIR = "data/processed/analytics"
-os.makedirs(OUTPUT_DIR, exist_ok=True)
+EXPORT_DIR = f"{OUTPUT_DIR}/exports"
+EXPORT_BATCH_SIZE = 50000
 
 def get_conn():
+    import psycopg2
     return psycopg2.connect(
         host=os.environ.get("DB_HOST", "postgres"),
         port=int(os.environ.get("DB_PORT", 5432)),
@@ -17,98 +23,215 @@ def get_conn():
         password=os.environ.get("DB_PASSWORD", "password")
     )
 
-QUERIES = {
-    "query1_top_products": """
-    SELECT dp.product_name, dp.category,
-           SUM(fs.line_total) AS total_revenue,
-           SUM(fs.quantity) AS units_sold,
-           AVG(fs.unit_price) AS avg_price
-    FROM warehouse.fact_sales fs
-    JOIN warehouse.dim_products dp ON fs.product_key = dp.product_key
-    GROUP BY dp.product_name, dp.category
-    ORDER BY total_revenue DESC
-    LIMIT 10;
-    """,
+# Same SQL as the analytics API (analytics_queries.py), unfiltered. The
+# DuckDB lake exposes warehouse.* views, so it runs there unchanged.
+QUERIES = report_queries("warehouse")
 
-    "query2_monthly_trend": """
-    SELECT d.year, d.month,
-           SUM(fs.line_total) AS total_revenue,
-           COUNT(DISTINCT fs.transaction_id) AS total_transactions,
-           AVG(fs.line_total) AS average_order_value,
-           COUNT(DISTINCT fs.customer_key) AS unique_customers
-    FROM warehouse.fact_sales fs
-    JOIN warehouse.dim_date d ON fs.date_key = d.date_key
-    GROUP BY d.year, d.month
-    ORDER BY d.year, d.month;
-    """,
-
-    "query3_customer_segmentation": """
-    WITH customer_totals AS (
-        SELECT customer_key, SUM(line_total) AS total_spent
-        FROM warehouse.fact_sales
-        GROUP BY customer_key
-    )
-    SELECT
-        CASE
-            WHEN total_spent < 1000 THEN '$0-$1,000'
-            WHEN total_spent < 5000 THEN '$1,000-$5,000'
-            WHEN total_spent < 10000 THEN '$5,000-$10,000'
-            ELSE '$10,000+'
-        END AS spending_segment,
-        COUNT(*) AS customer_count,
-        SUM(total_spent) AS total_revenue,
-        AVG(total_spent) AS avg_transaction_value
-    FROM customer_totals
-    GROUP BY spending_segment;
+# --------------------------------------------------
+# Large exports (one row per customer / product)
+# --------------------------------------------------
+# These return up to millions of rows, so they are never materialised as a
+# DataFrame. No trailing semicolons: the SQL is wrapped in COPY (...).
+EXPORTS = {
+    "export_customer_sales": """
+    SELECT dc.customer_id, dc.full_name, dc.city, dc.state, dc.country,
+           cl.total_spent,
+           cl.total_profit,
+           cl.order_count AS transaction_count,
+           cl.units_bought,
+           cl.first_purchase_date, cl.last_purchase_date,
+           cl.spending_segment,
+           cl.recency_score, cl.frequency_score, cl.monetary_score
+    FROM warehouse.customer_lifetime cl
+    JOIN warehouse.dim_customers dc
+         ON dc.customer_id = cl.customer_id AND dc.is_current
     """,
 
-    "query4_category_performance": """
-    SELECT dp.category,
+    "export_product_sales": """
+    SELECT dp.product_id, dp.product_name, dp.category, dp.sub_category,
            SUM(fs.line_total) AS total_revenue,
            SUM(fs.profit) AS total_profit,
-           (SUM(fs.profit)/SUM(fs.line_total))*100 AS profit_margin_pct,
-           SUM(fs.quantity) AS units_sold
+           SUM(fs.quantity) AS units_sold,
+           COUNT(DISTINCT fs.customer_key) AS unique_customers
     FROM warehouse.fact_sales fs
     JOIN warehouse.dim_products dp ON fs.product_key = dp.product_key
-    GROUP BY dp.category;
-    """,
-
-    "query5_payment_distribution": """
-    SELECT pm.payment_method_name,
-           COUNT(*) AS transaction_count,
-           SUM(fs.line_total) AS total_revenue,
-           COUNT(*) * 100.0 / SUM(COUNT(*)) OVER () AS pct_of_transactions,
-           SUM(fs.line_total) * 100.0 / SUM(SUM(fs.line_total)) OVER () AS pct_of_revenue
-    FROM warehouse.fact_sales fs
-    JOIN warehouse.dim_payment_method pm
-         ON fs.payment_method_key = pm.payment_method_key
-    GROUP BY pm.payment_method_name;
+    GROUP BY dp.product_id, dp.product_name, dp.category, dp.sub_category
     """
 }
 
-def main():
+def export_csv(conn, sql, output_file):
+    # COPY ... TO STDOUT streams straight from the server into the file;
+    # psycopg2 writes it in small buffers, so memory stays flat.
+    with conn.cursor() as cur, open(output_file, "w", encoding="utf-8") as f:
+        cur.copy_expert(f"COPY ({sql}) TO STDOUT WITH CSV HEADER", f)
+        return cur.rowcount
+
+def export_parquet(conn, sql, output_file, batch_size=EXPORT_BATCH_SIZE):
+    from analytics_lake import arrow_schema, import_pyarrow
+    pa, pq = import_pyarrow()
+
+    rows = 0
+    writer = None
+
+    # Named cursor = server-side cursor: rows arrive batch_size at a time
+    with conn.cursor(name=os.path.basename(output_file).split(".")[0]) as cur:
+        cur.itersize = batch_size
+        cur.execute(sql)
+
+        try:
+            while True:
+                batch = cur.fetchmany(batch_size)
+
+                # The schema comes from the column types, not the first batch:
+                # inferred types break on a later batch (decimal scale) or turn
+                # an all-NULL first batch into type null
+                if writer is None:
+                    schema = arrow_schema(cur.description)
+                    writer = pq.ParquetWriter(output_file, schema)
+                if not batch:
+                    break
+
+                data = {name: [row[i] for row in batch] for i, name in enumerate(schema.names)}
+                writer.write_table(pa.Table.from_pydict(data, schema=schema))
+                rows += len(batch)
+        finally:
+            if writer is not None:
+                writer.close()
+
+    return rows
+
+def export_duckdb(lake, sql, output_file, export_format):
+    # DuckDB writes CSV/Parquet itself, straight from the lake files
+    options = "FORMAT parquet" if export_format == "parquet" else "FORMAT csv, HEADER"
+    # COPY returns the number of rows written, so the query runs only once
+    written = lake.execute(f"COPY ({sql}) TO '{output_file}' ({options})").fetchone()
+    if written is not None:
+        return written[0]
+    reader = "read_parquet" if export_format == "parquet" else "read_csv_auto"
+    return lake.execute(f"SELECT COUNT(*) FROM {reader}('{output_file}')").fetchone()[0]
+
+def run_exports(conn, export_format, lake=None):
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    results = {}
+
+    for name, sql in EXPORTS.items():
+        output_file = f"{EXPORT_DIR}/{name}.{export_format}"
+
+        start = time.time()
+        if lake is not None:
+            rows = export_duckdb(lake, sql, output_file, export_format)
+        elif export_format == "parquet":
+            rows = export_parquet(conn, sql, output_file)
+        else:
+            rows = export_csv(conn, sql, output_file)
+        duration = time.time() - start
+
+        size = os.path.getsize(output_file) if os.path.exists(output_file) else 0
+
+        results[name] = {
+            "engine": "duckdb" if lake is not None else "postgres",
+            "format": export_format,
+            "output_file": output_file,
+            "rows": rows,
+            "bytes": size,
+            "execution_time_ms": round(duration * 1000, 2),
+            "rows_per_second": round(rows / duration, 2) if duration > 0 else None,
+            "megabytes_per_second": round(size / 1024 / 1024 / duration, 2) if duration > 0 else None
+        }
+
+    return results
+
+# --------------------------------------------------
+# Distinct counts from sketches
+# --------------------------------------------------
+# total_transactions / unique_customers are merged in from the daily sketches
+UNIQUE_COUNT_QUERIES = {q["report"]: q["unique_counts"] for q in SHARED_QUERIES.values() if "unique_counts" in q}
+
+def add_unique_counts(conn, df, grain, exact):
+    import pandas as pd
+    from unique_counts import unique_counts
+
+    counts = pd.DataFrame(unique_counts(conn, grain, exact=exact))
+    if counts.empty:
+        counts = pd.DataFrame(columns=["year", grain, "unique_transactions", "unique_customers"])
+    counts = counts.rename(columns={"unique_transactions": "total_transactions"})
+
+    df = df.merge(counts, on=["year", grain], how="left")
+    return df[["year", grain, "total_revenue", "total_transactions",
+               "average_order_value", "unique_customers"]]
+
+# --------------------------------------------------
+# Main
+# --------------------------------------------------
+def run_query(engine, connection, sql):
+    import pandas as pd
+
+    start = time.time()
+    if engine == "duckdb":
+        df = connection.execute(sql).df()
+    else:
+        df = pd.read_sql(sql, connection)
+    return df, (time.time() - start) * 1000
+
+def main(export_format="csv", exact_distinct=False, engine="postgres"):
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
     conn = get_conn()
     summary = {
         "generation_timestamp": datetime.utcnow().isoformat(),
+        "engine": engine,
         "queries_executed": len(QUERIES),
+        "distinct_counts": "exact" if exact_distinct else "hyperloglog",
         "query_results": {}
     }
 
     start_all = time.time()
 
+    # --engine duckdb|both: refresh the Parquet lake, then query it in-process
+    lake = None
+    if engine in ("duckdb", "both"):
+        from analytics_lake import export_lake, open_lake, build_lake_database
+        summary["lake_export"] = export_lake(conn)
+        build_lake_database()
+        lake = open_lake()
+
+    engines = {"postgres": ["postgres"], "duckdb": ["duckdb"], "both": ["postgres", "duckdb"]}[engine]
+
     for name, sql in QUERIES.items():
-        start = time.time()
-        df = pd.read_sql(sql, conn)
-        duration = (time.time() - start) * 1000
+        frames = {}
+        timings = {}
+        for query_engine in engines:
+            connection = lake if query_engine == "duckdb" else conn
+            df, duration = run_query(query_engine, connection, sql)
+
+            # unique counts always come from the (tiny) sketch table in Postgres
+            if name in UNIQUE_COUNT_QUERIES:
+                start = time.time()
+                df = add_unique_counts(conn, df, UNIQUE_COUNT_QUERIES[name], exact_distinct)
+                duration += (time.time() - start) * 1000
+
+            frames[query_engine] = df
+            timings[query_engine] = duration
 
+        df = frames[engines[0]]
         output_file = f"{OUTPUT_DIR}/{name}.csv"
         df.to_csv(output_file, index=False)
 
-        summary["query_results"][name] = {
+        result = {
             "rows": len(df),
             "columns": len(df.columns),
-            "execution_time_ms": round(duration, 2)
+            "execution_time_ms": round(timings[engines[0]], 2)
         }
+        if engine == "both":
+            from analytics_lake import frames_match
+            result["duckdb_execution_time_ms"] = round(timings["duckdb"], 2)
+            result["speedup"] = round(timings["postgres"] / timings["duckdb"], 2) if timings["duckdb"] else None
+            result["results_match"] = frames_match(frames["postgres"], frames["duckdb"])
+            if not result["results_match"]:
+                print(f"WARNING: {name} differs between Postgres and DuckDB")
+
+        summary["query_results"][name] = result
+
+    summary["exports"] = run_exports(conn, export_format, lake if engine == "duckdb" else None)
 
     summary["total_execution_time_seconds"] = round(time.time() - start_all, 2)
 
@@ -117,7 +240,22 @@ def main():
 
     print("Analytics generated successfully")
 
+    if lake is not None:
+        lake.close()
     conn.close()
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate analytics outputs from the warehouse")
+    parser.add_argument("--export-format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--engine", choices=["postgres", "duckdb", "both"], default="postgres",
+                        help="duckdb: query the exported Parquet lake; both: run both and compare")
+    parser.add_argument("--exact-distinct", action="store_true",
+                        help="Use COUNT(DISTINCT) instead of the daily sketches for unique counts")
+    parser.add_argument("--profile", action="store_true")
+    return parser.parse_args()
+
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from profiling import run_stage
+    run_stage("analytics_generation", main, args.export_format, args.exact_distinct, args.engine, profile=args.profile)
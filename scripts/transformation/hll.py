@@ -0,0 +1,65 @@
+import math
+import zlib
+import hashlib
+
+# --------------------------------------------------
+# HyperLogLog distinct-count sketch
+#
+# PRECISION = 14 gives 16384 one-byte registers. The relative standard error
+# of an estimate is 1.04 / sqrt(16384) = 0.81%, so about 95% of estimates are
+# within +/-1.6% and 99% within +/-2.4% of the exact count, for any
+# cardinality. Merging sketches (register-wise max) loses no accuracy, so a
+# month built from 30 daily sketches has the same error bound as one day.
+#
+# Serialized form (stored as BYTEA): one precision byte followed by the
+# zlib-compressed registers; sparse days compress to a few hundred bytes.
+# --------------------------------------------------
+PRECISION = 14
+RELATIVE_STANDARD_ERROR = 1.04 / math.sqrt(2 ** PRECISION)
+
+# 2^-r for every possible register value, so estimate() is one table lookup per register
+_INVERSE_POWERS = [2.0 ** -r for r in range(65)]
+
+class HyperLogLog:
+    def __init__(self, precision=PRECISION, registers=None):
+        self.precision = precision
+        self.m = 1 << precision
+        self.registers = registers if registers is not None else bytearray(self.m)
+
+    def add(self, value):
+        h = int.from_bytes(hashlib.blake2b(str(value).encode(), digest_size=8).digest(), "big")
+        index = h >> (64 - self.precision)
+        remainder = h & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - remainder.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def update(self, values):
+        for value in values:
+            self.add(value)
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge sketches with different precision")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def estimate(self):
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / sum(_INVERSE_POWERS[r] for r in self.registers)
+
+        # small-range correction (linear counting); a 64-bit hash needs no
+        # large-range correction at the cardinalities we see
+        zeros = self.registers.count(0)
+        if raw <= 2.5 * m and zeros:
+            return round(m * math.log(m / zeros))
+        return round(raw)
+
+    def to_bytes(self):
+        return bytes([self.precision]) + zlib.compress(bytes(self.registers))
+
+    @classmethod
+    def from_bytes(cls, data):
+        data = bytes(data)
+        return cls(precision=data[0], registers=bytearray(zlib.decompress(data[1:])))
@@ -1,7 +1,11 @@
-import psycopg2
 import os
+import sys
+import json
+import time
+from datetime import datetime
 
 def get_conn():
+    import psycopg2
     return psycopg2.connect(
         host=os.environ.get("DB_HOST", "localhost"),
         port=os.environ.get("DB_PORT", 5432),
@@ -10,10 +14,59 @@ def get_conn():
         password=os.environ.get("DB_PASSWORD", "password")
     )
 
-def load_dim_customers():
+# Load statistics read by pipeline_monitor (see create_monitoring_schema.sql)
+STAGE_NAME = "warehouse_load"
+
+def get_execution_id():
+    return os.environ.get(
+        "PIPELINE_EXECUTION_ID",
+        f"MANUAL_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    )
+
+def record_load_stats(cur, table, rows_loaded, max_business_date=None):
+    cur.execute("""
+        INSERT INTO monitoring.load_stats (
+            execution_id, stage, table_name, rows_loaded, max_business_date
+        )
+        VALUES (%s, %s, %s, %s, %s)
+    """, (get_execution_id(), STAGE_NAME, table, rows_loaded, max_business_date))
+
+def load_dim_customers(cache=None):
     conn = get_conn()
     cur = conn.cursor()
 
+    # Inferred members created by the fact load get their real attributes;
+    # the surrogate key already referenced by fact_sales stays the same
+    cur.execute("""
+        UPDATE warehouse.dim_customers d
+        SET full_name = c.first_name || ' ' || c.last_name,
+            email = c.email,
+            city = c.city,
+            state = c.state,
+            country = c.country,
+            age_group = c.age_group,
+            registration_date = c.registration_date,
+            is_inferred = FALSE
+        FROM production.customers c
+        WHERE d.customer_id = c.customer_id
+          AND d.is_current
+          AND d.is_inferred;
+    """)
+    completed = cur.rowcount
+
+    # SCD type 2: close the current version of members whose attributes changed
+    cur.execute("""
+        UPDATE warehouse.dim_customers d
+        SET is_current = FALSE,
+            end_date = CURRENT_DATE
+        FROM production.customers c
+        WHERE d.customer_id = c.customer_id
+          AND d.is_current
+          AND (d.full_name, d.email, d.city, d.state, d.country, d.age_group)
+              IS DISTINCT FROM
+              (c.first_name || ' ' || c.last_name, c.email, c.city, c.state, c.country, c.age_group);
+    """)
+
     cur.execute("""
         INSERT INTO warehouse.dim_customers (
             customer_id,
@@ -23,6 +76,7 @@ def load_dim_customers():
             state,
             country,
             age_group,
+            registration_date,
             effective_date,
             is_current
         )
@@ -34,21 +88,64 @@ def load_dim_customers():
             state,
             country,
             age_group,
+            registration_date,
             CURRENT_DATE,
             TRUE
-        FROM production.customers;
+        FROM production.customers c
+        WHERE NOT EXISTS (
+            SELECT 1 FROM warehouse.dim_customers d
+            WHERE d.customer_id = c.customer_id AND d.is_current
+        );
     """)
+    record_load_stats(cur, "warehouse.dim_customers", cur.rowcount + completed)
 
     conn.commit()
     cur.close()
     conn.close()
+
+    if cache is not None:
+        cache.invalidate("customer")
     print("Warehouse dim_customers loaded successfully")
 
-def load_dim_products():
+def load_dim_products(cache=None):
     conn = get_conn()
     cur = conn.cursor()
 
-    cur.execute("""
+    price_range = """
+        CASE
+            WHEN p.price < 50 THEN 'Budget'
+            WHEN p.price < 200 THEN 'Mid-range'
+            ELSE 'Premium'
+        END
+    """
+
+    cur.execute(f"""
+        UPDATE warehouse.dim_products d
+        SET product_name = p.product_name,
+            category = p.category,
+            sub_category = p.sub_category,
+            price_range = {price_range},
+            is_inferred = FALSE
+        FROM production.products p
+        WHERE d.product_id = p.product_id
+          AND d.is_current
+          AND d.is_inferred;
+    """)
+    completed = cur.rowcount
+
+    cur.execute(f"""
+        UPDATE warehouse.dim_products d
+        SET is_current = FALSE,
+            end_date = CURRENT_DATE
+        FROM production.products p
+        WHERE d.product_id = p.product_id
+          AND d.is_current
+          AND (d.product_name, d.category, d.sub_category, d.price_range)
+              IS DISTINCT FROM
+              (p.product_name, p.category, p.sub_category, {price_range});
+    """)
+
+    cur.execute(f"""
         INSERT INTO warehouse.dim_products (
             product_id,
             product_name,
@@ -63,24 +160,399 @@ def load_dim_products():
             product_name,
             category,
             sub_category,
-            CASE
-                WHEN price < 50 THEN 'Budget'
-                WHEN price < 200 THEN 'Mid-range'
-                ELSE 'Premium'
-            END,
+            {price_range},
             CURRENT_DATE,
             TRUE
-        FROM production.products;
+        FROM production.products p
+        WHERE NOT EXISTS (
+            SELECT 1 FROM warehouse.dim_products d
+            WHERE d.product_id = p.product_id AND d.is_current
+        );
     """)
+    record_load_stats(cur, "warehouse.dim_products", cur.rowcount + completed)
 
     conn.commit()
     cur.close()
     conn.close()
+
+    if cache is not None:
+        cache.invalidate("product")
     print("Warehouse dim_products loaded successfully")
 
+def load_dim_payment_method(cache=None):
+    conn = get_conn()
+    cur = conn.cursor()
+
+    cur.execute("""
+        INSERT INTO warehouse.dim_payment_method (payment_method_name)
+        SELECT DISTINCT payment_method
+        FROM production.transactions
+        WHERE payment_method IS NOT NULL
+        ON CONFLICT (payment_method_name) DO NOTHING;
+    """)
+    record_load_stats(cur, "warehouse.dim_payment_method", cur.rowcount)
+
+    conn.commit()
+    cur.close()
+    conn.close()
+
+    if cache is not None:
+        cache.invalidate("payment_method")
+    print("Warehouse dim_payment_method loaded successfully")
+
+# --------------------------------------------------
+# fact_sales
+#
+# Items not yet in the fact table are streamed in batches; surrogate keys come
+# from DimensionKeyCache rather than from joins against the dimensions.
+#
+# Every fact row keeps row_hash, an md5 over the delivered item and
+# transaction fields (not the product cost, which changes legitimately).
+# Production is reloaded with each batch, so a re-delivered item arrives
+# with the same item_key: the same hash means it is already loaded, a
+# different hash means its content changed under the same id. Changed rows
+# are not applied; they go to monitoring.changed_rows for review. Rows
+# loaded before row_hash existed have none and are never reported.
+# --------------------------------------------------
+FACT_BATCH_SIZE = 10000
+REPORT_FILE = "data/processed/warehouse_load_report.json"
+
+FACT_SOURCE_SQL = """
+    SELECT
+        ti.item_id,
+        ti.transaction_id,
+        t.transaction_date,
+        t.customer_id,
+        ti.product_id,
+        t.payment_method,
+        ti.quantity,
+        ti.unit_price,
+        ti.discount_percentage,
+        ti.line_total,
+        p.cost,
+        ti.item_key,
+        ti.transaction_key,
+        h.row_hash,
+        f.row_hash AS stored_hash
+    FROM production.transaction_items ti
+    JOIN production.transactions t ON t.transaction_key = ti.transaction_key
+    LEFT JOIN production.products p ON p.product_key = ti.product_key
+    CROSS JOIN LATERAL (
+        SELECT md5(ROW(
+            ti.item_id, ti.transaction_id, ti.product_id, ti.quantity, ti.unit_price,
+            ti.discount_percentage, ti.line_total, t.customer_id, t.transaction_date,
+            t.transaction_time, t.payment_method, t.shipping_address, t.total_amount
+        )::text)::uuid AS row_hash
+    ) h
+    LEFT JOIN warehouse.fact_sales f ON f.item_key = ti.item_key
+    WHERE f.item_key IS NULL
+       OR f.row_hash <> h.row_hash;
+"""
+
+FACT_COLUMNS = [
+    "item_key", "item_id", "transaction_key", "transaction_id", "date_key",
+    "customer_key", "product_key", "payment_method_key", "quantity", "unit_price",
+    "discount_amount", "line_total", "profit", "row_hash"
+]
+
+def build_fact_rows(rows, date_keys, customer_keys, product_keys, payment_keys):
+    for row, date_key, customer_key, product_key, payment_key in zip(
+        rows, date_keys, customer_keys, product_keys, payment_keys
+    ):
+        (item_id, transaction_id, _, _, _, _, quantity, unit_price, discount_pct,
+         line_total, cost, item_key, transaction_key, row_hash, _) = row
+
+        discount_amount = None
+        if None not in (quantity, unit_price, discount_pct):
+            discount_amount = round(quantity * unit_price * discount_pct / 100, 2)
+
+        profit = None
+        if None not in (quantity, line_total, cost):
+            profit = line_total - quantity * cost
+
+        yield [
+            item_key, item_id, transaction_key, transaction_id, date_key, customer_key,
+            product_key, payment_key, quantity, unit_price, discount_amount, line_total, profit, row_hash
+        ]
+
+def record_changed_rows(cur, execution_id, rows):
+    from psycopg2.extras import execute_values
+
+    execute_values(cur, """
+        INSERT INTO monitoring.changed_rows
+            (entity, natural_key, delivered_hash, stored_hash, execution_id)
+        VALUES %s
+        ON CONFLICT (entity, natural_key, delivered_hash) DO UPDATE SET
+            deliveries = monitoring.changed_rows.deliveries + 1,
+            last_seen_at = CURRENT_TIMESTAMP,
+            execution_id = EXCLUDED.execution_id
+    """, [("transaction_item", r[0], r[13], r[14], execution_id) for r in rows])
+
+def load_fact_sales(cache):
+    import io
+    import csv
+
+    conn = get_conn()
+    cur = conn.cursor()
+    source = conn.cursor(name="fact_sales_source")
+    source.itersize = FACT_BATCH_SIZE
+    source.execute(FACT_SOURCE_SQL)
+
+    start = time.time()
+    execution_id = get_execution_id()
+    loaded = 0
+    changed = 0
+    max_date = None
+    daily_sketches = {}
+
+    while True:
+        rows = source.fetchmany(FACT_BATCH_SIZE)
+        if not rows:
+            break
+
+        changed_rows = [r for r in rows if r[14] is not None]
+        if changed_rows:
+            record_changed_rows(cur, execution_id, changed_rows)
+            changed += len(changed_rows)
+            rows = [r for r in rows if r[14] is None]
+            if not rows:
+                continue
+
+        dates = [r[2] for r in rows]
+        date_keys = cache.resolve(cur, "date", dates)
+        customer_keys = cache.resolve(cur, "customer", [r[3] for r in rows])
+        product_keys = cache.resolve(cur, "product", [r[4] for r in rows])
+        payment_keys = cache.resolve(cur, "payment_method", [r[5] for r in rows])
+
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(
+            build_fact_rows(rows, date_keys, customer_keys, product_keys, payment_keys)
+        )
+        buffer.seek(0)
+        cur.copy_expert(
+            f"COPY warehouse.fact_sales ({', '.join(FACT_COLUMNS)}) FROM STDIN WITH CSV",
+            buffer
+        )
+
+        loaded += len(rows)
+        batch_max = max((d for d in dates if d is not None), default=None)
+        if batch_max and (max_date is None or batch_max > max_date):
+            max_date = batch_max
+
+        add_to_daily_sketches(daily_sketches, rows)
+
+    source.close()
+    record_load_stats(cur, "warehouse.fact_sales", loaded, max_date)
+    update_daily_sketches(cur, daily_sketches)
+
+    # same transaction: the aggregate can never double count or miss a batch
+    lifetime_rows = update_customer_lifetime(cur)
+    record_load_stats(cur, "warehouse.customer_lifetime", lifetime_rows)
+
+    conn.commit()
+    cur.close()
+    conn.close()
+
+    elapsed = round(time.time() - start, 2)
+    print(f"Warehouse fact_sales loaded successfully ({loaded} rows in {elapsed}s)")
+    if changed:
+        print(f"Warehouse fact_sales skipped {changed} changed re-delivered rows (see monitoring.changed_rows)")
+    return {"rows_loaded": loaded, "changed_rows_skipped": changed, "execution_time_seconds": elapsed}
+
+# --------------------------------------------------
+# Daily distinct-count sketches
+#
+# The new rows' transaction ids and customer ids are added to each day's
+# HyperLogLog sketches batch by batch, so memory is bounded by the number of
+# days, not rows. Customers are counted by natural id so SCD versions of the
+# same customer are not counted twice. Days loaded before the sketches
+# existed are seeded by unique_counts.py --rebuild (run by migrate_schema.py).
+# --------------------------------------------------
+def add_to_daily_sketches(daily_sketches, rows):
+    from hll import HyperLogLog
+
+    for row in rows:
+        if row[2] is None:
+            continue
+        if row[2] not in daily_sketches:
+            daily_sketches[row[2]] = (HyperLogLog(), HyperLogLog())
+        transactions_hll, customers_hll = daily_sketches[row[2]]
+        transactions_hll.add(row[1])
+        customers_hll.add(row[3])
+
+def update_daily_sketches(cur, daily_sketches):
+    from hll import HyperLogLog
+    from psycopg2.extras import execute_values
+
+    if not daily_sketches:
+        return
+
+    date_keys = {day: int(day.strftime("%Y%m%d")) for day in daily_sketches}
+    cur.execute("""
+        SELECT date_key, transactions_hll, customers_hll
+        FROM warehouse.daily_sketches
+        WHERE date_key = ANY(%s)
+        FOR UPDATE;
+    """, (list(date_keys.values()),))
+    existing = {row[0]: row[1:] for row in cur.fetchall()}
+
+    rows = []
+    for day, (transactions_hll, customers_hll) in daily_sketches.items():
+        if date_keys[day] in existing:
+            stored_transactions, stored_customers = existing[date_keys[day]]
+            transactions_hll.merge(HyperLogLog.from_bytes(stored_transactions))
+            customers_hll.merge(HyperLogLog.from_bytes(stored_customers))
+
+        rows.append((date_keys[day], transactions_hll.to_bytes(), customers_hll.to_bytes()))
+
+    execute_values(cur, """
+        INSERT INTO warehouse.daily_sketches (date_key, transactions_hll, customers_hll)
+        VALUES %s
+        ON CONFLICT (date_key) DO UPDATE SET
+            transactions_hll = EXCLUDED.transactions_hll,
+            customers_hll = EXCLUDED.customers_hll,
+            updated_at = CURRENT_TIMESTAMP;
+    """, rows)
+    record_load_stats(cur, "warehouse.daily_sketches", len(rows), max(daily_sketches))
+
+# --------------------------------------------------
+# customer_lifetime
+#
+# Folds only the fact rows above the stored sales_key watermark into the
+# per-customer totals, then re-scores every customer. Both steps are
+# proportional to new sales + customer count, not to the sales history.
+# --------------------------------------------------
+LIFETIME_AGGREGATE = "customer_lifetime"
+
+CUSTOMER_LIFETIME_UPSERT_SQL = """
+    WITH new_sales AS (
+        SELECT
+            dc.customer_id,
+            SUM(fs.line_total) AS total_spent,
+            SUM(fs.profit) AS total_profit,
+            COUNT(DISTINCT fs.transaction_key) AS order_count,
+            SUM(fs.quantity) AS units_bought,
+            MIN(TO_DATE(fs.date_key::TEXT, 'YYYYMMDD')) AS first_purchase_date,
+            MAX(TO_DATE(fs.date_key::TEXT, 'YYYYMMDD')) AS last_purchase_date
+        FROM warehouse.fact_sales fs
+        JOIN warehouse.dim_customers dc ON dc.customer_key = fs.customer_key
+        WHERE fs.sales_key > %(watermark)s
+          AND fs.sales_key <= %(high_watermark)s
+        GROUP BY dc.customer_id
+    )
+    INSERT INTO warehouse.customer_lifetime AS cl (
+        customer_id, total_spent, total_profit, order_count, units_bought,
+        first_purchase_date, last_purchase_date
+    )
+    SELECT
+        customer_id,
+        COALESCE(total_spent, 0),
+        COALESCE(total_profit, 0),
+        order_count,
+        COALESCE(units_bought, 0),
+        first_purchase_date,
+        last_purchase_date
+    FROM new_sales
+    ON CONFLICT (customer_id) DO UPDATE SET
+        total_spent = cl.total_spent + EXCLUDED.total_spent,
+        total_profit = cl.total_profit + EXCLUDED.total_profit,
+        order_count = cl.order_count + EXCLUDED.order_count,
+        units_bought = cl.units_bought + EXCLUDED.units_bought,
+        first_purchase_date = LEAST(cl.first_purchase_date, EXCLUDED.first_purchase_date),
+        last_purchase_date = GREATEST(cl.last_purchase_date, EXCLUDED.last_purchase_date),
+        updated_at = CURRENT_TIMESTAMP;
+"""
+
+# Spending bands match the original query3 segmentation; R/F/M are quintiles
+# (5 = most recent / most frequent / highest spend)
+CUSTOMER_SCORES_SQL = """
+    UPDATE warehouse.customer_lifetime cl
+    SET spending_segment = s.spending_segment,
+        recency_score = s.recency_score,
+        frequency_score = s.frequency_score,
+        monetary_score = s.monetary_score
+    FROM (
+        SELECT
+            customer_id,
+            CASE
+                WHEN total_spent < 1000 THEN '$0-$1,000'
+                WHEN total_spent < 5000 THEN '$1,000-$5,000'
+                WHEN total_spent < 10000 THEN '$5,000-$10,000'
+                ELSE '$10,000+'
+            END AS spending_segment,
+            NTILE(5) OVER (ORDER BY last_purchase_date) AS recency_score,
+            NTILE(5) OVER (ORDER BY order_count) AS frequency_score,
+            NTILE(5) OVER (ORDER BY total_spent) AS monetary_score
+        FROM warehouse.customer_lifetime
+    ) s
+    WHERE cl.customer_id = s.customer_id
+      AND (cl.spending_segment, cl.recency_score, cl.frequency_score, cl.monetary_score)
+          IS DISTINCT FROM
+          (s.spending_segment, s.recency_score, s.frequency_score, s.monetary_score);
+"""
+
+def update_customer_lifetime(cur):
+    cur.execute("""
+        SELECT last_sales_key FROM warehouse.aggregate_watermarks
+        WHERE aggregate_name = %s;
+    """, (LIFETIME_AGGREGATE,))
+    row = cur.fetchone()
+    watermark = row[0] if row else 0
+
+    cur.execute("SELECT COALESCE(MAX(sales_key), 0) FROM warehouse.fact_sales;")
+    high_watermark = cur.fetchone()[0]
+    if high_watermark <= watermark:
+        return 0
+
+    cur.execute(CUSTOMER_LIFETIME_UPSERT_SQL, {
+        "watermark": watermark,
+        "high_watermark": high_watermark
+    })
+    customers_updated = cur.rowcount
+
+    cur.execute(CUSTOMER_SCORES_SQL)
+
+    cur.execute("""
+        INSERT INTO warehouse.aggregate_watermarks (aggregate_name, last_sales_key)
+        VALUES (%s, %s)
+        ON CONFLICT (aggregate_name) DO UPDATE SET
+            last_sales_key = EXCLUDED.last_sales_key,
+            updated_at = CURRENT_TIMESTAMP;
+    """, (LIFETIME_AGGREGATE, high_watermark))
+
+    print(f"Warehouse customer_lifetime updated for {customers_updated} customers")
+    return customers_updated
+
+def write_report(fact_result, cache):
+    report = {
+        "load_timestamp": datetime.now().isoformat(),
+        "execution_id": get_execution_id(),
+        "fact_sales": fact_result,
+        "key_cache": cache.report()
+    }
+
+    os.makedirs(os.path.dirname(REPORT_FILE), exist_ok=True)
+    with open(REPORT_FILE, "w") as f:
+        json.dump(report, f, indent=4)
+
+    for name, stats in report["key_cache"].items():
+        print(
+            f"Key cache {name}: hit rate {stats['hit_rate']}, "
+            f"{stats['inferred_members']} inferred, lookup {stats['lookup_seconds']}s"
+        )
+
 def main():
-    load_dim_customers()
-    load_dim_products()
+    from dimension_cache import DimensionKeyCache
+
+    cache = DimensionKeyCache()
+    load_dim_customers(cache)
+    load_dim_products(cache)
+    load_dim_payment_method(cache)
+
+    fact_result = load_fact_sales(cache)
+    write_report(fact_result, cache)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from profiling import run_stage
+    run_stage("warehouse_load", main, profile="--profile" in sys.argv)
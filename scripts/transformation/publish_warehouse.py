@@ -0,0 +1,264 @@
+import os
+import sys
+import json
+import time
+import argparse
+from datetime import datetime
+
+# --------------------------------------------------
+# Warehouse publish (shadow schema swap)
+#
+# Loads write to warehouse.*; BI tools read bi_tool.warehouse_schema, a
+# published copy that only changes by schema rename:
+#   <schema>_shadow    refreshed from warehouse.* in one REPEATABLE READ
+#                      transaction, so every table comes from the same
+#                      snapshot. It is the previous published version,
+#                      brought up to date: fact_sales (append-only) only
+#                      receives the rows past its highest sales_key, the other
+#                      tables are rebuilt without indexes and indexed after
+#                      the copy. Nobody reads it, so bulk settings are safe.
+#   swap               one short transaction: <schema> -> <schema>_previous,
+#                      <schema>_shadow -> <schema>. Renames are catalog-only:
+#                      running BI queries finish on the version they started
+#                      on, new ones see the new version.
+#   --rollback         swaps <schema> and <schema>_previous back, until the
+#                      next publish starts refreshing the previous version.
+# --------------------------------------------------
+SOURCE_SCHEMA = "warehouse"
+APPEND_ONLY = {"fact_sales": "sales_key"}
+REPORT_FILE = "data/processed/warehouse_publish_report.json"
+SWAP_LOCK_TIMEOUT = "5s"
+
+def get_conn():
+    import psycopg2
+    return psycopg2.connect(
+        host=os.environ.get("DB_HOST", "postgres"),
+        port=int(os.environ.get("DB_PORT", 5432)),
+        dbname=os.environ.get("DB_NAME", "ecommerce_db"),
+        user=os.environ.get("DB_USER", "admin"),
+        password=os.environ.get("DB_PASSWORD", "password")
+    )
+
+def get_execution_id():
+    return os.environ.get(
+        "PIPELINE_EXECUTION_ID",
+        f"MANUAL_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    )
+
+def load_publish_config():
+    import yaml
+    with open("config/config.yaml", "r") as f:
+        config = yaml.safe_load(f)["bi_tool"]
+    schema = config["warehouse_schema"]
+    if schema == SOURCE_SCHEMA:
+        raise ValueError("bi_tool.warehouse_schema must differ from the warehouse schema the loads write to")
+    return {
+        "schema": schema,
+        "shadow": f"{schema}_shadow",
+        "previous": f"{schema}_previous",
+        "reader_roles": config.get("reader_roles") or [],
+        "maintenance_work_mem": config.get("publish_maintenance_work_mem", "512MB")
+    }
+
+# --------------------------------------------------
+# Catalog helpers
+# --------------------------------------------------
+def schema_exists(cur, schema):
+    cur.execute("SELECT 1 FROM pg_namespace WHERE nspname = %s", (schema,))
+    return cur.fetchone() is not None
+
+def list_tables(cur, schema):
+    cur.execute("""
+        SELECT table_name FROM information_schema.tables
+        WHERE table_schema = %s AND table_type = 'BASE TABLE'
+        ORDER BY table_name
+    """, (schema,))
+    return [r[0] for r in cur.fetchall()]
+
+def column_signature(cur, schema, table):
+    cur.execute("""
+        SELECT column_name, data_type FROM information_schema.columns
+        WHERE table_schema = %s AND table_name = %s
+        ORDER BY ordinal_position
+    """, (schema, table))
+    return cur.fetchall()
+
+def copy_indexes(cur, table, shadow):
+    cur.execute(
+        "SELECT indexdef FROM pg_indexes WHERE schemaname = %s AND tablename = %s",
+        (SOURCE_SCHEMA, table)
+    )
+    for (indexdef,) in cur.fetchall():
+        cur.execute(indexdef.replace(f" ON {SOURCE_SCHEMA}.", f" ON {shadow}.", 1))
+
+# --------------------------------------------------
+# Shadow refresh
+# --------------------------------------------------
+def rebuild_table(cur, table, shadow):
+    # indexes are built after the copy instead of maintained row by row
+    cur.execute(f"DROP TABLE IF EXISTS {shadow}.{table}")
+    cur.execute(f"CREATE TABLE {shadow}.{table} (LIKE {SOURCE_SCHEMA}.{table} INCLUDING ALL EXCLUDING INDEXES)")
+    cur.execute(f"INSERT INTO {shadow}.{table} SELECT * FROM {SOURCE_SCHEMA}.{table}")
+    rows = cur.rowcount
+    copy_indexes(cur, table, shadow)
+    return {"mode": "rebuilt", "rows_copied": rows}
+
+def append_table(cur, table, shadow, key):
+    cur.execute(f"SELECT COALESCE(MAX({key}), 0) FROM {shadow}.{table}")
+    shadow_max = cur.fetchone()[0]
+    cur.execute(f"SELECT COALESCE(MAX({key}), 0) FROM {SOURCE_SCHEMA}.{table}")
+    if shadow_max > cur.fetchone()[0]:
+        # the warehouse was rebuilt underneath: the shadow is not a prefix of it
+        return rebuild_table(cur, table, shadow)
+
+    cur.execute(f"INSERT INTO {shadow}.{table} SELECT * FROM {SOURCE_SCHEMA}.{table} WHERE {key} > %s", (shadow_max,))
+    return {"mode": "appended", "rows_copied": cur.rowcount}
+
+def refresh_shadow(conn, config):
+    cur = conn.cursor()
+    shadow = config["shadow"]
+    conn.set_session(isolation_level="REPEATABLE READ")
+
+    cur.execute("SET LOCAL synchronous_commit = off")
+    cur.execute("SET LOCAL maintenance_work_mem = %s", (config["maintenance_work_mem"],))
+
+    # the previous version is the cheapest starting point for the next one
+    if not schema_exists(cur, shadow):
+        if schema_exists(cur, config["previous"]):
+            cur.execute(f"ALTER SCHEMA {config['previous']} RENAME TO {shadow}")
+        else:
+            cur.execute(f"CREATE SCHEMA {shadow}")
+
+    tables = list_tables(cur, SOURCE_SCHEMA)
+    existing = set(list_tables(cur, shadow))
+    for table in existing - set(tables):
+        cur.execute(f"DROP TABLE {shadow}.{table}")
+
+    results = {}
+    for table in tables:
+        start = time.time()
+        key = APPEND_ONLY.get(table)
+        unchanged = table in existing and (
+            column_signature(cur, shadow, table) == column_signature(cur, SOURCE_SCHEMA, table)
+        )
+        if key and unchanged:
+            result = append_table(cur, table, shadow, key)
+        else:
+            result = rebuild_table(cur, table, shadow)
+        cur.execute(f"ANALYZE {shadow}.{table}")
+        result["seconds"] = round(time.time() - start, 2)
+        results[table] = result
+        print(f"Shadow {shadow}.{table}: {result['mode']}, {result['rows_copied']} rows in {result['seconds']}s")
+
+    for role in config["reader_roles"]:
+        cur.execute(f"GRANT USAGE ON SCHEMA {shadow} TO {role}")
+        cur.execute(f"GRANT SELECT ON ALL TABLES IN SCHEMA {shadow} TO {role}")
+
+    conn.commit()
+    conn.set_session(isolation_level="READ COMMITTED")
+    return results
+
+# --------------------------------------------------
+# Swap / rollback
+# --------------------------------------------------
+def record_publish(cur, action, fact_rows):
+    cur.execute("""
+        INSERT INTO monitoring.warehouse_publishes (execution_id, action, fact_rows)
+        VALUES (%s, %s, %s)
+        RETURNING version
+    """, (get_execution_id(), action, fact_rows))
+    return cur.fetchone()[0]
+
+def swap(conn, config):
+    cur = conn.cursor()
+    schema, shadow, previous = config["schema"], config["shadow"], config["previous"]
+
+    cur.execute(f"SELECT COUNT(*) FROM {shadow}.fact_sales")
+    fact_rows = cur.fetchone()[0]
+
+    # fail fast rather than queue behind (and in front of) other sessions
+    cur.execute(f"SET LOCAL lock_timeout = '{SWAP_LOCK_TIMEOUT}'")
+    cur.execute(f"DROP SCHEMA IF EXISTS {previous} CASCADE")
+    if schema_exists(cur, schema):
+        cur.execute(f"ALTER SCHEMA {schema} RENAME TO {previous}")
+    cur.execute(f"ALTER SCHEMA {shadow} RENAME TO {schema}")
+
+    version = record_publish(cur, "publish", fact_rows)
+    conn.commit()
+    return version
+
+def rollback(conn, config):
+    cur = conn.cursor()
+    schema, previous = config["schema"], config["previous"]
+    if not schema_exists(cur, previous):
+        raise RuntimeError(f"No previous version to roll back to ({previous} does not exist)")
+
+    cur.execute(f"SELECT COUNT(*) FROM {previous}.fact_sales")
+    fact_rows = cur.fetchone()[0]
+
+    cur.execute(f"SET LOCAL lock_timeout = '{SWAP_LOCK_TIMEOUT}'")
+    cur.execute(f"ALTER SCHEMA {schema} RENAME TO {schema}_rollback")
+    cur.execute(f"ALTER SCHEMA {previous} RENAME TO {schema}")
+    cur.execute(f"ALTER SCHEMA {schema}_rollback RENAME TO {previous}")
+
+    version = record_publish(cur, "rollback", fact_rows)
+    conn.commit()
+    return version
+
+# --------------------------------------------------
+# Main
+# --------------------------------------------------
+def publish_warehouse(rollback_only=False):
+    config = load_publish_config()
+    conn = get_conn()
+    conn.autocommit = False
+    start = time.time()
+    report = {
+        "publish_timestamp": datetime.now().isoformat(),
+        "execution_id": get_execution_id(),
+        "schema": config["schema"],
+        "action": "rollback" if rollback_only else "publish"
+    }
+
+    try:
+        if rollback_only:
+            report["version"] = rollback(conn, config)
+        else:
+            report["tables"] = refresh_shadow(conn, config)
+            swap_start = time.time()
+            report["version"] = swap(conn, config)
+            report["swap_seconds"] = round(time.time() - swap_start, 3)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    report["execution_time_seconds"] = round(time.time() - start, 2)
+    os.makedirs(os.path.dirname(REPORT_FILE), exist_ok=True)
+    with open(REPORT_FILE, "w") as f:
+        json.dump(report, f, indent=4)
+
+    if rollback_only:
+        print(f"Warehouse rolled back: {config['schema']} is the previous version again (version {report['version']})")
+    else:
+        print(
+            f"Warehouse published to {config['schema']} (version {report['version']}, "
+            f"swap {report['swap_seconds']}s, total {report['execution_time_seconds']}s)"
+        )
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Publish warehouse.* to the schema BI tools read")
+    parser.add_argument(
+        "--rollback",
+        action="store_true",
+        help="Swap the previously published version back in"
+    )
+    parser.add_argument("--profile", action="store_true")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from profiling import run_stage
+    run_stage("warehouse_publish", publish_warehouse, args.rollback, profile=args.profile)
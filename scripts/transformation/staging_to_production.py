@@ -1,18 +1,21 @@
-import psycopg2
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 import json
 import os
+import sys
+import time
+import argparse
+import threading
 
 # --------------------------------------------------
 # Output directory
 # --------------------------------------------------
 SUMMARY_DIR = "data/processed"
-os.makedirs(SUMMARY_DIR, exist_ok=True)
 
 # --------------------------------------------------
 # DB Connection (Docker-safe)
 # --------------------------------------------------
 def get_conn():
+    import psycopg2
     return psycopg2.connect(
         host=os.environ.get("DB_HOST", "postgres"),
         port=int(os.environ.get("DB_PORT", 5432)),
@@ -22,15 +25,199 @@ def get_conn():
     )
 
 # --------------------------------------------------
-# Main ETL
+# Load statistics (read by pipeline_monitor instead of scanning tables)
 # --------------------------------------------------
-def staging_to_production():
-    conn = get_conn()
-    cur = conn.cursor()
-    conn.autocommit = False
+STAGE_NAME = "staging_to_production"
+
+def get_execution_id():
+    return os.environ.get(
+        "PIPELINE_EXECUTION_ID",
+        f"MANUAL_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    )
+
+def record_load_stats(cur, execution_id, table, rows_loaded, max_business_date=None, stage=STAGE_NAME):
+    cur.execute("""
+        INSERT INTO monitoring.load_stats (
+            execution_id, stage, table_name, rows_loaded, max_business_date
+        )
+        VALUES (%s, %s, %s, %s, %s)
+    """, (execution_id, stage, table, rows_loaded, max_business_date))
+
+def reset_daily_counts(cur, table):
+    cur.execute("DELETE FROM monitoring.daily_counts WHERE table_name = %s", (table,))
+
+# --------------------------------------------------
+# Staging batches (registered by ingest_to_staging / generate_to_staging)
+#
+# A re-delivered batch leaves staging as it was, so when the latest batch is
+# already loaded there is nothing new to publish. Staging loads from before
+# monitoring.staging_batches existed have no row and are always loaded.
+# --------------------------------------------------
+def latest_staging_batch(cur):
+    cur.execute("""
+        SELECT execution_id, status
+        FROM monitoring.staging_batches
+        ORDER BY staged_at DESC
+        LIMIT 1
+    """)
+    return cur.fetchone()
+
+def mark_batch_loaded(cur, execution_id):
+    cur.execute("""
+        UPDATE monitoring.staging_batches
+        SET status = 'loaded', loaded_at = CURRENT_TIMESTAMP
+        WHERE execution_id = %s
+    """, (execution_id,))
+
+# --------------------------------------------------
+# Surrogate keys (production.key_map)
+#
+# Natural ids are mapped to integer keys once, on first sight; after that
+# the dedup anti-joins and foreign keys compare integers. Referenced ids
+# (a transaction's customer, an item's product) are assigned too, so an
+# unknown parent still fails its foreign key instead of loading as NULL.
+# Keys are inserted in natural-key order, so parallel chunk loads that
+# meet the same new id lock it in the same order.
+# --------------------------------------------------
+def assign_keys(cur, entity, source, column):
+    cur.execute(f"""
+        INSERT INTO production.key_map (entity, natural_key)
+        SELECT DISTINCT %s::VARCHAR, s.{column}
+        FROM {source} s
+        WHERE s.{column} IS NOT NULL
+        ORDER BY 2
+        ON CONFLICT (entity, natural_key) DO NOTHING
+    """, (entity,))
+
+def resolve_keys(cur, entity, natural_keys):
+    """natural id -> surrogate key for a batch of ids, assigning missing ones."""
+    natural_keys = sorted({k for k in natural_keys if k is not None})
+    cur.execute("""
+        INSERT INTO production.key_map (entity, natural_key)
+        SELECT %s, k FROM unnest(%s::text[]) AS k
+        ORDER BY k
+        ON CONFLICT (entity, natural_key) DO NOTHING
+    """, (entity, natural_keys))
+    cur.execute("""
+        SELECT natural_key, surrogate_key
+        FROM production.key_map
+        WHERE entity = %s AND natural_key = ANY(%s::text[])
+    """, (entity, natural_keys))
+    return dict(cur.fetchall())
+
+# --------------------------------------------------
+# Incremental fact loads (also used per micro-batch by streaming/stream_ingest.py)
+# --------------------------------------------------
+def load_transactions(cur, source="staging.transactions"):
+    assign_keys(cur, "transaction", source, "transaction_id")
+    assign_keys(cur, "customer", source, "customer_id")
 
-    summary = {
+    # Per-day counts are derived from the RETURNING rows of this insert,
+    # i.e. only from the new delta, never from the whole table
+    cur.execute(f"""
+        WITH inserted AS (
+            INSERT INTO production.transactions (
+                transaction_key, transaction_id, customer_key, customer_id,
+                transaction_date, transaction_time,
+                payment_method, shipping_address, total_amount
+            )
+            SELECT
+                tk.surrogate_key,
+                s.transaction_id,
+                ck.surrogate_key,
+                s.customer_id,
+                s.transaction_date,
+                s.transaction_time,
+                s.payment_method,
+                s.shipping_address,
+                s.total_amount
+            FROM {source} s
+            JOIN production.key_map tk
+            ON tk.entity = 'transaction' AND tk.natural_key = s.transaction_id
+            LEFT JOIN production.key_map ck
+            ON ck.entity = 'customer' AND ck.natural_key = s.customer_id
+            LEFT JOIN production.transactions p
+            ON p.transaction_key = tk.surrogate_key
+            WHERE p.transaction_key IS NULL
+              AND s.total_amount > 0
+            RETURNING transaction_date
+        ),
+        daily AS (
+            INSERT INTO monitoring.daily_counts (table_name, stat_date, row_count)
+            SELECT 'production.transactions', transaction_date, COUNT(*)
+            FROM inserted
+            GROUP BY transaction_date
+            ON CONFLICT (table_name, stat_date) DO UPDATE
+            SET row_count = monitoring.daily_counts.row_count + EXCLUDED.row_count,
+                updated_at = CURRENT_TIMESTAMP
+        )
+        SELECT COUNT(*), MAX(transaction_date) FROM inserted
+    """)
+    return cur.fetchone()
+
+def load_transaction_items(cur, source="staging.transaction_items"):
+    assign_keys(cur, "item", source, "item_id")
+    assign_keys(cur, "transaction", source, "transaction_id")
+    assign_keys(cur, "product", source, "product_id")
+
+    cur.execute(f"""
+        INSERT INTO production.transaction_items (
+            item_key, item_id, transaction_key, transaction_id, product_key, product_id,
+            quantity, unit_price, discount_percentage, line_total
+        )
+        SELECT
+            ik.surrogate_key,
+            s.item_id,
+            tk.surrogate_key,
+            s.transaction_id,
+            pk.surrogate_key,
+            s.product_id,
+            s.quantity,
+            ROUND(s.unit_price::numeric, 2),
+            s.discount_percentage,
+            ROUND(
+                s.quantity * s.unit_price * (1 - s.discount_percentage / 100),
+                2
+            )
+        FROM {source} s
+        JOIN production.key_map ik
+        ON ik.entity = 'item' AND ik.natural_key = s.item_id
+        LEFT JOIN production.key_map tk
+        ON tk.entity = 'transaction' AND tk.natural_key = s.transaction_id
+        LEFT JOIN production.key_map pk
+        ON pk.entity = 'product' AND pk.natural_key = s.product_id
+        LEFT JOIN production.transaction_items p
+        ON p.item_key = ik.surrogate_key
+        WHERE p.item_key IS NULL
+          AND s.quantity > 0
+    """)
+    return cur.rowcount
+
+# --------------------------------------------------
+# Streamed events
+#
+# stream_ingest.py writes micro-batches straight into production and keeps
+# every event in staging.stream_* (pruned by retention). A batch reload's
+# TRUNCATE production.customers CASCADE removes those rows from production,
+# so every reload re-reads them; the dedup in load_transactions /
+# load_transaction_items skips events that the batch itself contains.
+# --------------------------------------------------
+STREAM_TRANSACTIONS = "staging.stream_transactions"
+STREAM_TRANSACTION_ITEMS = "staging.stream_transaction_items"
+
+def reload_streamed_events(cur):
+    txn_inserted, _ = load_transactions(cur, STREAM_TRANSACTIONS)
+    items_inserted = load_transaction_items(cur, STREAM_TRANSACTION_ITEMS)
+    return {"transactions": txn_inserted, "transaction_items": items_inserted}
+
+# --------------------------------------------------
+# Main ETL
+# --------------------------------------------------
+def new_summary():
+    return {
         "transformation_timestamp": datetime.now(timezone.utc).isoformat(),
+        "staging_batch": None,
+        "no_op": False,
         "records_processed": {},
         "transformations_applied": [
             "trim_text_fields",
@@ -47,159 +234,393 @@ def staging_to_production():
         }
     }
 
+def load_dimensions(cur, execution_id, summary):
+    # ==================================================
+    # 1️⃣ CUSTOMERS (FULL TRUNCATE & RELOAD)
+    # ==================================================
+    cur.execute("SELECT COUNT(*) FROM staging.customers")
+    input_count = cur.fetchone()[0]
+
+    cur.execute("TRUNCATE production.customers CASCADE")
+
+    # CASCADE also empties production.transactions, so its per-day
+    # counts start from zero again in this same transaction
+    reset_daily_counts(cur, "production.transactions")
+
+    assign_keys(cur, "customer", "staging.customers", "customer_id")
+    cur.execute("""
+        INSERT INTO production.customers (
+            customer_key, customer_id, first_name, last_name, email, phone,
+            registration_date, city, state, country, age_group
+        )
+        SELECT
+            k.surrogate_key,
+            s.customer_id,
+            INITCAP(TRIM(s.first_name)),
+            INITCAP(TRIM(s.last_name)),
+            LOWER(TRIM(s.email)),
+            REGEXP_REPLACE(s.phone, '[^0-9]', '', 'g'),
+            s.registration_date,
+            TRIM(s.city),
+            TRIM(s.state),
+            TRIM(s.country),
+            TRIM(s.age_group)
+        FROM staging.customers s
+        JOIN production.key_map k
+        ON k.entity = 'customer' AND k.natural_key = s.customer_id
+        WHERE s.email IS NOT NULL
+    """)
+
+    cur.execute("SELECT COUNT(*) FROM production.customers")
+    output_count = cur.fetchone()[0]
+    record_load_stats(cur, execution_id, "production.customers", output_count)
+
+    summary["records_processed"]["customers"] = {
+        "input": input_count,
+        "output": output_count,
+        "filtered": input_count - output_count,
+        "rejected_reasons": {"null_email": input_count - output_count}
+    }
+
+    # ==================================================
+    # 2️⃣ PRODUCTS (FULL TRUNCATE & RELOAD)
+    # ==================================================
+    cur.execute("SELECT COUNT(*) FROM staging.products")
+    input_count = cur.fetchone()[0]
+
+    cur.execute("TRUNCATE production.products CASCADE")
+
+    assign_keys(cur, "product", "staging.products", "product_id")
+    cur.execute("""
+        INSERT INTO production.products (
+            product_key, product_id, product_name, category, sub_category,
+            price, cost, brand, stock_quantity, supplier_id,
+            profit_margin, price_category
+        )
+        SELECT
+            k.surrogate_key,
+            s.product_id,
+            INITCAP(TRIM(s.product_name)),
+            TRIM(s.category),
+            TRIM(s.sub_category),
+            ROUND(s.price::numeric, 2),
+            ROUND(s.cost::numeric, 2),
+            TRIM(s.brand),
+            s.stock_quantity,
+            s.supplier_id,
+            ROUND(((s.price - s.cost) / s.price) * 100, 2) AS profit_margin,
+            CASE
+                WHEN s.price < 50 THEN 'Budget'
+                WHEN s.price >= 50 AND s.price < 200 THEN 'Mid-range'
+                ELSE 'Premium'
+            END AS price_category
+        FROM staging.products s
+        JOIN production.key_map k
+        ON k.entity = 'product' AND k.natural_key = s.product_id
+        WHERE s.price > 0 AND s.cost < s.price
+    """)
+
+    cur.execute("SELECT COUNT(*) FROM production.products")
+    output_count = cur.fetchone()[0]
+    record_load_stats(cur, execution_id, "production.products", output_count)
+
+    summary["records_processed"]["products"] = {
+        "input": input_count,
+        "output": output_count,
+        "filtered": input_count - output_count,
+        "rejected_reasons": {"invalid_price_or_cost": input_count - output_count}
+    }
+
+def load_facts(cur, execution_id, summary):
+    # ==================================================
+    # 3️⃣ TRANSACTIONS (INCREMENTAL LOAD)
+    # ==================================================
+    txn_inserted, txn_max_date = load_transactions(cur)
+    record_load_stats(cur, execution_id, "production.transactions", txn_inserted, txn_max_date)
+
+    cur.execute("SELECT COUNT(*) FROM production.transactions")
+    txn_count = cur.fetchone()[0]
+
+    summary["records_processed"]["transactions"] = {
+        "input": "incremental",
+        "output": txn_count,
+        "filtered": 0,
+        "rejected_reasons": {}
+    }
+
+    # ==================================================
+    # 4️⃣ TRANSACTION ITEMS (INCREMENTAL LOAD)
+    # ==================================================
+    items_inserted = load_transaction_items(cur)
+    record_load_stats(cur, execution_id, "production.transaction_items", items_inserted)
+
+    cur.execute("SELECT COUNT(*) FROM production.transaction_items")
+    item_count = cur.fetchone()[0]
+
+    summary["records_processed"]["transaction_items"] = {
+        "input": "incremental",
+        "output": item_count,
+        "filtered": 0,
+        "rejected_reasons": {}
+    }
+
+    summary["streamed_events_reloaded"] = reload_streamed_events(cur)
+
+def staging_to_production():
+    conn = get_conn()
+    cur = conn.cursor()
+    conn.autocommit = False
+    execution_id = get_execution_id()
+    summary = new_summary()
+
     try:
-        # ==================================================
-        # 1️⃣ CUSTOMERS (FULL TRUNCATE & RELOAD)
-        # ==================================================
-        cur.execute("SELECT COUNT(*) FROM staging.customers")
-        input_count = cur.fetchone()[0]
-
-        cur.execute("TRUNCATE production.customers CASCADE")
-
-        cur.execute("""
-            INSERT INTO production.customers (
-                customer_id, first_name, last_name, email, phone,
-                registration_date, city, state, country, age_group
-            )
-            SELECT
-                customer_id,
-                INITCAP(TRIM(first_name)),
-                INITCAP(TRIM(last_name)),
-                LOWER(TRIM(email)),
-                REGEXP_REPLACE(phone, '[^0-9]', '', 'g'),
-                registration_date,
-                TRIM(city),
-                TRIM(state),
-                TRIM(country),
-                TRIM(age_group)
-            FROM staging.customers
-            WHERE email IS NOT NULL
-        """)
-
-        cur.execute("SELECT COUNT(*) FROM production.customers")
-        output_count = cur.fetchone()[0]
-
-        summary["records_processed"]["customers"] = {
-            "input": input_count,
-            "output": output_count,
-            "filtered": input_count - output_count,
-            "rejected_reasons": {"null_email": input_count - output_count}
-        }
+        batch = latest_staging_batch(cur)
+        summary["staging_batch"] = batch[0] if batch else None
 
-        # ==================================================
-        # 2️⃣ PRODUCTS (FULL TRUNCATE & RELOAD)
-        # ==================================================
-        cur.execute("SELECT COUNT(*) FROM staging.products")
-        input_count = cur.fetchone()[0]
+        if batch and batch[1] == "loaded":
+            summary["no_op"] = True
+        else:
+            load_dimensions(cur, execution_id, summary)
+            load_facts(cur, execution_id, summary)
+            if batch:
+                mark_batch_loaded(cur, batch[0])
+        conn.commit()
 
-        cur.execute("TRUNCATE production.products CASCADE")
+    except Exception as e:
+        conn.rollback()
+        raise e
 
-        cur.execute("""
-            INSERT INTO production.products (
-                product_id, product_name, category, sub_category,
-                price, cost, brand, stock_quantity, supplier_id,
-                profit_margin, price_category
-            )
-            SELECT
-                product_id,
-                INITCAP(TRIM(product_name)),
-                TRIM(category),
-                TRIM(sub_category),
-                ROUND(price::numeric, 2),
-                ROUND(cost::numeric, 2),
-                TRIM(brand),
-                stock_quantity,
-                supplier_id,
-                ROUND(((price - cost) / price) * 100, 2) AS profit_margin,
-                CASE
-                    WHEN price < 50 THEN 'Budget'
-                    WHEN price >= 50 AND price < 200 THEN 'Mid-range'
-                    ELSE 'Premium'
-                END AS price_category
-            FROM staging.products
-            WHERE price > 0 AND cost < price
-        """)
-
-        cur.execute("SELECT COUNT(*) FROM production.products")
-        output_count = cur.fetchone()[0]
-
-        summary["records_processed"]["products"] = {
-            "input": input_count,
-            "output": output_count,
-            "filtered": input_count - output_count,
-            "rejected_reasons": {"invalid_price_or_cost": input_count - output_count}
-        }
+    finally:
+        conn.close()
 
-        # ==================================================
-        # 3️⃣ TRANSACTIONS (INCREMENTAL LOAD)
-        # ==================================================
-        cur.execute("""
-            INSERT INTO production.transactions (
-                transaction_id, customer_id,
-                transaction_date, transaction_time,
-                payment_method, shipping_address, total_amount
-            )
-            SELECT
-                s.transaction_id,
-                s.customer_id,
-                s.transaction_date,
-                s.transaction_time,
-                s.payment_method,
-                s.shipping_address,
-                s.total_amount
-            FROM staging.transactions s
-            LEFT JOIN production.transactions p
-            ON s.transaction_id = p.transaction_id
-            WHERE p.transaction_id IS NULL
-              AND s.total_amount > 0
-        """)
+    write_summary(summary)
+    print_result(summary)
 
-        cur.execute("SELECT COUNT(*) FROM production.transactions")
-        txn_count = cur.fetchone()[0]
+def print_result(summary):
+    if summary["no_op"]:
+        print(f" Staging batch {summary['staging_batch']} is already in production, nothing to load")
+    else:
+        print(" Staging  Production transformation completed successfully")
 
-        summary["records_processed"]["transactions"] = {
-            "input": "incremental",
-            "output": txn_count,
-            "filtered": 0,
-            "rejected_reasons": {}
-        }
+def write_summary(summary):
+    os.makedirs(SUMMARY_DIR, exist_ok=True)
+    with open(f"{SUMMARY_DIR}/transformation_summary.json", "w") as f:
+        json.dump(summary, f, indent=4, default=str)
+
+# --------------------------------------------------
+# Chunked mode (backfills)
+#
+# Dimensions are reloaded in one short transaction, then the fact tables are
+# loaded one transaction_date range at a time: transactions and their items
+# commit together with the chunk's row in monitoring.transform_progress, so
+# a rerun with the same run id (the orchestrator retries with the same
+# PIPELINE_EXECUTION_ID) skips everything already committed. Date ranges are
+# disjoint, so chunks can run on several connections at once.
+# --------------------------------------------------
+DEFAULT_TRANSFORM_CONFIG = {"mode": "single", "chunk_days": 7, "workers": 1}
+DIMENSIONS_CHUNK = "dimensions"
+UNDATED_CHUNK = "undated"
+
+def load_transform_config():
+    import yaml
+    with open("config/config.yaml", "r") as f:
+        return dict(DEFAULT_TRANSFORM_CONFIG, **(yaml.safe_load(f).get("transform") or {}))
+
+# Built here rather than in the DDL so the staging COPY never maintains
+# them; ingest_to_staging.prepare_staging_load drops them before each load
+CHUNK_INDEXES = {
+    "idx_staging_transactions_date": "staging.transactions (transaction_date)",
+    "idx_staging_transaction_items_transaction": "staging.transaction_items (transaction_id)"
+}
+
+def create_chunk_indexes(cur):
+    for name, target in CHUNK_INDEXES.items():
+        cur.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {target}")
+    # freshly loaded tables have no statistics until autovacuum gets to them
+    cur.execute("ANALYZE staging.transactions, staging.transaction_items")
 
-        # ==================================================
-        # 4️⃣ TRANSACTION ITEMS (INCREMENTAL LOAD)
-        # ==================================================
-        cur.execute("""
-            INSERT INTO production.transaction_items (
-                item_id, transaction_id, product_id,
-                quantity, unit_price, discount_percentage, line_total
+def plan_chunks(cur, chunk_days):
+    cur.execute("SELECT MIN(transaction_date), MAX(transaction_date) FROM staging.transactions")
+    first_day, last_day = cur.fetchone()
+
+    chunks = []
+    day = first_day
+    while day is not None and day <= last_day:
+        end = min(day + timedelta(days=chunk_days), last_day + timedelta(days=1))
+        chunks.append((f"{day}..{end - timedelta(days=1)}", day, end))
+        day = end
+
+    # NULL dates, and items whose transaction is not in this staging batch
+    chunks.append((UNDATED_CHUNK, None, None))
+    return chunks
+
+def chunk_sources(cur, start, end):
+    """Staging subqueries for one chunk, usable as load_transactions/load_transaction_items sources."""
+    if start is None:
+        transactions = "(SELECT * FROM staging.transactions WHERE transaction_date IS NULL)"
+        items = """(
+            SELECT i.* FROM staging.transaction_items i
+            WHERE NOT EXISTS (
+                SELECT 1 FROM staging.transactions t
+                WHERE t.transaction_id = i.transaction_id AND t.transaction_date IS NOT NULL
             )
-            SELECT
-                s.item_id,
-                s.transaction_id,
-                s.product_id,
-                s.quantity,
-                ROUND(s.unit_price::numeric, 2),
-                s.discount_percentage,
-                ROUND(
-                    s.quantity * s.unit_price * (1 - s.discount_percentage / 100),
-                    2
-                )
-            FROM staging.transaction_items s
-            LEFT JOIN production.transaction_items p
-            ON s.item_id = p.item_id
-            WHERE p.item_id IS NULL
-              AND s.quantity > 0
-        """)
-
-        cur.execute("SELECT COUNT(*) FROM production.transaction_items")
-        item_count = cur.fetchone()[0]
-
-        summary["records_processed"]["transaction_items"] = {
-            "input": "incremental",
-            "output": item_count,
-            "filtered": 0,
-            "rejected_reasons": {}
+        )"""
+        return transactions, items
+
+    transactions = cur.mogrify("""(
+        SELECT * FROM staging.transactions
+        WHERE transaction_date >= %s AND transaction_date < %s
+    )""", (start, end)).decode()
+    items = cur.mogrify("""(
+        SELECT i.* FROM staging.transaction_items i
+        WHERE EXISTS (
+            SELECT 1 FROM staging.transactions t
+            WHERE t.transaction_id = i.transaction_id
+              AND t.transaction_date >= %s AND t.transaction_date < %s
+        )
+    )""", (start, end)).decode()
+    return transactions, items
+
+def completed_chunks(cur, run_id):
+    cur.execute("""
+        SELECT chunk_name, transactions_loaded, items_loaded
+        FROM monitoring.transform_progress
+        WHERE run_id = %s AND status = 'completed'
+    """, (run_id,))
+    return {name: (transactions, items) for name, transactions, items in cur.fetchall()}
+
+def save_progress(cur, run_id, chunk_name, start, end, status,
+                  transactions_loaded=0, items_loaded=0, error_message=None):
+    cur.execute("""
+        INSERT INTO monitoring.transform_progress (
+            run_id, chunk_name, chunk_start, chunk_end, status,
+            transactions_loaded, items_loaded, attempts, error_message, completed_at
+        )
+        VALUES (%s, %s, %s, %s, %s, %s, %s, 1, %s,
+                CASE WHEN %s = 'completed' THEN CURRENT_TIMESTAMP END)
+        ON CONFLICT (run_id, chunk_name) DO UPDATE
+        SET status = EXCLUDED.status,
+            transactions_loaded = EXCLUDED.transactions_loaded,
+            items_loaded = EXCLUDED.items_loaded,
+            attempts = monitoring.transform_progress.attempts + 1,
+            error_message = EXCLUDED.error_message,
+            completed_at = EXCLUDED.completed_at
+    """, (run_id, chunk_name, start, end, status,
+          transactions_loaded, items_loaded, error_message, status))
+
+def run_chunk(conn, run_id, execution_id, chunk):
+    name, start, end = chunk
+    cur = conn.cursor()
+    chunk_start = time.time()
+
+    try:
+        transactions_source, items_source = chunk_sources(cur, start, end)
+        txn_inserted, txn_max_date = load_transactions(cur, transactions_source)
+        items_inserted = load_transaction_items(cur, items_source)
+
+        record_load_stats(cur, execution_id, "production.transactions", txn_inserted, txn_max_date)
+        record_load_stats(cur, execution_id, "production.transaction_items", items_inserted)
+        save_progress(cur, run_id, name, start, end, "completed", txn_inserted, items_inserted)
+        conn.commit()
+
+        return {
+            "chunk": name,
+            "status": "completed",
+            "transactions_loaded": txn_inserted,
+            "items_loaded": items_inserted,
+            "execution_time_seconds": round(time.time() - chunk_start, 2)
         }
 
+    except Exception as e:
+        # the failure may have broken the connection; recording it must not
+        # replace the original error
+        try:
+            conn.rollback()
+            save_progress(cur, run_id, name, start, end, "failed", error_message=str(e))
+            conn.commit()
+        except Exception as progress_error:
+            print(f" Could not record the failure of chunk {name}: {progress_error}")
+        raise
+
+def run_chunks(run_id, execution_id, chunks, workers):
+    """Each worker owns one connection and takes chunks in date order until
+    none are left; after a failure no new chunks are started."""
+    import queue
+
+    pending = queue.Queue()
+    for chunk in chunks:
+        pending.put(chunk)
+
+    results = []
+    failed = threading.Event()
+
+    def worker():
+        conn = get_conn()
+        conn.autocommit = False
+        try:
+            while not failed.is_set():
+                try:
+                    chunk = pending.get_nowait()
+                except queue.Empty:
+                    return
+                try:
+                    result = run_chunk(conn, run_id, execution_id, chunk)
+                except Exception as e:
+                    result = {"chunk": chunk[0], "status": "failed", "error_message": str(e)}
+                results.append(result)
+                if result["status"] == "failed":
+                    failed.set()
+        finally:
+            conn.close()
+
+    threads = [threading.Thread(target=worker) for _ in range(max(1, min(workers, len(chunks))))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return results
+
+def staging_to_production_chunked(run_id=None, chunk_days=None, workers=None):
+    config = load_transform_config()
+    chunk_days = chunk_days or config["chunk_days"]
+    workers = workers or config["workers"]
+    execution_id = get_execution_id()
+    run_id = run_id or execution_id
+
+    start_time = time.time()
+    summary = new_summary()
+    summary["mode"] = "chunked"
+    summary["run_id"] = run_id
+
+    conn = get_conn()
+    cur = conn.cursor()
+    conn.autocommit = False
+
+    try:
+        batch = latest_staging_batch(cur)
+        summary["staging_batch"] = batch[0] if batch else None
+        completed = completed_chunks(cur, run_id)
+
+        if batch and batch[1] == "loaded" and not completed:
+            summary["no_op"] = True
+            conn.commit()
+            write_summary(summary)
+            print_result(summary)
+            return
+
+        # reloading dimensions truncates the facts (CASCADE), so on resume
+        # it must not run again
+        if DIMENSIONS_CHUNK in completed:
+            summary["dimensions_reloaded"] = False
+        else:
+            load_dimensions(cur, execution_id, summary)
+            summary["dimensions_reloaded"] = True
+            save_progress(cur, run_id, DIMENSIONS_CHUNK, None, None, "completed")
+            conn.commit()
+
+        create_chunk_indexes(cur)
+        chunks = [c for c in plan_chunks(cur, chunk_days) if c[0] not in completed]
         conn.commit()
 
     except Exception as e:
@@ -209,11 +630,75 @@ def staging_to_production():
     finally:
         conn.close()
 
-    with open(f"{SUMMARY_DIR}/transformation_summary.json", "w") as f:
-        json.dump(summary, f, indent=4)
+    results = run_chunks(run_id, execution_id, chunks, workers)
+    failures = [r for r in results if r["status"] == "failed"]
+
+    loaded = [r for r in results if r["status"] == "completed"]
+    previous = [v for k, v in completed.items() if k != DIMENSIONS_CHUNK]
+    summary["records_processed"]["transactions"] = {
+        "input": "incremental",
+        "output": sum(r["transactions_loaded"] for r in loaded) + sum(t for t, _ in previous),
+        "filtered": 0,
+        "rejected_reasons": {}
+    }
+    summary["records_processed"]["transaction_items"] = {
+        "input": "incremental",
+        "output": sum(r["items_loaded"] for r in loaded) + sum(i for _, i in previous),
+        "filtered": 0,
+        "rejected_reasons": {}
+    }
+    summary["chunks"] = {
+        "chunk_days": chunk_days,
+        "workers": workers,
+        "planned": len(chunks) + len(previous),
+        "resumed_from_earlier_attempts": len(previous),
+        "completed": len(loaded),
+        "failed": len(failures),
+        "not_started": len(chunks) - len(results),
+        "results": sorted(results, key=lambda r: r["chunk"])
+    }
+    summary["total_execution_time_seconds"] = round(time.time() - start_time, 2)
+    write_summary(summary)
 
-    print(" Staging  Production transformation completed successfully")
+    if failures:
+        raise RuntimeError(
+            f"{len(failures)} chunk(s) failed, first: {failures[0]['chunk']}: {failures[0]['error_message']}. "
+            f"Rerun with --run-id {run_id} to resume."
+        )
+
+    # after every chunk, so the streamed events are checked against the whole
+    # batch; idempotent, so a resumed run simply repeats it
+    conn = get_conn()
+    try:
+        cur = conn.cursor()
+        summary["streamed_events_reloaded"] = reload_streamed_events(cur)
+        if batch and batch[1] != "loaded":
+            mark_batch_loaded(cur, batch[0])
+        conn.commit()
+    finally:
+        conn.close()
+    write_summary(summary)
+
+    print_result(summary)
 
 # --------------------------------------------------
+def parse_args():
+    parser = argparse.ArgumentParser(description="Transform staging into production")
+    parser.add_argument("--chunked", action="store_true", help="Force chunked mode (transform.mode in config.yaml)")
+    parser.add_argument("--chunk-days", type=int, help="Days of transaction_date per chunk")
+    parser.add_argument("--workers", type=int, help="Connections loading chunks in parallel")
+    parser.add_argument("--run-id", help="Resume this run's progress (default: PIPELINE_EXECUTION_ID)")
+    parser.add_argument("--profile", action="store_true")
+    return parser.parse_args()
+
+def main(args):
+    if args.chunked or args.run_id or load_transform_config()["mode"] == "chunked":
+        staging_to_production_chunked(args.run_id, args.chunk_days, args.workers)
+    else:
+        staging_to_production()
+
 if __name__ == "__main__":
-    staging_to_production()
+    args = parse_args()
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from profiling import run_stage
+    run_stage("staging_to_production", main, args, profile=args.profile)
@@ -0,0 +1,218 @@
+import os
+import json
+import argparse
+from datetime import date
+
+from hll import HyperLogLog, RELATIVE_STANDARD_ERROR
+
+# --------------------------------------------------
+# Unique transaction / customer counts per period
+#
+# Default: merge the daily HyperLogLog sketches in warehouse.daily_sketches
+# (cost ~ number of days, error bound in hll.py). exact=True falls back to
+# COUNT(DISTINCT) over fact_sales for audits or small ranges. The sketches
+# cover every category, so a category filter is always counted exactly.
+# schema selects another copy of the warehouse, e.g. the published one.
+# --------------------------------------------------
+GRAINS = ["day", "month", "quarter", "range"]
+
+EXACT_GROUP_COLUMNS = {
+    "day": ["d.full_date"],
+    "month": ["d.year", "d.month"],
+    "quarter": ["d.year", "d.quarter"],
+    "range": []
+}
+
+def get_conn():
+    import psycopg2
+    return psycopg2.connect(
+        host=os.environ.get("DB_HOST", "postgres"),
+        port=int(os.environ.get("DB_PORT", 5432)),
+        dbname=os.environ.get("DB_NAME", "ecommerce_db"),
+        user=os.environ.get("DB_USER", "admin"),
+        password=os.environ.get("DB_PASSWORD", "password")
+    )
+
+def date_key(day):
+    return int(day.strftime("%Y%m%d")) if day else None
+
+def period_of(day, grain):
+    if grain == "day":
+        return {"date": day.isoformat()}
+    if grain == "month":
+        return {"year": day.year, "month": day.month}
+    if grain == "quarter":
+        return {"year": day.year, "quarter": (day.month - 1) // 3 + 1}
+    return {}
+
+def sketch_unique_counts(conn, grain="month", start=None, end=None, schema="warehouse"):
+    with conn.cursor() as cur:
+        cur.execute(f"""
+            SELECT TO_DATE(date_key::TEXT, 'YYYYMMDD'), transactions_hll, customers_hll
+            FROM {schema}.daily_sketches
+            WHERE (%(start)s IS NULL OR date_key >= %(start)s)
+              AND (%(end)s IS NULL OR date_key <= %(end)s)
+            ORDER BY date_key;
+        """, {"start": date_key(start), "end": date_key(end)})
+        rows = cur.fetchall()
+
+    merged = {}
+    for day, transactions_hll, customers_hll in rows:
+        period = period_of(day, grain)
+        key = tuple(period.values())
+        transactions = HyperLogLog.from_bytes(transactions_hll)
+        customers = HyperLogLog.from_bytes(customers_hll)
+
+        if key in merged:
+            merged[key][1].merge(transactions)
+            merged[key][2].merge(customers)
+        else:
+            merged[key] = (period, transactions, customers)
+
+    return [
+        dict(period, unique_transactions=t.estimate(), unique_customers=c.estimate())
+        for period, t, c in merged.values()
+    ]
+
+def exact_unique_counts(conn, grain="month", start=None, end=None, schema="warehouse", category=None):
+    columns = EXACT_GROUP_COLUMNS[grain]
+    select = "".join(f"{c}, " for c in columns)
+    group_by = f"GROUP BY {', '.join(columns)} ORDER BY {', '.join(columns)}" if columns else ""
+
+    with conn.cursor() as cur:
+        cur.execute(f"""
+            SELECT {select}
+                   COUNT(DISTINCT fs.transaction_key),
+                   COUNT(DISTINCT dc.customer_id)
+            FROM {schema}.fact_sales fs
+            JOIN {schema}.dim_date d ON d.date_key = fs.date_key
+            JOIN {schema}.dim_customers dc ON dc.customer_key = fs.customer_key
+            WHERE (%(start)s IS NULL OR fs.date_key >= %(start)s)
+              AND (%(end)s IS NULL OR fs.date_key <= %(end)s)
+              AND (%(category)s IS NULL OR fs.product_key IN (
+                  SELECT product_key FROM {schema}.dim_products WHERE category = %(category)s
+              ))
+            {group_by};
+        """, {"start": date_key(start), "end": date_key(end), "category": category})
+        rows = cur.fetchall()
+
+    results = []
+    for row in rows:
+        period = dict(zip([c.split(".")[1] for c in columns], row[:len(columns)]))
+        if "full_date" in period:
+            period = {"date": period["full_date"].isoformat()}
+        results.append(dict(period, unique_transactions=row[-2], unique_customers=row[-1]))
+    return results
+
+def unique_counts(conn, grain="month", start=None, end=None, exact=False, schema="warehouse", category=None):
+    if exact or category is not None:
+        return exact_unique_counts(conn, grain, start, end, schema, category)
+    return sketch_unique_counts(conn, grain, start, end, schema)
+
+def compare(conn, grain, start, end):
+    """Sketch estimates next to exact counts, with the relative error of each."""
+    exact = {
+        tuple(v for k, v in r.items() if not k.startswith("unique_")): r
+        for r in exact_unique_counts(conn, grain, start, end)
+    }
+    results = []
+    for estimate in sketch_unique_counts(conn, grain, start, end):
+        key = tuple(v for k, v in estimate.items() if not k.startswith("unique_"))
+        actual = exact.get(key)
+        if actual is None:
+            continue
+        row = dict(estimate)
+        for metric in ["unique_transactions", "unique_customers"]:
+            row[f"{metric}_exact"] = actual[metric]
+            row[f"{metric}_error_pct"] = (
+                round((estimate[metric] - actual[metric]) / actual[metric] * 100, 3)
+                if actual[metric] else None
+            )
+        results.append(row)
+    return results
+
+# --------------------------------------------------
+# Rebuild from fact_sales
+#
+# load_warehouse.py only sketches the rows it loads, so days loaded before
+# daily_sketches existed have no sketch (or, if later rows arrived, one that
+# misses the older rows). --rebuild sketches every day that has fact rows but
+# no sketch; --rebuild-all rebuilds every day. Memory is one sketch pair per
+# day; the rows are streamed through a server-side cursor.
+# --------------------------------------------------
+REBUILD_BATCH_SIZE = 100000
+
+def rebuild_daily_sketches(conn, missing_only=True, schema="warehouse"):
+    from psycopg2.extras import execute_values
+
+    missing = f"""
+        AND NOT EXISTS (SELECT 1 FROM {schema}.daily_sketches s WHERE s.date_key = fs.date_key)
+    """ if missing_only else ""
+
+    sketches = {}
+    with conn.cursor(name="daily_sketch_rebuild") as source:
+        source.itersize = REBUILD_BATCH_SIZE
+        source.execute(f"""
+            SELECT fs.date_key, fs.transaction_id, dc.customer_id
+            FROM {schema}.fact_sales fs
+            LEFT JOIN {schema}.dim_customers dc ON dc.customer_key = fs.customer_key
+            WHERE fs.date_key IS NOT NULL {missing};
+        """)
+        while True:
+            rows = source.fetchmany(REBUILD_BATCH_SIZE)
+            if not rows:
+                break
+            for day_key, transaction_id, customer_id in rows:
+                if day_key not in sketches:
+                    sketches[day_key] = (HyperLogLog(), HyperLogLog())
+                sketches[day_key][0].add(transaction_id)
+                if customer_id is not None:
+                    sketches[day_key][1].add(customer_id)
+
+    with conn.cursor() as cur:
+        if sketches:
+            execute_values(cur, f"""
+                INSERT INTO {schema}.daily_sketches (date_key, transactions_hll, customers_hll)
+                VALUES %s
+                ON CONFLICT (date_key) DO UPDATE SET
+                    transactions_hll = EXCLUDED.transactions_hll,
+                    customers_hll = EXCLUDED.customers_hll,
+                    updated_at = CURRENT_TIMESTAMP;
+            """, [(k, t.to_bytes(), c.to_bytes()) for k, (t, c) in sketches.items()])
+    conn.commit()
+    return {"days_rebuilt": len(sketches), "mode": "missing" if missing_only else "all"}
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Unique transactions/customers per period from daily sketches")
+    parser.add_argument("--grain", choices=GRAINS, default="month")
+    parser.add_argument("--start", type=date.fromisoformat, help="First day (YYYY-MM-DD)")
+    parser.add_argument("--end", type=date.fromisoformat, help="Last day (YYYY-MM-DD)")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--exact", action="store_true", help="COUNT(DISTINCT) over fact_sales instead of sketches")
+    mode.add_argument("--compare", action="store_true", help="Show sketch estimates next to exact counts")
+    mode.add_argument("--rebuild", action="store_true", help="Sketch the days in fact_sales that have no sketch")
+    mode.add_argument("--rebuild-all", action="store_true", help="Rebuild every day's sketch from fact_sales")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    conn = get_conn()
+    try:
+        if args.rebuild or args.rebuild_all:
+            result = rebuild_daily_sketches(conn, missing_only=args.rebuild)
+        elif args.compare:
+            results = compare(conn, args.grain, args.start, args.end)
+        else:
+            results = unique_counts(conn, args.grain, args.start, args.end, args.exact)
+    finally:
+        conn.close()
+
+    if args.rebuild or args.rebuild_all:
+        print(f"Daily sketches rebuilt for {result['days_rebuilt']} day(s)")
+    else:
+        print(json.dumps({
+            "grain": args.grain,
+            "mode": "compare" if args.compare else "exact" if args.exact else "sketch",
+            "relative_standard_error": None if args.exact else round(RELATIVE_STANDARD_ERROR, 4),
+            "results": results
+        }, indent=2, default=str))
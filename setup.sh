@@ -29,4 +29,8 @@ CREATE SCHEMA IF NOT EXISTS production;
 CREATE SCHEMA IF NOT EXISTS warehouse;
 EOF
 
+# Apply sql/ddl (idempotent) and backfill derived data on existing databases
+echo " Applying schema migrations..."
+python scripts/migrate_schema.py || exit 1
+
 echo " Setup completed successfully!"
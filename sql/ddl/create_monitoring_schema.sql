@@ -0,0 +1,100 @@
+CREATE SCHEMA IF NOT EXISTS monitoring;
+
+-- One row per load stage, per table, per run. Written by the loaders as a
+-- by-product of each load so the monitor never has to scan data tables.
+CREATE TABLE IF NOT EXISTS monitoring.load_stats (
+  load_id BIGSERIAL PRIMARY KEY,
+  execution_id VARCHAR(50),
+  stage VARCHAR(50),
+  table_name VARCHAR(100),
+  rows_loaded BIGINT,
+  max_business_date DATE,
+  loaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_load_stats_table_loaded_at
+  ON monitoring.load_stats (table_name, loaded_at DESC);
+
+-- Running row counts per business date, incremented with each load's delta.
+CREATE TABLE IF NOT EXISTS monitoring.daily_counts (
+  table_name VARCHAR(100),
+  stat_date DATE,
+  row_count BIGINT,
+  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (table_name, stat_date)
+);
+
+-- Chunked staging_to_production progress: one row per run and chunk
+-- (a transaction_date range, 'undated' or 'dimensions'), committed together
+-- with the chunk's data so a rerun with the same run_id resumes after it.
+CREATE TABLE IF NOT EXISTS monitoring.transform_progress (
+  run_id VARCHAR(50),
+  chunk_name VARCHAR(50),
+  chunk_start DATE,
+  chunk_end DATE,
+  status VARCHAR(20),
+  transactions_loaded BIGINT,
+  items_loaded BIGINT,
+  attempts INT DEFAULT 0,
+  error_message TEXT,
+  completed_at TIMESTAMP,
+  PRIMARY KEY (run_id, chunk_name)
+);
+
+-- Content fingerprints of every raw file ingested (sha256 of the bytes,
+-- computed while the file streams into COPY). A staging load whose files
+-- all belong to batches that already reached production is a no-op.
+CREATE TABLE IF NOT EXISTS monitoring.raw_files (
+  sha256 CHAR(64) PRIMARY KEY,
+  file_name VARCHAR(100),
+  rows_loaded BIGINT,
+  bytes BIGINT,
+  first_execution_id VARCHAR(50),
+  last_execution_id VARCHAR(50),
+  deliveries INT DEFAULT 1,
+  first_seen_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  last_seen_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- One row per staging load; staging_to_production marks it loaded in the
+-- transaction that publishes it and skips batches that are already loaded.
+CREATE TABLE IF NOT EXISTS monitoring.staging_batches (
+  execution_id VARCHAR(50) PRIMARY KEY,
+  source VARCHAR(200),
+  status VARCHAR(20),
+  staged_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  loaded_at TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_staging_batches_staged_at
+  ON monitoring.staging_batches (staged_at DESC);
+
+-- Re-delivered rows whose content differs from what was already loaded
+-- under the same id. They are not applied; one row per distinct delivery.
+CREATE TABLE IF NOT EXISTS monitoring.changed_rows (
+  entity VARCHAR(50),
+  natural_key VARCHAR(50),
+  delivered_hash UUID,
+  stored_hash UUID,
+  execution_id VARCHAR(50),
+  deliveries INT DEFAULT 1,
+  first_seen_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  last_seen_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (entity, natural_key, delivered_hash)
+);
+
+-- Every swap of the BI-facing warehouse copy (publish_warehouse.py);
+-- the latest row is the version BI tools currently see.
+CREATE TABLE IF NOT EXISTS monitoring.warehouse_publishes (
+  version BIGSERIAL PRIMARY KEY,
+  execution_id VARCHAR(50),
+  action VARCHAR(20),
+  fact_rows BIGINT,
+  published_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- One-off backfill for data loaded before load stats existed:
+-- INSERT INTO monitoring.daily_counts (table_name, stat_date, row_count)
+-- SELECT 'production.transactions', transaction_date, COUNT(*)
+-- FROM production.transactions GROUP BY transaction_date
+-- ON CONFLICT (table_name, stat_date) DO NOTHING;
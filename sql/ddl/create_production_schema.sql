@@ -1,7 +1,44 @@
 CREATE SCHEMA IF NOT EXISTS production;
 
+-- Integer surrogate keys. Every natural id (CUST0001, PROD0001, TXN00001,
+-- ITEM00001) gets a key the first time a load sees it and keeps it across
+-- full reloads; production tables and their foreign keys join on the keys
+-- and keep the natural ids as plain columns. Natural-id lookups go through
+-- this table's primary key.
+CREATE TABLE IF NOT EXISTS production.key_map (
+  entity VARCHAR(20),
+  natural_key VARCHAR(20),
+  surrogate_key BIGINT GENERATED ALWAYS AS IDENTITY UNIQUE,
+  PRIMARY KEY (entity, natural_key)
+);
+
+-- Migration from the natural-id layout (customer_id etc. as primary keys).
+-- CREATE TABLE IF NOT EXISTS would leave those tables as they are, so they
+-- are dropped and recreated below. Production is fully reloaded from
+-- staging on every run, so nothing is lost.
+DO $$
+BEGIN
+  IF EXISTS (
+    SELECT 1 FROM information_schema.tables
+    WHERE table_schema = 'production' AND table_name = 'customers'
+  ) AND NOT EXISTS (
+    SELECT 1 FROM information_schema.columns
+    WHERE table_schema = 'production' AND table_name = 'customers' AND column_name = 'customer_key'
+  ) THEN
+    RAISE NOTICE 'Migrating production tables to surrogate keys';
+    DROP TABLE IF EXISTS
+      production.transaction_items,
+      production.transactions,
+      production.products,
+      production.customers
+    CASCADE;
+  END IF;
+END
+$$;
+
 CREATE TABLE IF NOT EXISTS production.customers (
-  customer_id VARCHAR(20) PRIMARY KEY,
+  customer_key BIGINT PRIMARY KEY,
+  customer_id VARCHAR(20) NOT NULL,
   first_name VARCHAR(50),
   last_name VARCHAR(50),
   email VARCHAR(100) UNIQUE,
@@ -16,7 +53,8 @@ CREATE TABLE IF NOT EXISTS production.customers (
 );
 
 CREATE TABLE IF NOT EXISTS production.products (
-  product_id VARCHAR(20) PRIMARY KEY,
+  product_key BIGINT PRIMARY KEY,
+  product_id VARCHAR(20) NOT NULL,
   product_name VARCHAR(100),
   category VARCHAR(50),
   sub_category VARCHAR(50),
@@ -25,13 +63,21 @@ CREATE TABLE IF NOT EXISTS production.products (
   brand VARCHAR(50),
   stock_quantity INT,
   supplier_id VARCHAR(20),
+  profit_margin DECIMAL(7,2),
+  price_category VARCHAR(20),
   created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
   updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Enrichment columns written by staging_to_production / ingest_to_production
+ALTER TABLE production.products ADD COLUMN IF NOT EXISTS profit_margin DECIMAL(7,2);
+ALTER TABLE production.products ADD COLUMN IF NOT EXISTS price_category VARCHAR(20);
+
 CREATE TABLE IF NOT EXISTS production.transactions (
-  transaction_id VARCHAR(20) PRIMARY KEY,
-  customer_id VARCHAR(20) REFERENCES production.customers(customer_id),
+  transaction_key BIGINT PRIMARY KEY,
+  transaction_id VARCHAR(20) NOT NULL,
+  customer_key BIGINT REFERENCES production.customers(customer_key),
+  customer_id VARCHAR(20),
   transaction_date DATE,
   transaction_time TIME,
   payment_method VARCHAR(50),
@@ -40,12 +86,22 @@ CREATE TABLE IF NOT EXISTS production.transactions (
   created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Lets anomaly_engine.py read only the rows loaded since its last run
+CREATE INDEX IF NOT EXISTS idx_transactions_created_at
+  ON production.transactions (created_at);
+
 CREATE TABLE IF NOT EXISTS production.transaction_items (
-  item_id VARCHAR(20) PRIMARY KEY,
-  transaction_id VARCHAR(20) REFERENCES production.transactions(transaction_id),
-  product_id VARCHAR(20) REFERENCES production.products(product_id),
+  item_key BIGINT PRIMARY KEY,
+  item_id VARCHAR(20) NOT NULL,
+  transaction_key BIGINT REFERENCES production.transactions(transaction_key),
+  transaction_id VARCHAR(20),
+  product_key BIGINT REFERENCES production.products(product_key),
+  product_id VARCHAR(20),
   quantity INT,
   unit_price DECIMAL(10,2),
   discount_percentage DECIMAL(5,2),
   line_total DECIMAL(12,2)
 );
+
+CREATE INDEX IF NOT EXISTS idx_transaction_items_transaction_key
+  ON production.transaction_items (transaction_key);
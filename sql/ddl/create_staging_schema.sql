@@ -1,6 +1,10 @@
 CREATE SCHEMA IF NOT EXISTS staging;
 
-CREATE TABLE IF NOT EXISTS staging.customers (
+-- The batch tables are UNLOGGED to match the default staging_load profile
+-- in config.yaml; ingest_to_staging.py switches them to LOGGED when the
+-- durable profile is selected.
+
+CREATE UNLOGGED TABLE IF NOT EXISTS staging.customers (
   customer_id VARCHAR(20),
   first_name VARCHAR(50),
   last_name VARCHAR(50),
@@ -14,7 +18,7 @@ CREATE TABLE IF NOT EXISTS staging.customers (
   loaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
-CREATE TABLE IF NOT EXISTS staging.products (
+CREATE UNLOGGED TABLE IF NOT EXISTS staging.products (
   product_id VARCHAR(20),
   product_name VARCHAR(100),
   category VARCHAR(50),
@@ -27,7 +31,7 @@ CREATE TABLE IF NOT EXISTS staging.products (
   loaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
-CREATE TABLE IF NOT EXISTS staging.transactions (
+CREATE UNLOGGED TABLE IF NOT EXISTS staging.transactions (
   transaction_id VARCHAR(20),
   customer_id VARCHAR(20),
   transaction_date DATE,
@@ -38,7 +42,7 @@ CREATE TABLE IF NOT EXISTS staging.transactions (
   loaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
-CREATE TABLE IF NOT EXISTS staging.transaction_items (
+CREATE UNLOGGED TABLE IF NOT EXISTS staging.transaction_items (
   item_id VARCHAR(20),
   transaction_id VARCHAR(20),
   product_id VARCHAR(20),
@@ -48,3 +52,21 @@ CREATE TABLE IF NOT EXISTS staging.transaction_items (
   line_total DECIMAL(12,2),
   loaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
+
+-- The indexes chunked staging_to_production needs (transaction_date ranges
+-- and their items) are built by it after the COPY and dropped again by the
+-- next staging load, so COPY never maintains them. Older databases had them
+-- here permanently.
+DROP INDEX IF EXISTS staging.idx_staging_transactions_date;
+DROP INDEX IF EXISTS staging.idx_staging_transaction_items_transaction;
+
+-- Every event scripts/streaming/stream_ingest.py has loaded, kept until
+-- retention removes it so each batch reload of production can re-read them.
+-- Kept apart from the batch tables above, which ingest_to_staging truncates.
+CREATE TABLE IF NOT EXISTS staging.stream_transactions (
+  LIKE staging.transactions INCLUDING DEFAULTS
+);
+
+CREATE TABLE IF NOT EXISTS staging.stream_transaction_items (
+  LIKE staging.transaction_items INCLUDING DEFAULTS
+);
@@ -12,3 +12,146 @@ CREATE TABLE IF NOT EXISTS warehouse.dim_date (
   week_of_year INT,
   is_weekend BOOLEAN
 );
+
+-- SCD type 2 dimensions: one is_current row per natural key (enforced by the
+-- partial unique indexes). is_inferred marks placeholder members created by
+-- the fact load for keys that arrived before their dimension row.
+CREATE TABLE IF NOT EXISTS warehouse.dim_customers (
+  customer_key SERIAL PRIMARY KEY,
+  customer_id VARCHAR(20) NOT NULL,
+  full_name VARCHAR(101),
+  email VARCHAR(100),
+  city VARCHAR(50),
+  state VARCHAR(50),
+  country VARCHAR(100),
+  age_group VARCHAR(20),
+  registration_date DATE,
+  effective_date DATE,
+  end_date DATE,
+  is_current BOOLEAN DEFAULT TRUE,
+  is_inferred BOOLEAN DEFAULT FALSE
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_dim_customers_current
+  ON warehouse.dim_customers (customer_id) WHERE is_current;
+
+CREATE TABLE IF NOT EXISTS warehouse.dim_products (
+  product_key SERIAL PRIMARY KEY,
+  product_id VARCHAR(20) NOT NULL,
+  product_name VARCHAR(100),
+  category VARCHAR(50),
+  sub_category VARCHAR(50),
+  price_range VARCHAR(20),
+  effective_date DATE,
+  end_date DATE,
+  is_current BOOLEAN DEFAULT TRUE,
+  is_inferred BOOLEAN DEFAULT FALSE
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_dim_products_current
+  ON warehouse.dim_products (product_id) WHERE is_current;
+
+CREATE TABLE IF NOT EXISTS warehouse.dim_payment_method (
+  payment_method_key SERIAL PRIMARY KEY,
+  payment_method_name VARCHAR(50) UNIQUE NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS warehouse.fact_sales (
+  sales_key BIGSERIAL PRIMARY KEY,
+  item_key BIGINT UNIQUE NOT NULL,
+  item_id VARCHAR(20),
+  transaction_key BIGINT,
+  transaction_id VARCHAR(20),
+  date_key INT REFERENCES warehouse.dim_date(date_key),
+  customer_key INT REFERENCES warehouse.dim_customers(customer_key),
+  product_key INT REFERENCES warehouse.dim_products(product_key),
+  payment_method_key INT REFERENCES warehouse.dim_payment_method(payment_method_key),
+  quantity INT,
+  unit_price DECIMAL(10,2),
+  discount_amount DECIMAL(12,2),
+  line_total DECIMAL(12,2),
+  profit DECIMAL(12,2),
+  row_hash UUID,
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Fingerprint of the delivered item, compared by load_warehouse.py on re-delivery
+ALTER TABLE warehouse.fact_sales ADD COLUMN IF NOT EXISTS row_hash UUID;
+
+-- Migration from the natural-id layout (item_id UNIQUE, no item_key).
+-- fact_sales accumulates history, so it is migrated in place: every stored
+-- id gets its key from production.key_map (the same keys later loads use)
+-- and the unique constraint moves from item_id to item_key.
+DO $$
+BEGIN
+  IF NOT EXISTS (
+    SELECT 1 FROM information_schema.columns
+    WHERE table_schema = 'warehouse' AND table_name = 'fact_sales' AND column_name = 'item_key'
+  ) THEN
+    RAISE NOTICE 'Migrating warehouse.fact_sales to surrogate keys';
+    ALTER TABLE warehouse.fact_sales
+      ADD COLUMN item_key BIGINT,
+      ADD COLUMN IF NOT EXISTS transaction_key BIGINT;
+
+    INSERT INTO production.key_map (entity, natural_key)
+    SELECT DISTINCT 'item', item_id FROM warehouse.fact_sales WHERE item_id IS NOT NULL
+    ON CONFLICT DO NOTHING;
+    INSERT INTO production.key_map (entity, natural_key)
+    SELECT DISTINCT 'transaction', transaction_id FROM warehouse.fact_sales WHERE transaction_id IS NOT NULL
+    ON CONFLICT DO NOTHING;
+
+    UPDATE warehouse.fact_sales fs
+    SET item_key = k.surrogate_key
+    FROM production.key_map k
+    WHERE k.entity = 'item' AND k.natural_key = fs.item_id;
+    UPDATE warehouse.fact_sales fs
+    SET transaction_key = k.surrogate_key
+    FROM production.key_map k
+    WHERE k.entity = 'transaction' AND k.natural_key = fs.transaction_id;
+
+    ALTER TABLE warehouse.fact_sales
+      DROP CONSTRAINT IF EXISTS fact_sales_item_id_key,
+      ALTER COLUMN item_id DROP NOT NULL,
+      ALTER COLUMN item_key SET NOT NULL,
+      ADD CONSTRAINT fact_sales_item_key_key UNIQUE (item_key);
+  END IF;
+END
+$$;
+
+-- One row per customer, maintained incrementally by load_warehouse.py from
+-- the fact rows added since the last run. Segments and RFM scores are
+-- refreshed from this table, so customer-level queries never scan fact_sales.
+CREATE TABLE IF NOT EXISTS warehouse.customer_lifetime (
+  customer_id VARCHAR(20) PRIMARY KEY,
+  total_spent DECIMAL(14,2) NOT NULL DEFAULT 0,
+  total_profit DECIMAL(14,2) NOT NULL DEFAULT 0,
+  order_count INT NOT NULL DEFAULT 0,
+  units_bought INT NOT NULL DEFAULT 0,
+  first_purchase_date DATE,
+  last_purchase_date DATE,
+  spending_segment VARCHAR(20),
+  recency_score SMALLINT,
+  frequency_score SMALLINT,
+  monetary_score SMALLINT,
+  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_customer_lifetime_segment
+  ON warehouse.customer_lifetime (spending_segment);
+
+-- Highest fact_sales.sales_key already folded into each incremental aggregate
+CREATE TABLE IF NOT EXISTS warehouse.aggregate_watermarks (
+  aggregate_name VARCHAR(50) PRIMARY KEY,
+  last_sales_key BIGINT NOT NULL DEFAULT 0,
+  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Per-day HyperLogLog sketches (see scripts/transformation/hll.py) of the
+-- distinct transactions and customers in fact_sales. Any period's unique
+-- counts come from merging its daily sketches instead of COUNT(DISTINCT).
+CREATE TABLE IF NOT EXISTS warehouse.daily_sketches (
+  date_key INT PRIMARY KEY REFERENCES warehouse.dim_date(date_key),
+  transactions_hll BYTEA NOT NULL,
+  customers_hll BYTEA NOT NULL,
+  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
@@ -22,7 +22,7 @@ Query 2: Monthly Sales Trend
 SELECT
     dd.year || '-' || LPAD(dd.month::TEXT, 2, '0') AS year_month,
     SUM(fs.line_total) AS total_revenue,
-    COUNT(DISTINCT fs.transaction_id) AS total_transactions,
+    COUNT(DISTINCT fs.transaction_key) AS total_transactions,
     AVG(fs.line_total) AS average_order_value,
     COUNT(DISTINCT fs.customer_key) AS unique_customers
 FROM warehouse.fact_sales fs
@@ -35,25 +35,14 @@ ORDER BY dd.year, dd.month;
 /* =========================================================
 Query 3: Customer Segmentation Analysis
 ========================================================= */
-WITH customer_totals AS (
-    SELECT
-        customer_key,
-        SUM(line_total) AS total_spent,
-        COUNT(DISTINCT transaction_id) AS txn_count
-    FROM warehouse.fact_sales
-    GROUP BY customer_key
-)
+-- Reads warehouse.customer_lifetime (one row per customer, kept up to date
+-- by load_warehouse.py) instead of re-aggregating fact_sales
 SELECT
-    CASE
-        WHEN total_spent < 1000 THEN '$0-$1,000'
-        WHEN total_spent < 5000 THEN '$1,000-$5,000'
-        WHEN total_spent < 10000 THEN '$5,000-$10,000'
-        ELSE '$10,000+'
-    END AS spending_segment,
+    spending_segment,
     COUNT(*) AS customer_count,
     SUM(total_spent) AS total_revenue,
-    AVG(total_spent / txn_count) AS avg_transaction_value
-FROM customer_totals
+    AVG(total_spent / NULLIF(order_count, 0)) AS avg_transaction_value
+FROM warehouse.customer_lifetime
 GROUP BY spending_segment;
 
 
@@ -78,11 +67,11 @@ Query 5: Payment Method Distribution
 ========================================================= */
 SELECT
     pm.payment_method_name,
-    COUNT(DISTINCT fs.transaction_id) AS transaction_count,
+    COUNT(DISTINCT fs.transaction_key) AS transaction_count,
     SUM(fs.line_total) AS total_revenue,
     ROUND(
-        COUNT(DISTINCT fs.transaction_id) * 100.0 /
-        SUM(COUNT(DISTINCT fs.transaction_id)) OVER (), 2
+        COUNT(DISTINCT fs.transaction_key) * 100.0 /
+        SUM(COUNT(DISTINCT fs.transaction_key)) OVER (), 2
     ) AS pct_of_transactions,
     ROUND(
         SUM(fs.line_total) * 100.0 /
@@ -116,15 +105,17 @@ Query 7: Customer Lifetime Value (CLV)
 SELECT
     dc.customer_id,
     dc.full_name,
-    SUM(fs.line_total) AS total_spent,
-    COUNT(DISTINCT fs.transaction_id) AS transaction_count,
+    cl.total_spent,
+    cl.order_count AS transaction_count,
     CURRENT_DATE - dc.registration_date AS days_since_registration,
-    AVG(fs.line_total) AS avg_order_value
-FROM warehouse.fact_sales fs
+    cl.total_spent / NULLIF(cl.order_count, 0) AS avg_order_value,
+    cl.recency_score,
+    cl.frequency_score,
+    cl.monetary_score
+FROM warehouse.customer_lifetime cl
 JOIN warehouse.dim_customers dc
-  ON fs.customer_key = dc.customer_key
-WHERE dc.is_current = TRUE
-GROUP BY dc.customer_id, dc.full_name, dc.registration_date;
+  ON dc.customer_id = cl.customer_id
+WHERE dc.is_current = TRUE;
 
 
 /* =========================================================
@@ -158,7 +149,7 @@ FROM (
         dd.day_name,
         dd.date_key,
         SUM(fs.line_total) AS daily_rev,
-        COUNT(DISTINCT fs.transaction_id) AS daily_txn
+        COUNT(DISTINCT fs.transaction_key) AS daily_txn
     FROM warehouse.fact_sales fs
     JOIN warehouse.dim_date dd
       ON fs.date_key = dd.date_key
@@ -31,8 +31,8 @@ ORDER BY day;
 SELECT COUNT(*) AS orphan_items
 FROM production.transaction_items ti
 LEFT JOIN production.transactions t
-ON ti.transaction_id = t.transaction_id
-WHERE t.transaction_id IS NULL;
+ON ti.transaction_key = t.transaction_key
+WHERE t.transaction_key IS NULL;
 
 -- Null violations
 SELECT COUNT(*) AS null_customers
@@ -48,3 +48,20 @@ FROM pg_stat_activity;
 
 SELECT
     pg_database_size(current_database()) AS database_size_bytes;
+
+
+-- ==============================
+-- 5. LOAD STATS (cheap freshness / volume)
+-- ==============================
+-- Latest load per table, written by the loaders
+SELECT DISTINCT ON (table_name)
+    table_name, execution_id, rows_loaded, max_business_date, loaded_at
+FROM monitoring.load_stats
+ORDER BY table_name, loaded_at DESC;
+
+-- Daily transaction volume without touching production.transactions
+SELECT stat_date AS day, row_count AS transaction_count
+FROM monitoring.daily_counts
+WHERE table_name = 'production.transactions'
+  AND stat_date >= CURRENT_DATE - INTERVAL '30 days'
+ORDER BY stat_date;
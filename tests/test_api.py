@@ -0,0 +1,135 @@
+import os
+import sys
+from datetime import date
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts", "api"))
+import analytics_api  # noqa: E402
+from analytics_api import BadRequest, ResultCache, build_sql, parse_params  # noqa: E402
+from analytics_queries import render  # noqa: E402  (path added by analytics_api)
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(analytics_api.time, "time", clock)
+    return clock
+
+# --------------------------------------------------
+# ResultCache
+# --------------------------------------------------
+def test_cache_hit_and_miss(clock):
+    cache = ResultCache(max_entries=2, ttl=60)
+
+    assert cache.get("a") is None
+    cache.put("a", 1)
+
+    assert cache.get("a") == 1
+    assert cache.stats["hits"] == 1
+    assert cache.stats["misses"] == 1
+    assert cache.hit_ratio() == 0.5
+
+def test_cache_evicts_least_recently_used(clock):
+    cache = ResultCache(max_entries=2, ttl=60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats["evictions"] == 1
+
+def test_cache_entries_expire_after_ttl(clock):
+    cache = ResultCache(max_entries=2, ttl=60)
+    cache.put("a", 1)
+
+    clock.now += 59
+    assert cache.get("a") == 1
+
+    clock.now += 1
+    assert cache.get("a") is None
+    assert cache.stats["expired"] == 1
+    assert "a" not in cache.entries
+
+def test_put_refreshes_ttl(clock):
+    cache = ResultCache(max_entries=2, ttl=60)
+    cache.put("a", 1)
+    clock.now += 50
+    cache.put("a", 2)
+
+    clock.now += 50
+    assert cache.get("a") == 2
+
+# --------------------------------------------------
+# parse_params
+# --------------------------------------------------
+def test_parse_params_dates_category_and_limit():
+    params = parse_params(
+        "top_products", "start_date=2024-01-01&end_date=2024-03-31&category=Home%20%26%20Kitchen&limit=5", 100
+    )
+
+    assert params == {
+        "start_date": date(2024, 1, 1),
+        "end_date": date(2024, 3, 31),
+        "category": "Home & Kitchen",
+        "limit": 5
+    }
+
+def test_parse_params_default_limit():
+    assert parse_params("top_products", "", 100) == {"limit": 10}
+
+@pytest.mark.parametrize("query_string", [
+    "limit=0",
+    "limit=101",
+    "limit=ten",
+    "start_date=2024-13-01",
+    "start_date=2024-02-01&end_date=2024-01-01",
+    "region=EU"
+])
+def test_parse_params_rejects(query_string):
+    with pytest.raises(BadRequest):
+        parse_params("top_products", query_string, 100)
+
+def test_parse_params_query_without_parameters():
+    with pytest.raises(BadRequest):
+        parse_params("customer_segmentation", "start_date=2024-01-01", 100)
+
+# --------------------------------------------------
+# build_sql
+# --------------------------------------------------
+def test_build_sql_without_filters():
+    sql, sql_params = build_sql("monthly_trend", "warehouse_published", {})
+
+    assert "warehouse_published.fact_sales" in sql
+    assert "WHERE TRUE" in sql
+    assert "{" not in sql
+    assert sql_params == {}
+
+def test_build_sql_filters_on_date_keys_and_category():
+    params = {"start_date": date(2024, 1, 1), "end_date": date(2024, 3, 31), "category": "Books", "limit": 5}
+
+    sql, sql_params = build_sql("top_products", "warehouse", params)
+
+    assert "fs.date_key >= %(start_key)s" in sql
+    assert "fs.date_key <= %(end_key)s" in sql
+    assert "category = %(category)s" in sql
+    assert "LIMIT %(limit)s" in sql
+    assert sql_params["start_key"] == 20240101
+    assert sql_params["end_key"] == 20240331
+    assert sql_params["category"] == "Books"
+    assert sql_params["limit"] == 5
+
+def test_build_sql_matches_batch_report_without_filters():
+    sql, _ = build_sql("category_performance", "warehouse", {})
+
+    assert sql == render("category_performance", "warehouse")
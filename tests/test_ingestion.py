@@ -0,0 +1,64 @@
+import os
+import sys
+
+import pytest
+
+# The single-pass cleansers must reproduce staging_to_production's SQL
+# (INITCAP, NUMERIC rounding, ROUND) exactly; these cover them without a database.
+pa = pytest.importorskip("pyarrow")
+np = pytest.importorskip("numpy")
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts", "ingestion"))
+import ingest_to_production  # noqa: E402
+
+def string_batch(columns):
+    return pa.RecordBatch.from_pydict({name: pa.array(values, pa.string()) for name, values in columns.items()})
+
+# --------------------------------------------------
+# SQL function equivalents
+# --------------------------------------------------
+def test_initcap_matches_postgres_word_boundaries():
+    values = pa.array(["o'brien", "MARY-ANNE smith", "3rd street", "a_b  c", None])
+
+    result = ingest_to_production.initcap(values).to_pylist()
+
+    assert result == ["O'Brien", "Mary-Anne Smith", "3rd Street", "A_B  C", None]
+
+def test_numeric_units_rounds_half_away_from_zero():
+    values = pa.array(["12.345", "12.344", "-1.005", "0.5", "7", None])
+
+    result = ingest_to_production.numeric_units(values).to_pylist()
+
+    assert result == [1235, 1234, -101, 50, 700, None]
+
+def test_numeric_units_scale():
+    assert ingest_to_production.numeric_units(pa.array(["1.2345"]), scale=3).to_pylist() == [1235]
+
+def test_round_half_away():
+    numerator = np.array([5, -5, 4, -4, 15, -15, 0], dtype=np.int64)
+
+    result = ingest_to_production.round_half_away(numerator, 10)
+
+    assert result.tolist() == [1, -1, 0, 0, 2, -2, 0]
+
+# --------------------------------------------------
+# Cleansing
+# --------------------------------------------------
+def test_cleanse_transaction_items_line_total_rounding():
+    batch = string_batch({
+        "item_id": ["I1", "I2", "I3", "I4"],
+        "transaction_id": ["T1", "T1", "T2", "T2"],
+        "product_id": ["P1", "P2", "P1", "P3"],
+        "quantity": ["1", "3", "0", "2"],
+        "unit_price": ["10.05", "19.99", "5.00", "4.00"],
+        "discount_percentage": ["50", "15", "0", None],
+        "line_total": ["", "", "", ""]
+    })
+
+    table, rejected = ingest_to_production.cleanse_transaction_items(batch)
+
+    # 10.05 * 0.5 = 5.025 exactly, which NUMERIC rounds up (float math gives 5.02)
+    assert table.column("line_total").to_pylist() == [5.03, 50.97, None]
+    assert table.column("item_id").to_pylist() == ["I1", "I2", "I4"]
+    assert table.column("quantity").to_pylist() == [1, 3, 2]
+    assert rejected == {"non_positive_quantity": 1}
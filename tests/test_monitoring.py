@@ -0,0 +1,107 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts", "monitoring"))
+from anomaly_engine import WARMUP_OBSERVATIONS, Z_THRESHOLD, delta_observations, update_series  # noqa: E402
+
+def warmed_series(values):
+    series = None
+    for value in values:
+        series, _ = update_series(series, value)
+    return series
+
+# --------------------------------------------------
+# update_series
+# --------------------------------------------------
+def test_first_observation_starts_the_series():
+    series, anomaly = update_series(None, 120.0)
+
+    assert series == {"observations": 1, "mean": 120.0, "variance": 0.0, "last_value": 120.0}
+    assert anomaly is None
+
+def test_no_anomaly_during_warmup():
+    series = warmed_series([100, 101, 99])
+    assert series["observations"] < WARMUP_OBSERVATIONS
+
+    _, anomaly = update_series(series, 10000)
+
+    assert anomaly is None
+
+def test_spike_after_warmup_is_reported():
+    series = warmed_series([100, 102, 98, 101, 99, 100, 103, 97])
+
+    _, anomaly = update_series(series, 1000)
+
+    assert anomaly["direction"] == "spike"
+    assert anomaly["z_score"] > Z_THRESHOLD
+    assert anomaly["value"] == 1000
+
+def test_drop_after_warmup_is_reported():
+    series = warmed_series([100, 102, 98, 101, 99, 100, 103, 97])
+
+    _, anomaly = update_series(series, 0)
+
+    assert anomaly["direction"] == "drop"
+    assert anomaly["z_score"] < -Z_THRESHOLD
+
+def test_z_score_is_distance_in_standard_deviations():
+    series = {"observations": 10, "mean": 100.0, "variance": 4.0, "last_value": 100.0}
+
+    _, anomaly = update_series(series, 110)
+
+    assert anomaly["z_score"] == 5.0
+    assert anomaly["expected"] == 100.0
+
+def test_outlier_is_clipped_before_it_updates_the_baseline():
+    series = {"observations": 10, "mean": 100.0, "variance": 4.0, "last_value": 100.0}
+
+    updated, _ = update_series(series, 10000)
+
+    # folded in as mean + Z_THRESHOLD * std, not as 10000
+    clipped = 100.0 + Z_THRESHOLD * 2.0
+    assert updated["mean"] == pytest.approx(100.0 + 0.1 * (clipped - 100.0))
+    assert updated["last_value"] == 10000
+    assert updated["observations"] == 11
+
+def test_constant_series_never_flags():
+    series = warmed_series([50] * 10)
+
+    _, anomaly = update_series(series, 50)
+
+    assert anomaly is None
+
+# --------------------------------------------------
+# delta_observations
+# --------------------------------------------------
+# (all_methods, all_categories, method, category, orders, items, units, revenue, max_ts)
+DELTA_ROWS = [
+    (1, 1, None, None, 10, 25, 40, 500.0, "2025-01-01T10:00:00"),
+    (0, 1, "UPI", None, 4, 10, 16, 200.0, "2025-01-01T09:00:00"),
+    (0, 1, "Credit Card", None, 6, 15, 24, 300.0, "2025-01-01T10:00:00"),
+    (1, 0, None, "Electronics", 7, 12, 30, 450.0, "2025-01-01T10:00:00")
+]
+
+def test_delta_observations_totals_and_mix():
+    observations, watermark = delta_observations(DELTA_ROWS, known_series={})
+
+    assert watermark == "2025-01-01T10:00:00"
+    assert observations["revenue"] == 500.0
+    assert observations["orders"] == 10
+    assert observations["items_per_order"] == 2.5
+    assert observations["payment_mix:UPI"] == 0.4
+    assert observations["payment_mix:Credit Card"] == 0.6
+    assert observations["category_units:Electronics"] == 30
+    assert observations["category_revenue:Electronics"] == 450.0
+
+def test_delta_observations_missing_known_series_is_zero():
+    known = {"payment_mix:Cash on Delivery": {}, "category_units:Books": {}, "revenue": {}}
+
+    observations, _ = delta_observations(DELTA_ROWS, known_series=known)
+
+    assert observations["payment_mix:Cash on Delivery"] == 0.0
+    assert observations["category_units:Books"] == 0.0
+
+def test_delta_observations_empty_delta():
+    assert delta_observations([], known_series={"revenue": {}}) == ({}, None)
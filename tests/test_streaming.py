@@ -0,0 +1,86 @@
+import os
+import sys
+import json
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts", "streaming"))
+from stream_ingest import SegmentTailer  # noqa: E402
+
+def event(seq):
+    return {"seq": seq}
+
+def write_segment(directory, name, events, partial=None):
+    with open(directory / name, "ab") as f:
+        for e in events:
+            f.write((json.dumps(e) + "\n").encode())
+        if partial is not None:
+            f.write(partial.encode())
+
+def tailer(tmp_path):
+    return SegmentTailer(str(tmp_path / "segments"), str(tmp_path / "checkpoint" / "checkpoint.json"))
+
+# --------------------------------------------------
+# SegmentTailer
+# --------------------------------------------------
+def test_missing_directory_reads_nothing(tmp_path):
+    assert tailer(tmp_path).read(100) == []
+
+def test_reads_segments_in_name_order(tmp_path):
+    segments = tmp_path / "segments"
+    segments.mkdir()
+    write_segment(segments, "events_2.jsonl", [event(3)])
+    write_segment(segments, "events_1.jsonl", [event(1), event(2)])
+    write_segment(segments, "notes.txt", [event(99)])
+
+    assert tailer(tmp_path).read(100) == [event(1), event(2), event(3)]
+
+def test_partial_trailing_line_waits_for_the_rest(tmp_path):
+    segments = tmp_path / "segments"
+    segments.mkdir()
+    write_segment(segments, "events_1.jsonl", [event(1)], partial='{"seq": ')
+
+    t = tailer(tmp_path)
+    assert t.read(100) == [event(1)]
+    t.commit()
+
+    # the producer finishes the line
+    write_segment(segments, "events_1.jsonl", [], partial="2}\n")
+
+    assert t.read(100) == [event(2)]
+
+def test_max_events_leaves_the_rest_for_the_next_read(tmp_path):
+    segments = tmp_path / "segments"
+    segments.mkdir()
+    write_segment(segments, "events_1.jsonl", [event(i) for i in range(5)])
+
+    t = tailer(tmp_path)
+    assert t.read(3) == [event(0), event(1), event(2)]
+    t.commit()
+
+    assert t.read(3) == [event(3), event(4)]
+
+def test_uncommitted_batch_is_replayed_after_restart(tmp_path):
+    segments = tmp_path / "segments"
+    segments.mkdir()
+    write_segment(segments, "events_1.jsonl", [event(1), event(2)])
+
+    first = tailer(tmp_path)
+    assert first.read(1) == [event(1)]
+    first.commit()
+    assert first.read(1) == [event(2)]
+    # crash before the load commits: the checkpoint still points after event 1
+
+    assert tailer(tmp_path).read(100) == [event(2)]
+
+def test_commit_forgets_removed_segments(tmp_path):
+    segments = tmp_path / "segments"
+    segments.mkdir()
+    write_segment(segments, "events_1.jsonl", [event(1)])
+    write_segment(segments, "events_2.jsonl", [event(2)])
+
+    t = tailer(tmp_path)
+    t.read(100)
+    os.remove(segments / "events_1.jsonl")
+    t.commit()
+
+    with open(tmp_path / "checkpoint" / "checkpoint.json") as f:
+        assert list(json.load(f)) == ["events_2.jsonl"]
@@ -0,0 +1,57 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts", "transformation"))
+from hll import PRECISION, RELATIVE_STANDARD_ERROR, HyperLogLog  # noqa: E402
+
+def sketch(values, precision=PRECISION):
+    hll = HyperLogLog(precision)
+    hll.update(values)
+    return hll
+
+# --------------------------------------------------
+# HyperLogLog
+# --------------------------------------------------
+def test_empty_sketch_estimates_zero():
+    assert HyperLogLog().estimate() == 0
+
+@pytest.mark.parametrize("count", [100, 5000, 200000])
+def test_estimate_within_error_bound(count):
+    estimate = sketch(f"TXN{i:08d}" for i in range(count)).estimate()
+
+    # 3 standard errors: fails on a broken estimator, not on an unlucky hash
+    assert abs(estimate - count) <= 3 * RELATIVE_STANDARD_ERROR * count + 1
+
+def test_duplicates_do_not_change_the_estimate():
+    values = [f"CUST{i:04d}" for i in range(1000)]
+
+    assert sketch(values * 5).estimate() == sketch(values).estimate()
+
+def test_merge_equals_sketch_of_union():
+    first = [f"CUST{i:05d}" for i in range(0, 30000)]
+    second = [f"CUST{i:05d}" for i in range(20000, 50000)]
+
+    merged = sketch(first).merge(sketch(second))
+
+    assert merged.registers == sketch(first + second).registers
+
+def test_merge_rejects_different_precision():
+    with pytest.raises(ValueError):
+        HyperLogLog(12).merge(HyperLogLog(14))
+
+def test_serialization_round_trip():
+    original = sketch(range(10000))
+
+    restored = HyperLogLog.from_bytes(original.to_bytes())
+
+    assert restored.precision == original.precision
+    assert restored.registers == original.registers
+    assert restored.estimate() == original.estimate()
+
+def test_from_bytes_accepts_memoryview():
+    # psycopg2 returns BYTEA columns as memoryview
+    original = sketch(["a", "b", "c"])
+
+    assert HyperLogLog.from_bytes(memoryview(original.to_bytes())).registers == original.registers